@@ -0,0 +1,64 @@
+"""
+Custo de validação por chamada: caminho antigo (create_model a cada request)
+contra o SchemaCompiler com cache por (prompt id, versão).
+
+    PYTHONPATH=src python benchmarks/schema_validation.py
+"""
+from __future__ import annotations
+
+import json
+import timeit
+from typing import Any, Dict, Type
+
+from pydantic import BaseModel, create_model
+
+from app.infrastructure.llm.schema_compiler import SchemaCompiler
+from app.prompts.registry import PromptRegistry
+
+PAYLOAD = {"intent": "billing", "confidence": 0.93}
+
+
+def _legacy_model(name: str, schema: Dict[str, Any]) -> Type[BaseModel]:
+    # cópia do conversor anterior, só para servir de baseline
+    fields = {}
+    for key, spec in schema.get("properties", {}).items():
+        py_type = {
+            "string": str,
+            "number": float,
+            "integer": int,
+            "boolean": bool,
+            "object": dict,
+            "array": list,
+        }.get(spec.get("type"), Any)
+        fields[key] = (py_type, None)
+    Model = create_model(name, **fields)
+    if schema.get("additionalProperties", True) is False:
+        Model.model_config["extra"] = "forbid"
+    return Model
+
+
+def main(number: int = 2000) -> None:
+    registry = PromptRegistry()
+    registry.load()
+    spec = registry.get("classifier-agent")
+    compiler = SchemaCompiler()
+
+    def legacy() -> None:
+        _legacy_model(spec.id, spec.output_schema).model_validate(PAYLOAD).model_dump()
+
+    def compiled() -> None:
+        compiler.validate(spec, PAYLOAD)
+
+    legacy_s = timeit.timeit(legacy, number=number)
+    compiled_s = timeit.timeit(compiled, number=number)
+    print(json.dumps({
+        "benchmark": "schema_validation",
+        "calls": number,
+        "legacy_us_per_call": round(legacy_s / number * 1e6, 2),
+        "compiled_us_per_call": round(compiled_s / number * 1e6, 2),
+        "speedup": round(legacy_s / compiled_s, 1),
+    }))
+
+
+if __name__ == "__main__":
+    main()
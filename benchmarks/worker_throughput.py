@@ -0,0 +1,492 @@
+"""
+Throughput e latência do próprio worker, sem a OpenAI: um LLMPort falso
+(latência log-normal, taxa de erro e de JSON malformado configuráveis) e
+uma fila em memória no lugar do SQS. O resto é o código real: o loop do
+main (threads) ou o AsyncWorker, BatchAcknowledger, ProcessMessage, o
+grafo LangGraph e a renderização do PromptRegistry.
+
+    PYTHONPATH=src python benchmarks/worker_throughput.py --concurrency 1,4,16
+    PYTHONPATH=src python benchmarks/worker_throughput.py -o after.json --baseline before.json
+
+Cada nível de concorrência vira uma linha JSON no stdout; `-o` grava o
+conjunto (com o commit) para comparar com `--baseline` em outra execução.
+"""
+from __future__ import annotations
+
+import os
+
+# pydantic-settings exige as chaves mesmo sem uso real
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("PG_DATABASE_URL", "postgresql://benchmark")
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+import structlog
+
+from app.settings.settings import settings
+from app.logging import configure_logging
+from app.main import _run_threaded
+from app.async_worker import AsyncWorker
+from app.domain.errors import TransientError
+from app.prompts.registry import PromptRegistry
+from app.infrastructure.llm.schema_compiler import SchemaCompiler
+from app.application.ports.llm import FusedResponse, LLMPort, LLMRequest, LLMResponse
+from app.application.ports.queue import QueueMessage
+from app.application.services.acknowledger import BatchAcknowledger
+from app.application.services.cascade import CascadeRouter
+from app.application.use_cases.process_message import ProcessMessage
+from app.infrastructure.memory.queue import InMemoryQueueAdapter
+
+SAMPLE_TEXTS = (
+    "Minha fatura deste mês veio com um valor maior do que o contratado.",
+    "Quero cancelar o plano e saber se existe multa de fidelidade.",
+    "A internet cai toda noite depois das 22h, já reiniciei o modem.",
+    "Como faço para trocar a data de vencimento do boleto?",
+    "Recebi uma cobrança duplicada no cartão, preciso do estorno.",
+)
+INTENTS = ("billing", "cancellation", "technical_support", "account", "refund")
+USAGE = {"input_tokens": 120, "output_tokens": 20, "total_tokens": 140}
+
+
+@dataclass(frozen=True)
+class FakeLLMConfig:
+    latency_median_ms: float = 50.0
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0
+    malformed_rate: float = 0.0
+    seed: int = 42
+
+
+class StageClock:
+    """CPU de thread acumulada por estágio (render, validate)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._seconds: Dict[str, float] = {}
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        started = time.thread_time()
+        try:
+            yield
+        finally:
+            elapsed = time.thread_time() - started
+            with self._lock:
+                self._seconds[stage] = self._seconds.get(stage, 0.0) + elapsed
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._seconds)
+
+
+class FakeLLM(LLMPort):
+    """
+    Renderiza o prompt e valida a saída como o adapter real, mas a chamada
+    é um sleep sorteado. JSON malformado custa uma segunda chamada (o
+    reparo); erro vira TransientError, como depois de esgotar os retries.
+    """
+
+    def __init__(self, registry: PromptRegistry, config: FakeLLMConfig, clock: StageClock):
+        self._registry = registry
+        self._config = config
+        self._clock = clock
+        self._schemas = SchemaCompiler()
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "errors": 0, "malformed": 0, "repairs": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.counters[key] += 1
+
+    def _latency(self) -> float:
+        mu = math.log(self._config.latency_median_ms / 1000)
+        return self._rng.lognormvariate(mu, self._config.latency_sigma)
+
+    def _render(self, prompt_ids: List[str], variables: Dict[str, Any]) -> None:
+        with self._clock.measure("render"):
+            for prompt_id in prompt_ids:
+                self._registry.render_messages(prompt_id, variables)
+
+    def _payload(self) -> Dict[str, Any]:
+        return {"intent": self._rng.choice(INTENTS), "confidence": round(self._rng.uniform(0.6, 1.0), 2)}
+
+    def _outcome(self) -> str:
+        """Sorteia o resultado e conta a chamada: ok | error | malformed."""
+        self._count("calls")
+        roll = self._rng.random()
+        if roll < self._config.error_rate:
+            self._count("errors")
+            return "error"
+        if roll < self._config.error_rate + self._config.malformed_rate:
+            self._count("malformed")
+            return "malformed"
+        return "ok"
+
+    def _text(self, outcome: str, payload: Dict[str, Any]) -> str:
+        text = json.dumps(payload)
+        return text[: len(text) // 2] if outcome == "malformed" else text
+
+    def _validate(self, prompt_id: str, text: str) -> Dict[str, Any] | None:
+        with self._clock.measure("validate"):
+            try:
+                data = json.loads(text)
+            except ValueError:
+                return None
+            return self._schemas.validate(self._registry.get(prompt_id), data)
+
+    def _structured(self, req: LLMRequest, outcome: str) -> Dict[str, Any] | None:
+        if outcome == "error":
+            raise TransientError(f"fake llm error: {req.prompt_id}")
+        return self._validate(req.prompt_id, self._text(outcome, self._payload()))
+
+    def invoke_text(self, req: LLMRequest) -> LLMResponse:
+        self._render([req.prompt_id], req.variables)
+        time.sleep(self._latency())
+        if self._outcome() == "error":
+            raise TransientError(f"fake llm error: {req.prompt_id}")
+        return LLMResponse(text=json.dumps(self._payload()), raw=None, model="fake", usage=USAGE)
+
+    async def ainvoke_text(self, req: LLMRequest) -> LLMResponse:
+        self._render([req.prompt_id], req.variables)
+        await asyncio.sleep(self._latency())
+        if self._outcome() == "error":
+            raise TransientError(f"fake llm error: {req.prompt_id}")
+        return LLMResponse(text=json.dumps(self._payload()), raw=None, model="fake", usage=USAGE)
+
+    def invoke_structured(self, req: LLMRequest) -> Dict[str, Any]:
+        self._render([req.prompt_id], req.variables)
+        time.sleep(self._latency())
+        data = self._structured(req, self._outcome())
+        if data is None:
+            self._count("repairs")
+            time.sleep(self._latency())
+            data = self._structured(req, "ok")
+        return data
+
+    async def ainvoke_structured(self, req: LLMRequest) -> Dict[str, Any]:
+        self._render([req.prompt_id], req.variables)
+        await asyncio.sleep(self._latency())
+        data = self._structured(req, self._outcome())
+        if data is None:
+            self._count("repairs")
+            await asyncio.sleep(self._latency())
+            data = self._structured(req, "ok")
+        return data
+
+    def _fused(self, prompt_ids: List[str], outcome: str) -> FusedResponse:
+        if outcome == "error":
+            raise TransientError(f"fake llm error: {','.join(prompt_ids)}")
+        sections: Dict[str, Dict[str, Any]] = {}
+        failed: List[str] = []
+        for prompt_id in prompt_ids:
+            data = self._validate(prompt_id, self._text(outcome, self._payload()))
+            if data is None:
+                failed.append(prompt_id)
+            else:
+                sections[prompt_id] = data
+        return FusedResponse(sections=sections, failed=failed, usage=USAGE)
+
+    def invoke_fused(self, prompt_ids: List[str], variables: Dict[str, Any], correlation_id: Optional[str] = None) -> FusedResponse:
+        self._render(prompt_ids, variables)
+        time.sleep(self._latency())
+        return self._fused(prompt_ids, self._outcome())
+
+    async def ainvoke_fused(self, prompt_ids: List[str], variables: Dict[str, Any], correlation_id: Optional[str] = None) -> FusedResponse:
+        self._render(prompt_ids, variables)
+        await asyncio.sleep(self._latency())
+        return self._fused(prompt_ids, self._outcome())
+
+    def batch_request(self, req: LLMRequest, custom_id: str) -> Dict[str, Any]:
+        with self._clock.measure("render"):
+            messages = self._registry.render_messages(req.prompt_id, req.variables)
+        body = {"model": req.model or "fake", "messages": messages}
+        return {"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}
+
+    def complete_batch_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        # mesma chamada sorteada do caminho síncrono, no formato da saída da Batch API
+        time.sleep(self._latency())
+        outcome = self._outcome()
+        out: Dict[str, Any] = {"id": f"local-{request['custom_id']}", "custom_id": request["custom_id"]}
+        if outcome == "error":
+            out.update(response=None, error={"code": "TransientError", "message": "fake llm error"})
+            return out
+        message = {"role": "assistant", "content": self._text(outcome, self._payload())}
+        out["response"] = {
+            "status_code": 200,
+            "body": {
+                "model": "fake",
+                "choices": [{"index": 0, "message": message}],
+                "usage": {"prompt_tokens": 120, "completion_tokens": 20, "total_tokens": 140},
+            },
+        }
+        return out
+
+    def parse_structured(self, prompt_id: str, text: str, correlation_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        return self._validate(prompt_id, text)
+
+
+class MeasuredQueue(InMemoryQueueAdapter):
+    """
+    InMemoryQueueAdapter com o que o benchmark mede: latência do primeiro
+    recebimento até o delete e quantas reentregas houve. O long polling é
+    limitado a `poll_seconds` para o worker não ficar parado na fila vazia.
+    """
+
+    def __init__(self, poll_seconds: float = 0.05):
+        super().__init__()
+        self._poll_seconds = poll_seconds
+        self._cond = threading.Condition()
+        self._first_received: Dict[str, float] = {}
+        self._receipts: Dict[str, str] = {}  # receipt handle -> message id
+        self._total = 0
+        self.latencies: List[float] = []
+        self.redeliveries = 0
+
+    def send(self, body: str) -> str:
+        with self._cond:
+            self._total += 1
+        return super().send(body)
+
+    def receive(self, max_messages: int, wait_time_seconds: int, visibility_timeout: int) -> List[QueueMessage]:
+        return super().receive(max_messages, min(wait_time_seconds, self._poll_seconds), visibility_timeout)
+
+    async def areceive(self, max_messages: int, wait_time_seconds: int, visibility_timeout: int) -> List[QueueMessage]:
+        return await super().areceive(max_messages, min(wait_time_seconds, self._poll_seconds), visibility_timeout)
+
+    def _receive_now(self, max_messages: int, visibility_timeout: int) -> List[QueueMessage]:
+        messages = super()._receive_now(max_messages, visibility_timeout)
+        now = time.monotonic()
+        with self._cond:
+            for m in messages:
+                self._receipts[m.receipt_handle] = m.message_id
+                if m.message_id in self._first_received:
+                    self.redeliveries += 1
+                else:
+                    self._first_received[m.message_id] = now
+        return messages
+
+    def delete(self, receipt_handle: str) -> None:
+        with self._cond:
+            message_id = self._receipts.pop(receipt_handle, None)
+            deleted = len(self.deleted)
+            super().delete(receipt_handle)
+            # receipt de um recebimento anterior à reentrega não apaga nada
+            if message_id is None or len(self.deleted) == deleted:
+                return
+            self.latencies.append(time.monotonic() - self._first_received[message_id])
+            self._cond.notify_all()
+
+    def wait_drained(self) -> None:
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.latencies) >= self._total)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def _run_worker(mode: str, use_case: ProcessMessage, queue: MeasuredQueue, concurrency: int) -> None:
+    settings.worker_concurrency = concurrency
+    acker = BatchAcknowledger(
+        queue=queue,
+        batch_size=settings.sqs_ack_batch_size,
+        max_delay_seconds=settings.sqs_ack_max_delay_seconds,
+        max_attempts=settings.sqs_ack_max_attempts,
+    )
+    acker.start()
+    try:
+        if mode == "async":
+            asyncio.run(_run_async(use_case, queue, acker, concurrency))
+        else:
+            stop = threading.Event()
+            thread = threading.Thread(target=_run_threaded, args=(use_case, queue, acker, None), kwargs={"stop": stop})
+            thread.start()
+            queue.wait_drained()
+            stop.set()
+            thread.join()
+    finally:
+        acker.close()
+
+
+async def _run_async(use_case: ProcessMessage, queue: MeasuredQueue, acker: BatchAcknowledger, concurrency: int) -> None:
+    worker = AsyncWorker(
+        use_case=use_case,
+        queue=queue,
+        acker=acker,
+        concurrency=concurrency,
+        high_water_mark=max(settings.worker_high_water_mark, concurrency * 2),
+        queue_maxsize=max(settings.worker_queue_maxsize, concurrency * 2),
+        max_messages=settings.sqs_max_messages,
+        wait_time_seconds=settings.sqs_wait_time_seconds,
+        visibility_timeout=settings.sqs_visibility_timeout,
+    )
+    task = asyncio.create_task(worker.run())
+    await asyncio.to_thread(queue.wait_drained)
+    await worker.stop()
+    await task
+
+
+def run_level(
+    registry: PromptRegistry,
+    config: FakeLLMConfig,
+    mode: str,
+    topology: str,
+    concurrency: int,
+    messages: int,
+    cascade: bool,
+) -> Dict[str, Any]:
+    clock = StageClock()
+    llm = FakeLLM(registry, config, clock)
+    router = CascadeRouter(lambda: registry.get("classifier-agent").routing) if cascade else None
+    use_case = ProcessMessage(llm, graph_topology=topology, cascade=router)
+
+    queue = MeasuredQueue()
+    for i in range(messages):
+        queue.send(json.dumps({"input_text": SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)], "correlation_id": f"bench-{i}"}))
+
+    wall_started, cpu_started = time.perf_counter(), time.process_time()
+    _run_worker(mode, use_case, queue, concurrency)
+    wall, cpu = time.perf_counter() - wall_started, time.process_time() - cpu_started
+
+    stages = clock.snapshot()
+    per_msg = lambda seconds: round(seconds / messages * 1000, 3)
+    return {
+        "benchmark": "worker_throughput",
+        "mode": mode,
+        "topology": topology,
+        "cascade": cascade,
+        "concurrency": concurrency,
+        "messages": messages,
+        "wall_seconds": round(wall, 3),
+        "msgs_per_sec": round(messages / wall, 2),
+        "latency_ms": {
+            q: round(_percentile(queue.latencies, p) * 1000, 1)
+            for q, p in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+        },
+        # "worker" é o resto da CPU do processo: grafo, estado, logs, fila e acker
+        "cpu_ms_per_msg": {
+            "render": per_msg(stages.get("render", 0.0)),
+            "validate": per_msg(stages.get("validate", 0.0)),
+            "worker": per_msg(cpu - sum(stages.values())),
+            "total": per_msg(cpu),
+        },
+        "llm": dict(llm.counters),
+        "redeliveries": queue.redeliveries,
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _key(result: Dict[str, Any]) -> tuple:
+    return result["mode"], result["topology"], result["cascade"], result["concurrency"]
+
+
+def compare(baseline: Dict[str, Any], results: List[Dict[str, Any]], config: FakeLLMConfig) -> List[Dict[str, Any]]:
+    """Variação relativa contra o baseline, por (mode, topology, cascade, concurrency)."""
+    previous = {_key(r): r for r in baseline["results"]}
+    # com outro LLM falso a comparação mede a configuração, não o código
+    same_config = baseline["meta"].get("fake_llm") == asdict(config)
+    rows = []
+    for r in results:
+        b = previous.get(_key(r))
+        if b is None:
+            continue
+        delta = lambda new, old: round((new - old) / old * 100, 1) if old else None
+        rows.append({
+            "comparison": "worker_throughput",
+            "baseline_commit": baseline["meta"].get("commit"),
+            "same_fake_llm": same_config,
+            "mode": r["mode"],
+            "topology": r["topology"],
+            "cascade": r["cascade"],
+            "concurrency": r["concurrency"],
+            "msgs_per_sec_delta_pct": delta(r["msgs_per_sec"], b["msgs_per_sec"]),
+            "p95_delta_pct": delta(r["latency_ms"]["p95"], b["latency_ms"]["p95"]),
+            "cpu_ms_per_msg_delta_pct": delta(r["cpu_ms_per_msg"]["total"], b["cpu_ms_per_msg"]["total"]),
+        })
+    return rows
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,4,16", help="níveis separados por vírgula")
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--mode", choices=("threads", "async"), default="threads")
+    parser.add_argument("--topology", choices=("parallel", "sequential", "fused"), default="parallel")
+    parser.add_argument("--no-cascade", action="store_true")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="mediana da latência do LLM falso")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="sigma da log-normal")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--visibility-timeout", type=int, default=2, help="redelivery após erro transitório")
+    parser.add_argument("-o", "--output", help="grava resultados + metadados em JSON")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparar")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = _parse_args(argv)
+
+    # o custo de montar os logs entra na medição; só a escrita vai para /dev/null
+    configure_logging("INFO")
+    structlog.configure(logger_factory=structlog.PrintLoggerFactory(file=open(os.devnull, "w")))
+    settings.sqs_visibility_timeout = args.visibility_timeout
+
+    registry = PromptRegistry()
+    registry.load()
+    config = FakeLLMConfig(
+        latency_median_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed,
+    )
+
+    results = []
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        result = run_level(registry, config, args.mode, args.topology, concurrency, args.messages, not args.no_cascade)
+        print(json.dumps(result), flush=True)
+        results.append(result)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            for row in compare(json.load(f), results, config):
+                print(json.dumps(row))
+
+    if args.output:
+        meta = {
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fake_llm": asdict(config),
+            "visibility_timeout": args.visibility_timeout,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
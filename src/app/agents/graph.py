@@ -7,28 +7,84 @@ from app.agents.nodes.resolver import resolver_node
 from app.agents.nodes.dedupe import dedupe_node
 from app.agents.nodes.classifier import classifier_node
 from app.agents.nodes.classifier_judge import classifier_judge_node
-from app.agents.nodes.router import route_node
+from app.agents.nodes.classifier_escalate import classifier_escalate_node
+from app.agents.nodes.fused import fused_node
+from app.agents.nodes.router import cascade_route_node, route_node
 from app.application.ports.llm import LLMPort
+from app.application.services.cascade import CascadeRouter
+from app.application.services.knn_classifier import KnnClassifier
+from app.application.services.semantic_dedupe import SemanticDeduper
+
+TOPOLOGIES = ("parallel", "sequential", "fused")
+
+
+def _join(state: AgentState) -> AgentState:
+    return {}
+
+
+def build_graph(
+    llm: LLMPort,
+    topology: str = "parallel",
+    deduper: SemanticDeduper | None = None,
+    knn: KnnClassifier | None = None,
+    cascade: CascadeRouter | None = None,
+):
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Unknown graph topology: {topology}, expected one of {TOPOLOGIES}")
 
-def build_graph(llm: LLMPort):
     g = StateGraph(AgentState)
 
-    g.add_node("resolver", resolver_node(llm))
-    g.add_node("dedupe", dedupe_node(llm))
-    g.add_node("classifier", classifier_node(llm))
-    g.add_node("classifier_judge", classifier_judge_node)
+    g.add_node("classifier_judge", classifier_judge_node(llm))
+
+    if topology == "fused":
+        # uma chamada só para resolver/dedupe/classifier, com fallback por agente
+        g.add_node("fused", fused_node(llm, deduper, knn))
+        g.add_edge(START, "fused")
+        router_source = "fused"
+    else:
+        g.add_node("resolver", resolver_node(llm))
+        g.add_node("dedupe", dedupe_node(llm, deduper))
+        g.add_node("classifier", classifier_node(llm, knn))
+
+    if topology == "sequential":
+        g.add_edge(START, "resolver")
+        g.add_edge("resolver", "dedupe")
+        g.add_edge("dedupe", "classifier")
+        router_source = "classifier"
+    elif topology == "parallel":
+        # resolver, dedupe e classifier só leem input_text: fan-out a partir do
+        # START e join antes do roteamento para o judge
+        g.add_node("join", _join)
+        for node in ("resolver", "dedupe", "classifier"):
+            g.add_edge(START, node)
+        g.add_edge(["resolver", "dedupe", "classifier"], "join")
+        router_source = "join"
 
-    g.add_edge(START, "resolver")
-    g.add_edge("resolver", "dedupe")
-    g.add_edge("dedupe", "classifier")
     g.add_edge("classifier_judge", END)
 
-    g.add_conditional_edges(
-        "classifier",
-        route_node,
-        {
-            "judge": "classifier_judge",
-            "end": END,
-        },
-    )
+    if cascade is None:
+        g.add_conditional_edges(
+            router_source,
+            route_node,
+            {
+                "judge": "classifier_judge",
+                "end": END,
+            },
+        )
+        return g.compile()
+
+    # cascata: abaixo do threshold da intent sobe para o modelo mais forte e,
+    # se ainda faltar confiança, para o judge
+    route = cascade_route_node(cascade)
+    g.add_node("classifier_escalate", classifier_escalate_node(llm, cascade))
+    for source in (router_source, "classifier_escalate"):
+        g.add_conditional_edges(
+            source,
+            route,
+            {
+                "escalate": "classifier_escalate",
+                "judge": "classifier_judge",
+                "end": END,
+            },
+        )
     return g.compile()
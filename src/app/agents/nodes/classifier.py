@@ -1,17 +1,52 @@
+import asyncio
+import time
+
+from langchain_core.runnables import RunnableLambda
+
 from app.application.ports.llm import LLMPort, LLMRequest
-from app.agents.state import AgentState
+from app.agents.state import AgentState, prompt_input
+from app.application.services.knn_classifier import KnnClassifier
 
 
-def classifier_node(llm: LLMPort):
-    def _run(state: AgentState) -> AgentState:
-        data = llm.invoke_structured(
-            LLMRequest(
-                prompt_id="classifier-agent",
-                variables={"input_text": state["input_text"]},
-                correlation_id=state.get("correlation_id"),
-            )
+def classifier_node(llm: LLMPort, knn: KnnClassifier | None = None):
+    def _request(state: AgentState) -> LLMRequest:
+        return LLMRequest(
+            prompt_id="classifier-agent",
+            variables={"input_text": prompt_input(state, "classifier-agent")},
+            correlation_id=state.get("correlation_id"),
         )
-        state["agent_classifier"] = data.get("output", "unknown")
-        return state
 
-    return _run
\ No newline at end of file
+    def _update(data, source: str, started: float) -> AgentState:
+        # devolve só as chaves deste nó para permitir execução em paralelo
+        return {
+            "agent_classifier": data.get("intent", data.get("output", "unknown")),
+            "classifier_result": {**data, "source": source},
+            "node_timings": {"classifier": round((time.perf_counter() - started) * 1000, 1)},
+        }
+
+    def _run(state: AgentState) -> AgentState:
+        started = time.perf_counter()
+        if knn is not None:
+            # fast path: o LLM só é chamado quando o kNN não tem confiança suficiente
+            hit = knn.classify(state["input_text"])
+            if hit is not None:
+                return _update(hit, "knn", started)
+
+        data = llm.invoke_structured(_request(state))
+        if knn is not None:
+            knn.learn(state["input_text"], data)
+        return _update(data, "llm", started)
+
+    async def _arun(state: AgentState) -> AgentState:
+        started = time.perf_counter()
+        if knn is not None:
+            hit = await asyncio.to_thread(knn.classify, state["input_text"])
+            if hit is not None:
+                return _update(hit, "knn", started)
+
+        data = await llm.ainvoke_structured(_request(state))
+        if knn is not None:
+            await asyncio.to_thread(knn.learn, state["input_text"], data)
+        return _update(data, "llm", started)
+
+    return RunnableLambda(_run, afunc=_arun)
@@ -0,0 +1,40 @@
+import time
+
+from langchain_core.runnables import RunnableLambda
+
+from app.application.ports.llm import LLMPort, LLMRequest
+from app.agents.state import AgentState, prompt_input
+from app.application.services.cascade import CascadeRouter
+
+
+def classifier_escalate_node(llm: LLMPort, router: CascadeRouter):
+    def _request(state: AgentState, model: str | None) -> LLMRequest:
+        # mesmo prompt do classifier, no modelo mais forte da política
+        return LLMRequest(
+            prompt_id="classifier-agent",
+            variables={"input_text": prompt_input(state, "classifier-agent")},
+            correlation_id=state.get("correlation_id"),
+            model=model,
+        )
+
+    def _update(data, model: str | None, started: float) -> AgentState:
+        return {
+            "agent_classifier": data.get("intent", data.get("output", "unknown")),
+            "classifier_result": {**data, "source": "llm", "model": model},
+            "classifier_escalated": True,
+            "node_timings": {"classifier_escalate": round((time.perf_counter() - started) * 1000, 1)},
+        }
+
+    def _run(state: AgentState) -> AgentState:
+        started = time.perf_counter()
+        model = router.policy().escalation_model
+        data = llm.invoke_structured(_request(state, model))
+        return _update(data, model, started)
+
+    async def _arun(state: AgentState) -> AgentState:
+        started = time.perf_counter()
+        model = router.policy().escalation_model
+        data = await llm.ainvoke_structured(_request(state, model))
+        return _update(data, model, started)
+
+    return RunnableLambda(_run, afunc=_arun)
@@ -1,17 +1,34 @@
+import time
+
+from langchain_core.runnables import RunnableLambda
+
 from app.application.ports.llm import LLMPort, LLMRequest
-from app.agents.state import AgentState
+from app.agents.state import AgentState, prompt_input
 
 
 def classifier_judge_node(llm: LLMPort):
-    def _run(state: AgentState) -> AgentState:
-        data = llm.invoke_structured(
-            LLMRequest(
-                prompt_id="classifier-judge-agent",
-                variables={"input_text": state["input_text"]},
-                correlation_id=state.get("correlation_id"),
-            )
+    def _request(state: AgentState) -> LLMRequest:
+        return LLMRequest(
+            prompt_id="classifier-judge-agent",
+            variables={"input_text": prompt_input(state, "classifier-judge-agent")},
+            correlation_id=state.get("correlation_id"),
         )
-        state["agent_classifier_judge"] = data.get("output", "unknown")
-        return state
 
-    return _run
\ No newline at end of file
+    def _update(data, started: float) -> AgentState:
+        # devolve só as chaves deste nó para permitir execução em paralelo
+        return {
+            "agent_classifier_judge": data.get("intent", data.get("output", "unknown")),
+            "node_timings": {"classifier_judge": round((time.perf_counter() - started) * 1000, 1)},
+        }
+
+    def _run(state: AgentState) -> AgentState:
+        started = time.perf_counter()
+        data = llm.invoke_structured(_request(state))
+        return _update(data, started)
+
+    async def _arun(state: AgentState) -> AgentState:
+        started = time.perf_counter()
+        data = await llm.ainvoke_structured(_request(state))
+        return _update(data, started)
+
+    return RunnableLambda(_run, afunc=_arun)
\ No newline at end of file
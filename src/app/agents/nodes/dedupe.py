@@ -1,17 +1,53 @@
+import asyncio
+import time
+
+from langchain_core.runnables import RunnableLambda
+
 from app.application.ports.llm import LLMPort, LLMRequest
-from app.agents.state import AgentState
+from app.agents.state import AgentState, prompt_input
+from app.application.services.semantic_dedupe import DuplicateMatch, SemanticDeduper
 
 
-def dedupe_node(llm: LLMPort):
-    def _run(state: AgentState) -> AgentState:
-        data = llm.invoke_structured(
-            LLMRequest(
-                prompt_id="dedupe-agent",
-                variables={"input_text": state["input_text"]},
-                correlation_id=state.get("correlation_id"),
-            )
+def dedupe_node(llm: LLMPort, deduper: SemanticDeduper | None = None):
+    def _request(state: AgentState) -> LLMRequest:
+        return LLMRequest(
+            prompt_id="dedupe-agent",
+            variables={"input_text": prompt_input(state, "dedupe-agent")},
+            correlation_id=state.get("correlation_id"),
         )
-        state["agent_dedupe"] = data.get("output", "unknown")
-        return state
 
-    return _run
\ No newline at end of file
+    def _update(data, started: float) -> AgentState:
+        # devolve só as chaves deste nó para permitir execução em paralelo
+        return {
+            "agent_dedupe": data.get("output", "unknown"),
+            "node_timings": {"dedupe": round((time.perf_counter() - started) * 1000, 1)},
+        }
+
+    def _duplicate(match: DuplicateMatch, started: float) -> AgentState:
+        return {
+            "agent_dedupe": "duplicate",
+            "dedupe_match": match.as_dict(),
+            "node_timings": {"dedupe": round((time.perf_counter() - started) * 1000, 1)},
+        }
+
+    def _run(state: AgentState) -> AgentState:
+        started = time.perf_counter()
+        if deduper is not None:
+            match = deduper.find_duplicate(state["correlation_id"], state["input_text"])
+            if match is not None:
+                return _duplicate(match, started)
+
+        data = llm.invoke_structured(_request(state))
+        return _update(data, started)
+
+    async def _arun(state: AgentState) -> AgentState:
+        started = time.perf_counter()
+        if deduper is not None:
+            match = await asyncio.to_thread(deduper.find_duplicate, state["correlation_id"], state["input_text"])
+            if match is not None:
+                return _duplicate(match, started)
+
+        data = await llm.ainvoke_structured(_request(state))
+        return _update(data, started)
+
+    return RunnableLambda(_run, afunc=_arun)
\ No newline at end of file
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+from langchain_core.runnables import RunnableLambda
+
+from app.application.ports.llm import LLMPort, LLMRequest
+from app.agents.state import AgentState, prompt_input
+from app.application.services.knn_classifier import KnnClassifier
+from app.application.services.semantic_dedupe import DuplicateMatch, SemanticDeduper
+
+# prompt_id -> chave no estado
+FUSED_AGENTS = {
+    "resolver-agent": "agent_resolver",
+    "dedupe-agent": "agent_dedupe",
+    "classifier-agent": "agent_classifier",
+}
+
+
+def fused_node(llm: LLMPort, deduper: SemanticDeduper | None = None, knn: KnnClassifier | None = None):
+    def _request(state: AgentState, prompt_id: str) -> LLMRequest:
+        return LLMRequest(
+            prompt_id=prompt_id,
+            variables={"input_text": prompt_input(state, prompt_id)},
+            correlation_id=state.get("correlation_id"),
+        )
+
+    def _fused_input(state: AgentState, prompt_ids: list) -> str:
+        # uma entrada para todos: vale o orçamento mais apertado entre eles
+        return min((prompt_input(state, pid) for pid in prompt_ids), key=len, default=state["input_text"])
+
+    def _prompt_ids(match: DuplicateMatch | None, hit: dict | None) -> list:
+        skip = set()
+        if match is not None:
+            skip.add("dedupe-agent")
+        if hit is not None:
+            skip.add("classifier-agent")
+        return [pid for pid in FUSED_AGENTS if pid not in skip]
+
+    def _update(sections, match: DuplicateMatch | None, hit: dict | None, started: float) -> AgentState:
+        update: AgentState = {
+            key: sections[prompt_id].get("output", "unknown")
+            for prompt_id, key in FUSED_AGENTS.items()
+            if prompt_id in sections
+        }
+        if match is not None:
+            update["agent_dedupe"] = "duplicate"
+            update["dedupe_match"] = match.as_dict()
+        if hit is not None:
+            update["agent_classifier"] = hit["intent"]
+            update["classifier_result"] = {**hit, "source": "knn"}
+        elif "classifier-agent" in sections:
+            data = sections["classifier-agent"]
+            update["agent_classifier"] = data.get("intent", data.get("output", "unknown"))
+            update["classifier_result"] = {**data, "source": "llm"}
+        update["node_timings"] = {"fused": round((time.perf_counter() - started) * 1000, 1)}
+        return update
+
+    def _run(state: AgentState) -> AgentState:
+        started = time.perf_counter()
+        match = None
+        if deduper is not None:
+            match = deduper.find_duplicate(state["correlation_id"], state["input_text"])
+        hit = knn.classify(state["input_text"]) if knn is not None else None
+
+        prompt_ids = _prompt_ids(match, hit)
+        fused = llm.invoke_fused(
+            prompt_ids,
+            {"input_text": _fused_input(state, prompt_ids)},
+            correlation_id=state.get("correlation_id"),
+        )
+
+        # só os agentes cuja seção falhou na validação pagam a chamada individual
+        sections = dict(fused.sections)
+        for prompt_id in fused.failed:
+            sections[prompt_id] = llm.invoke_structured(_request(state, prompt_id))
+        if knn is not None and "classifier-agent" in sections:
+            knn.learn(state["input_text"], sections["classifier-agent"])
+        return _update(sections, match, hit, started)
+
+    async def _arun(state: AgentState) -> AgentState:
+        started = time.perf_counter()
+        match = None
+        if deduper is not None:
+            match = await asyncio.to_thread(deduper.find_duplicate, state["correlation_id"], state["input_text"])
+        hit = None
+        if knn is not None:
+            hit = await asyncio.to_thread(knn.classify, state["input_text"])
+
+        prompt_ids = _prompt_ids(match, hit)
+        fused = await llm.ainvoke_fused(
+            prompt_ids,
+            {"input_text": _fused_input(state, prompt_ids)},
+            correlation_id=state.get("correlation_id"),
+        )
+
+        sections = dict(fused.sections)
+        fallbacks = await asyncio.gather(
+            *(llm.ainvoke_structured(_request(state, prompt_id)) for prompt_id in fused.failed)
+        )
+        sections.update(zip(fused.failed, fallbacks))
+        if knn is not None and "classifier-agent" in sections:
+            await asyncio.to_thread(knn.learn, state["input_text"], sections["classifier-agent"])
+        return _update(sections, match, hit, started)
+
+    return RunnableLambda(_run, afunc=_arun)
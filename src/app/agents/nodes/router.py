@@ -1,4 +1,5 @@
 from app.agents.state import AgentState
+from app.application.services.cascade import CascadeRouter
 
 def route_node(state: AgentState) -> str:
     classifier = state.get("agent_classifier")
@@ -6,4 +7,12 @@ def route_node(state: AgentState) -> str:
     if classifier:
      return "judge"
     
-    return "end"
\ No newline at end of file
+    return "end"
+
+
+def cascade_route_node(router: CascadeRouter):
+    """Roteamento por confiança: end, escalate (modelo mais forte) ou judge."""
+    def _route(state: AgentState) -> str:
+        return router.decide(state)
+
+    return _route
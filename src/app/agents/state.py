@@ -1,13 +1,28 @@
 from __future__ import annotations
-from typing import TypedDict, Optional, Dict, Any
+from typing import Annotated, TypedDict, Optional, Dict, Any
+
+
+def merge_dicts(left: Dict[str, Any] | None, right: Dict[str, Any] | None) -> Dict[str, Any]:
+    """Reducer: nós paralelos escrevem chaves diferentes no mesmo dict."""
+    return {**(left or {}), **(right or {})}
 
 
 class AgentState(TypedDict, total=False):
     correlation_id: str
     input_text: str
+    prompt_inputs: Dict[str, str]
     context: Dict[str, Any]
     final_output: Dict[str, Any]
     agent_resolver: Optional[str]
     agent_dedupe: Optional[str]
     agent_classifier: Optional[str]
-    agent_classifier_judge: Optional[str]
\ No newline at end of file
+    agent_classifier_judge: Optional[str]
+    dedupe_match: Optional[Dict[str, Any]]
+    classifier_result: Optional[Dict[str, Any]]
+    classifier_escalated: bool
+    node_timings: Annotated[Dict[str, float], merge_dicts]
+
+
+def prompt_input(state: AgentState, prompt_id: str) -> str:
+    """input_text cortado no orçamento do prompt, quando ele tem um próprio."""
+    return (state.get("prompt_inputs") or {}).get(prompt_id, state["input_text"])
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Protocol
+
+
+class BatchProviderPort(Protocol):
+    def submit(self, requests_path: Path) -> str:
+        """Envia o arquivo JSONL de requisições e retorna o id do batch."""
+        pass
+
+    def status(self, batch_id: str) -> str:
+        """validating | in_progress | finalizing | completed | failed | expired | cancelled."""
+        pass
+
+    def download(self, batch_id: str, output_path: Path) -> None:
+        """Grava a saída (JSONL, uma linha por custom_id) em `output_path`."""
+        pass
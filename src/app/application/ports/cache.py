@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Protocol
+
+
+class CachePort(Protocol):
+    def get(self, key: str) -> Optional[Any]:
+        """Retorna o valor ou None em caso de miss/expiração."""
+        ...
+
+    def set(self, key: str, value: Any) -> None:
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        ...
@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+from typing import List, Protocol
+
+
+class EmbeddingsPort(Protocol):
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Retorna um vetor por texto, na mesma ordem."""
+        ...
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Protocol
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+
+@dataclass(frozen=True)
+class IdempotencyRecord:
+    key: str
+    state: str  # in_progress | completed
+    result: Optional[Dict[str, Any]] = None
+
+
+class IdempotencyStorePort(Protocol):
+    def claim(self, key: str, lease_seconds: float) -> Optional[IdempotencyRecord]:
+        """
+        Marca a chave como in_progress se ela não existe ou expirou (inclusive
+        um in_progress de worker que morreu). Retorna None quando a chave foi
+        tomada; senão, o registro vigente.
+        """
+        ...
+
+    def complete(self, key: str, result: Dict[str, Any], ttl_seconds: float) -> None:
+        ...
+
+    def release(self, key: str) -> None:
+        """Apaga o in_progress para que a próxima entrega processe de novo."""
+        ...
+
+    def close(self) -> None:
+        ...
@@ -19,6 +19,14 @@ class LLMResponse:
     usage: Optional[Dict[str, Any]] = None
 
 
+@dataclass(frozen=True)
+class FusedResponse:
+    """Resultado de uma chamada única para vários prompts (por prompt_id)."""
+    sections: Dict[str, Dict[str, Any]]
+    failed: List[str]
+    usage: Optional[Dict[str, Any]] = None
+
+
 class LLMPort(Protocol):
     def invoke_text(self, req: LLMRequest) -> LLMResponse:
         """Executa um prompt e retorna a resposta como texto."""
@@ -33,4 +41,42 @@ class LLMPort(Protocol):
           - TransientError: falha de rede, rate limit, parsing reparável, etc.
         """
         ...
-        pass
\ No newline at end of file
+        pass
+
+    async def ainvoke_text(self, req: LLMRequest) -> LLMResponse:
+        """Versão assíncrona de invoke_text (usada pelo worker asyncio)."""
+        ...
+        pass
+
+    async def ainvoke_structured(self, req: LLMRequest) -> Dict[str, Any]:
+        """Versão assíncrona de invoke_structured, com os mesmos erros."""
+        ...
+        pass
+
+    def invoke_fused(self, prompt_ids: List[str], variables: Dict[str, Any], correlation_id: Optional[str] = None) -> FusedResponse:
+        """
+        Executa vários prompts numa única chamada. Seções que não validam contra
+        o output_schema do próprio prompt voltam em `failed` para fallback.
+        """
+        ...
+        pass
+
+    async def ainvoke_fused(self, prompt_ids: List[str], variables: Dict[str, Any], correlation_id: Optional[str] = None) -> FusedResponse:
+        """Versão assíncrona de invoke_fused."""
+        ...
+        pass
+
+    def batch_request(self, req: LLMRequest, custom_id: str) -> Dict[str, Any]:
+        """Linha do arquivo de entrada da Batch API (/v1/chat/completions) para o prompt."""
+        ...
+        pass
+
+    def complete_batch_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Executa uma linha de batch de forma síncrona e devolve a linha de saída equivalente."""
+        ...
+        pass
+
+    def parse_structured(self, prompt_id: str, text: str, correlation_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Valida a resposta crua contra o output_schema do prompt; None se inválida."""
+        ...
+        pass
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from typing import ContextManager, Optional, Protocol
+
+
+class MetricsPort(Protocol):
+    def observe_llm_call(
+        self,
+        prompt_id: str,
+        model: str,
+        status: str,
+        latency_seconds: float,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+    ) -> None:
+        """status: ok | error. Custo estimado é derivado dos tokens e do modelo."""
+        ...
+
+    def observe_llm_stream(
+        self,
+        prompt_id: str,
+        model: str,
+        outcome: str,
+        time_to_first_token_seconds: Optional[float],
+        time_to_valid_object_seconds: Optional[float],
+    ) -> None:
+        """outcome: complete | aborted | incomplete. Tempos None quando o marco não foi atingido."""
+        ...
+
+    def inc_llm_retry(self, prompt_id: str, model: str) -> None:
+        ...
+
+    def inc_llm_repair(self, prompt_id: str, outcome: str) -> None:
+        """outcome: local (reparo local, sem chamada) | ok | failed."""
+        ...
+
+    def inc_llm_hedge(self, prompt_id: str, outcome: str) -> None:
+        """outcome: fired | won (duplicata respondeu primeiro) | lost | denied (sem orçamento)."""
+        ...
+
+    def set_llm_pool(self, in_use: int, waiting: int) -> None:
+        """Requisições usando conexão do pool httpx e esperando uma livre."""
+        ...
+
+    def observe_node(self, node: str, latency_seconds: float) -> None:
+        ...
+
+    def observe_message(
+        self,
+        outcome: str,
+        processing_seconds: float,
+        receive_to_ack_seconds: Optional[float] = None,
+    ) -> None:
+        """outcome: processed | permanent_error | transient_error | circuit_open | released | unhandled_error."""
+        ...
+
+    def inc_lease_extensions(self, outcome: str, count: int = 1) -> None:
+        """outcome: extended | failed | capped (teto do lease atingido, volta para a fila)."""
+        ...
+
+    def observe_lease(self, age_seconds: float, extensions: int) -> None:
+        """Lease encerrado (liberado ou no teto): idade total e quantas extensões teve."""
+        ...
+
+    def set_leases(self, active: int, oldest_age_seconds: float) -> None:
+        ...
+
+    def set_worker_capacity(self, capacity: int) -> None:
+        ...
+
+    def track_in_flight(self) -> ContextManager[None]:
+        """Ocupação do pool de workers enquanto o bloco executa."""
+        ...
@@ -9,6 +9,12 @@ class QueueMessage:
     body: str
     attributes: dict[str, Any]
 
+    @property
+    def sent_at(self) -> Optional[float]:
+        """SentTimestamp do SQS em epoch seconds (None se o atributo não veio)."""
+        ts = self.attributes.get("attributes", {}).get("SentTimestamp")
+        return int(ts) / 1000 if ts else None
+
 
 class QueuePort(Protocol):
     def receive(self, max_messages: int, wait_time_seconds: int, visibility_timeout: int) -> List[QueueMessage]:
@@ -17,5 +23,22 @@ class QueuePort(Protocol):
     def delete(self, receipt_handle: str) -> None:
         pass
 
+    def delete_batch(self, receipt_handles: List[str]) -> List[str]:
+        """Retorna os receipt handles que falharam."""
+        pass
+
     def change_visibility(self, receipt_handle: str, timeout_seconds: int) -> None:
         pass
+
+    def change_visibility_batch(self, receipt_handles: List[str], timeout_seconds: int) -> List[str]:
+        """Retorna os receipt handles que falharam."""
+        pass
+
+    async def areceive(self, max_messages: int, wait_time_seconds: int, visibility_timeout: int) -> List[QueueMessage]:
+        pass
+
+    async def adelete(self, receipt_handle: str) -> None:
+        pass
+
+    async def achange_visibility(self, receipt_handle: str, timeout_seconds: int) -> None:
+        pass
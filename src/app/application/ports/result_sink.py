@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Protocol
+
+from app.domain.models import WorkResult
+
+
+@dataclass(frozen=True)
+class SinkRecord:
+    message_id: str
+    result: WorkResult
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"message_id": self.message_id, **self.result.model_dump(mode="json")}
+
+
+@dataclass(frozen=True)
+class SinkWriteResult:
+    """
+    Message ids que não foram gravados: `failed` pode dar certo numa nova
+    tentativa; `rejected` nunca vai entrar (ex.: maior que o limite do sink).
+    """
+    failed: List[str] = field(default_factory=list)
+    rejected: List[str] = field(default_factory=list)
+
+
+class ResultSinkPort(Protocol):
+    def write_batch(self, records: List[SinkRecord]) -> SinkWriteResult:
+        """Grava o lote de forma durável."""
+        pass
+
+    def close(self) -> None:
+        pass
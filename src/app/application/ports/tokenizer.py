@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from typing import Protocol
+
+
+class TokenizerPort(Protocol):
+    def count(self, text: str) -> int:
+        ...
+
+    def truncate(self, text: str, max_tokens: int, head_ratio: float = 0.7) -> str:
+        """
+        Corta o meio do texto para caber em `max_tokens`, preservando a
+        proporção `head_ratio` do início e o resto do fim.
+        """
+        ...
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Protocol, Sequence
+
+
+@dataclass(frozen=True)
+class VectorItem:
+    id: str
+    vector: Sequence[float]
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class VectorMatch:
+    id: str
+    score: float
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class VectorIndexPort(Protocol):
+    def search(self, vector: Sequence[float], k: int = 1) -> List[VectorMatch]:
+        """Vizinhos mais próximos por similaridade de cosseno (maior = mais parecido)."""
+        ...
+
+    def add_batch(self, items: List[VectorItem]) -> None:
+        ...
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
+import structlog
+
+from app.application.ports.queue import QueuePort
+
+log = structlog.get_logger()
+
+
+@dataclass
+class _PendingAck:
+    receipt_handle: str
+    enqueued_at: float
+    attempts: int = 0
+
+
+class BatchAcknowledger:
+    """
+    Agrupa deletes e envia via `delete_batch` quando o buffer chega em
+    `batch_size` ou quando o ack mais antigo passa de `max_delay_seconds`.
+    Falhas por entrada voltam para o buffer até `max_attempts`; `close()`
+    faz o flush final no shutdown.
+    """
+
+    def __init__(
+        self,
+        queue: QueuePort,
+        batch_size: int = 10,
+        max_delay_seconds: float = 0.5,
+        max_attempts: int = 3,
+    ):
+        self._queue = queue
+        self._batch_size = batch_size
+        self._max_delay_seconds = max_delay_seconds
+        self._max_attempts = max_attempts
+
+        self._pending: List[_PendingAck] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread: threading.Thread | None = None
+
+        self._acked_total = 0
+        self._failed_total = 0
+        self._dropped_total = 0
+        self._batches_total = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="sqs-batch-acker", daemon=True)
+        self._thread.start()
+
+    def ack(self, receipt_handle: str) -> None:
+        with self._cond:
+            if self._closed:
+                # thread que passou do prazo de drenagem: a mensagem já foi
+                # devolvida à fila e vai ser entregue de novo
+                self._dropped_total += 1
+                log.warning("ack_after_close", receipt_handle=receipt_handle)
+                return
+            self._pending.append(_PendingAck(receipt_handle=receipt_handle, enqueued_at=time.monotonic()))
+            # o primeiro do buffer arma o prazo: a thread estava esperando sem timeout
+            if len(self._pending) == 1 or len(self._pending) >= self._batch_size:
+                self._cond.notify()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def flush(self) -> None:
+        """Envia tudo que está pendente, inclusive as retentativas."""
+        while True:
+            with self._cond:
+                batch = self._take(len(self._pending))
+            if not batch:
+                return
+            self._send(batch)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "acked_total": self._acked_total,
+            "failed_total": self._failed_total,
+            "dropped_total": self._dropped_total,
+            "batches_total": self._batches_total,
+        }
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and not self._due():
+                    self._cond.wait(timeout=self._wait_timeout())
+                if self._closed:
+                    return
+                batch = self._take(self._batch_size)
+
+            self._send(batch)
+
+    def _due(self) -> bool:
+        if len(self._pending) >= self._batch_size:
+            return True
+        if not self._pending:
+            return False
+        return time.monotonic() - self._pending[0].enqueued_at >= self._max_delay_seconds
+
+    def _wait_timeout(self) -> float | None:
+        if not self._pending:
+            return None
+        age = time.monotonic() - self._pending[0].enqueued_at
+        return max(self._max_delay_seconds - age, 0.0)
+
+    def _take(self, n: int) -> List[_PendingAck]:
+        batch, self._pending = self._pending[:n], self._pending[n:]
+        return batch
+
+    def _send(self, batch: List[_PendingAck]) -> None:
+        receipts = [p.receipt_handle for p in batch]
+        self._batches_total += 1
+        try:
+            failed = set(self._queue.delete_batch(receipts))
+        except Exception as e:
+            log.warning("ack_batch_error", size=len(batch), error=str(e))
+            failed = set(receipts)
+
+        self._acked_total += len(batch) - len(failed)
+        if not failed:
+            return
+
+        retry: List[_PendingAck] = []
+        now = time.monotonic()
+        for p in batch:
+            if p.receipt_handle not in failed:
+                continue
+            p.attempts += 1
+            self._failed_total += 1
+            if p.attempts >= self._max_attempts:
+                # a mensagem volta a ficar visível e será reentregue
+                self._dropped_total += 1
+                log.error("ack_dropped", receipt_handle=p.receipt_handle, attempts=p.attempts)
+                continue
+            p.enqueued_at = now
+            retry.append(p)
+
+        if retry:
+            with self._cond:
+                self._pending.extend(retry)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping
+
+import structlog
+
+log = structlog.get_logger()
+
+ROUTES = ("direct", "escalated", "judge", "escalated+judge")
+
+
+@dataclass(frozen=True)
+class CascadePolicy:
+    """
+    Bloco `routing` do YAML do classifier. Abaixo do threshold da intent o
+    resultado sobe para `escalation_model` e, se ainda assim ficar abaixo,
+    para o judge.
+    """
+    confidence_threshold: float = 1.0
+    intent_thresholds: Mapping[str, float] = field(default_factory=lambda: MappingProxyType({}))
+    escalation_model: str | None = None
+    judge_enabled: bool = True
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any] | None) -> "CascadePolicy":
+        data = data or {}
+        return cls(
+            confidence_threshold=float(data.get("confidence_threshold", 1.0)),
+            intent_thresholds=MappingProxyType(
+                {str(k): float(v) for k, v in (data.get("intent_thresholds") or {}).items()}
+            ),
+            escalation_model=data.get("escalation_model"),
+            judge_enabled=bool(data.get("judge_enabled", True)),
+        )
+
+    def threshold_for(self, intent: str | None) -> float:
+        return self.intent_thresholds.get(intent or "", self.confidence_threshold)
+
+
+class CascadeRouter:
+    """
+    Decide o próximo passo depois do classifier barato e contabiliza, por
+    rota, quantas mensagens passaram, latência e chamadas ao LLM.
+    `routing_config` é lido a cada decisão para acompanhar o hot reload.
+    """
+
+    def __init__(self, routing_config: Callable[[], Mapping[str, Any] | None]):
+        self._routing_config = routing_config
+        self._source: Mapping[str, Any] | None = None
+        self._policy = CascadePolicy()
+
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, float]] = {
+            r: {"count": 0, "graph_ms_total": 0.0, "llm_calls_total": 0} for r in ROUTES
+        }
+
+    def policy(self) -> CascadePolicy:
+        source = self._routing_config()
+        if source is not self._source:
+            self._policy = CascadePolicy.from_dict(source)
+            self._source = source
+        return self._policy
+
+    def decide(self, state: Mapping[str, Any]) -> str:
+        intent = state.get("agent_classifier")
+        if not intent:
+            return "end"
+
+        policy = self.policy()
+        confidence = float((state.get("classifier_result") or {}).get("confidence") or 0.0)
+        if confidence >= policy.threshold_for(intent):
+            return "end"
+        if policy.escalation_model and not state.get("classifier_escalated"):
+            return "escalate"
+        return "judge" if policy.judge_enabled else "end"
+
+    def record(self, state: Mapping[str, Any], graph_ms: float) -> str:
+        escalated = bool(state.get("classifier_escalated"))
+        judged = "agent_classifier_judge" in state
+        route = ROUTES[int(escalated) + 2 * int(judged)]
+
+        # nós que chamaram o LLM; os resolvidos pelos fast paths não contam
+        timings = state.get("node_timings") or {}
+        llm_calls = len(timings)
+        if (state.get("classifier_result") or {}).get("source") == "knn" and "classifier" in timings:
+            llm_calls -= 1
+        if state.get("dedupe_match") and "dedupe" in timings:
+            llm_calls -= 1
+
+        with self._lock:
+            bucket = self._routes[route]
+            bucket["count"] += 1
+            bucket["graph_ms_total"] += graph_ms
+            bucket["llm_calls_total"] += llm_calls
+        return route
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(b["count"] for b in self._routes.values())
+            escalations = self._routes["escalated"]["count"] + self._routes["escalated+judge"]["count"]
+            judged = self._routes["judge"]["count"] + self._routes["escalated+judge"]["count"]
+            routes = {
+                r: {
+                    "count": int(b["count"]),
+                    "avg_graph_ms": round(b["graph_ms_total"] / b["count"], 1) if b["count"] else 0.0,
+                    "avg_llm_calls": round(b["llm_calls_total"] / b["count"], 2) if b["count"] else 0.0,
+                }
+                for r, b in self._routes.items()
+            }
+        return {
+            "messages_total": total,
+            "escalation_rate": round(escalations / total, 4) if total else 0.0,
+            "judge_rate": round(judged / total, 4) if total else 0.0,
+            "routes": routes,
+        }
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class BatchCheckpoint:
+    """
+    Posição de retomada do batch: tudo antes de `input_offset` já está em
+    `output` até `output_offset`. Na modalidade provider-batch, `batch_id`
+    evita reenviar o mesmo lote.
+    """
+    input_offset: int = 0
+    output_offset: int = 0
+    processed: int = 0
+    failed: int = 0
+    batch_id: str | None = None
+    done: bool = False
+
+    def advance(self, **changes) -> "BatchCheckpoint":
+        return replace(self, **changes)
+
+
+class CheckpointStore:
+    """Checkpoint em JSON gravado de forma atômica (arquivo temporário + rename)."""
+
+    def __init__(self, path: str | Path):
+        self._path = Path(path)
+
+    def load(self) -> BatchCheckpoint:
+        if not self._path.exists():
+            return BatchCheckpoint()
+        return BatchCheckpoint(**json.loads(self._path.read_text(encoding="utf-8")))
+
+    def save(self, checkpoint: BatchCheckpoint) -> None:
+        tmp = self._path.with_name(self._path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(asdict(checkpoint), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path)
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Dict
+
+import structlog
+
+from app.application.ports.cache import CachePort
+from app.application.ports.idempotency import COMPLETED, IdempotencyStorePort
+from app.domain.errors import DuplicateInProgressError
+from app.domain.models import WorkResult
+
+log = structlog.get_logger()
+
+
+def idempotency_key(correlation_id: str, input_text: str) -> str:
+    """
+    correlation_id (que cai para o message id quando o produtor não manda)
+    + hash do input_text: redelivery e reenvio do mesmo pedido caem na mesma
+    chave; o mesmo correlation_id com outro texto é trabalho novo.
+    """
+    content = hashlib.sha256(input_text.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{correlation_id}\x00{content}".encode("utf-8")).hexdigest()
+
+
+class IdempotencyGuard:
+    """
+    Memória do trabalho já feito, na frente do grafo. Resultados concluídos
+    ficam num cache local (hit sem round trip) e no store persistente com
+    TTL, compartilhado entre processos e hosts; o in_progress tem lease
+    própria para que um worker morto não trave a chave para sempre.
+
+    Falha no store não derruba a mensagem: processa como se fosse nova.
+    """
+
+    def __init__(
+        self,
+        store: IdempotencyStorePort,
+        local: CachePort | None = None,
+        ttl_seconds: float = 345600,
+        in_progress_seconds: float = 300,
+    ):
+        self._store = store
+        self._local = local
+        self._ttl_seconds = ttl_seconds
+        self._in_progress_seconds = in_progress_seconds
+
+        self._claims = 0
+        self._local_hits = 0
+        self._store_hits = 0
+        self._in_progress = 0
+        self._errors = 0
+
+    def begin(self, key: str) -> WorkResult | None:
+        """Resultado já gravado para a chave, ou None depois de tomá-la para processar."""
+        if self._local is not None:
+            cached = self._local.get(key)
+            if cached is not None:
+                self._local_hits += 1
+                log.info("idempotency_hit", key=key, tier="local")
+                return WorkResult.model_validate(cached)
+
+        try:
+            record = self._store.claim(key, self._in_progress_seconds)
+        except Exception as e:
+            self._errors += 1
+            log.warning("idempotency_store_error", op="claim", key=key, error=str(e))
+            return None
+
+        if record is None:
+            self._claims += 1
+            return None
+
+        if record.state == COMPLETED and record.result is not None:
+            self._store_hits += 1
+            if self._local is not None:
+                self._local.set(key, record.result)
+            log.info("idempotency_hit", key=key, tier="store")
+            return WorkResult.model_validate(record.result)
+
+        self._in_progress += 1
+        raise DuplicateInProgressError(f"message already in progress: {key}")
+
+    def complete(self, key: str, result: WorkResult) -> None:
+        payload: Dict[str, Any] = result.model_dump(mode="json")
+        if self._local is not None:
+            self._local.set(key, payload)
+        try:
+            self._store.complete(key, payload, self._ttl_seconds)
+        except Exception as e:
+            self._errors += 1
+            log.warning("idempotency_store_error", op="complete", key=key, error=str(e))
+
+    def abandon(self, key: str) -> None:
+        try:
+            self._store.release(key)
+        except Exception as e:
+            self._errors += 1
+            log.warning("idempotency_store_error", op="release", key=key, error=str(e))
+
+    def close(self) -> None:
+        self._store.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "claims": self._claims,
+            "local_hits": self._local_hits,
+            "store_hits": self._store_hits,
+            "in_progress": self._in_progress,
+            "errors": self._errors,
+            "local": self._local.stats() if self._local is not None else None,
+        }
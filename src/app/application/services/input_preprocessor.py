@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Mapping
+
+import structlog
+
+from app.application.ports.tokenizer import TokenizerPort
+
+log = structlog.get_logger()
+
+_ZERO_WIDTH = re.compile("[\u200b\u200c\u200d\u2060\ufeff]")
+_INLINE_SPACE = re.compile(r"[ \t\f\v\u00a0]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+# cabeçalho de resposta citada ("> " embaixo); o Gmail quebra os longos em duas linhas
+_QUOTE_HEADER = re.compile(
+    r"^(On|Em) [^\n]{0,200}(\n[^\n]{0,200})?(wrote|escreveu):$",
+    re.MULTILINE | re.IGNORECASE,
+)
+# histórico sem citação (Outlook, encaminhamento): bloco de cabeçalho completo
+_FORWARD_HEADER = re.compile(
+    r"^(-+ ?(Original Message|Mensagem original|Forwarded message|Mensagem encaminhada) ?-+"
+    r"|(From|De): .*\n(Sent|Enviad[ao]|Date|Data): .*\n(To|Para|Cc|Subject|Assunto): .*)$",
+    re.MULTILINE | re.IGNORECASE,
+)
+_DISCLAIMER = re.compile(r"confiden|privileg|aviso legal|disclaimer", re.IGNORECASE)
+_DISCLAIMER_CONTEXT = re.compile(r"destinat[áa]ri|intended recipient|addressee|se voc[êe] recebeu", re.IGNORECASE)
+# linha de log repetida além disso vira uma linha + contador
+MAX_REPEATED_LINES = 2
+# assinatura ("-- ") só é cortada quando o que vem depois é curto
+MAX_SIGNATURE_LINES = 10
+
+
+def _quoted_to_end(text: str) -> bool:
+    lines = [line for line in text.split("\n") if line.strip()]
+    return bool(lines) and all(line.lstrip().startswith(">") for line in lines)
+
+
+def _cut_reply_history(text: str) -> str:
+    """
+    Corta o histórico no fim da mensagem. "On … wrote:" só conta quando
+    tudo depois dele é citado: menção no meio do texto ou resposta
+    intercalada nas citações fica inteira.
+    """
+    cut = next((m.start() for m in _QUOTE_HEADER.finditer(text) if _quoted_to_end(text[m.end():])), None)
+    forward = _FORWARD_HEADER.search(text)
+    if forward is not None and (cut is None or forward.start() < cut):
+        cut = forward.start()
+    if cut is None or not text[:cut].strip():
+        # mensagem que é só o encaminhamento: o histórico é o conteúdo
+        return text
+    return text[:cut]
+
+
+def _drop_trailing_quoted(lines: List[str]) -> List[str]:
+    # só o bloco citado no fim (resposta embaixo do texto): "> " no meio é
+    # sessão de shell ou citação em markdown colada, conteúdo de verdade
+    i = len(lines)
+    while i > 0 and (not lines[i - 1].strip() or lines[i - 1].lstrip().startswith(">")):
+        i -= 1
+    quoted = any(line.lstrip().startswith(">") for line in lines[i:])
+    return lines[:i] if quoted and any(line.strip() for line in lines[:i]) else lines
+
+
+def _cut_signature(lines: List[str]) -> List[str]:
+    for i in range(len(lines) - 1, -1, -1):
+        if lines[i] in ("--", "-- "):
+            if i > 0 and len(lines) - i - 1 <= MAX_SIGNATURE_LINES:
+                return lines[:i]
+            break
+    return lines
+
+
+def _collapse_repeats(lines: List[str]) -> List[str]:
+    out: List[str] = []
+    i = 0
+    while i < len(lines):
+        j = i
+        while j + 1 < len(lines) and lines[j + 1] == lines[i]:
+            j += 1
+        run = j - i + 1
+        if run > MAX_REPEATED_LINES and lines[i].strip():
+            out.append(lines[i])
+            out.append(f"[linha repetida {run - 1} vezes]")
+        else:
+            out.extend(lines[i:j + 1])
+        i = j + 1
+    return out
+
+
+def normalize_text(text: str, strip_reply_history: bool = True) -> str:
+    """
+    Limpeza determinística antes de contar tokens: espaços, caracteres
+    invisíveis, histórico citado (desligável) e assinatura de e-mail,
+    parágrafos de aviso legal e linhas repetidas em sequência (logs colados).
+    """
+    text = _ZERO_WIDTH.sub("", text.replace("\r\n", "\n").replace("\r", "\n"))
+    text = "\n".join(_INLINE_SPACE.sub(" ", line).rstrip() for line in text.split("\n"))
+    lines = text.split("\n")
+    if strip_reply_history:
+        lines = _drop_trailing_quoted(_cut_reply_history(text).split("\n"))
+
+    lines = _collapse_repeats(_cut_signature(lines))
+    paragraphs = "\n".join(lines).split("\n\n")
+    kept = [p for p in paragraphs if not (_DISCLAIMER.search(p) and _DISCLAIMER_CONTEXT.search(p))]
+    text = "\n\n".join(kept if any(p.strip() for p in kept) else paragraphs)
+    return _BLANK_LINES.sub("\n\n", text).strip()
+
+
+@dataclass(frozen=True)
+class PreparedInput:
+    text: str
+    tokens_raw: int
+    tokens: int
+    # prompt_id -> texto cortado no orçamento próprio do prompt (só quando difere de `text`)
+    prompt_texts: Dict[str, str] = field(default_factory=dict)
+    prompt_tokens: Dict[str, int] = field(default_factory=dict)
+
+
+class InputPreprocessor:
+    """
+    Prepara o input_text uma vez por mensagem: normaliza, conta tokens e
+    corta o meio (preservando início e fim) no orçamento padrão e no
+    `max_input_tokens` do bloco `model` de cada prompt que declarar um.
+    Os orçamentos são relidos a cada mensagem (hot reload dos YAMLs).
+    """
+
+    def __init__(
+        self,
+        tokenizer: TokenizerPort,
+        budgets: Callable[[], Mapping[str, int]],
+        default_max_tokens: int = 8000,
+        head_ratio: float = 0.7,
+        strip_reply_history: bool = True,
+    ):
+        self._tokenizer = tokenizer
+        self._budgets = budgets
+        self._default_max_tokens = default_max_tokens
+        self._head_ratio = head_ratio
+        self._strip_reply_history = strip_reply_history
+
+    def prepare(self, text: str, correlation_id: str | None = None) -> PreparedInput:
+        tokens_raw = self._tokenizer.count(text)
+        normalized = normalize_text(text, self._strip_reply_history)
+        tokens_normalized = self._tokenizer.count(normalized) if normalized != text else tokens_raw
+
+        base = self._fit(normalized, tokens_normalized, self._default_max_tokens)
+        # prompts com o mesmo orçamento compartilham o corte
+        by_budget: Dict[int, str] = {self._default_max_tokens: base}
+        prompt_texts: Dict[str, str] = {}
+        prompt_tokens: Dict[str, int] = {}
+        for prompt_id, budget in self._budgets().items():
+            if budget not in by_budget:
+                by_budget[budget] = self._fit(normalized, tokens_normalized, budget)
+            fitted = by_budget[budget]
+            if fitted != base:
+                prompt_texts[prompt_id] = fitted
+                prompt_tokens[prompt_id] = self._tokenizer.count(fitted)
+
+        tokens = self._tokenizer.count(base) if base != normalized else tokens_normalized
+        log.info(
+            "input_prepared",
+            correlation_id=correlation_id,
+            tokens_raw=tokens_raw,
+            tokens_normalized=tokens_normalized,
+            tokens=tokens,
+            truncated=base != normalized,
+            prompt_tokens=prompt_tokens or None,
+        )
+        return PreparedInput(
+            text=base,
+            tokens_raw=tokens_raw,
+            tokens=tokens,
+            prompt_texts=prompt_texts,
+            prompt_tokens=prompt_tokens,
+        )
+
+    def _fit(self, text: str, tokens: int, budget: int) -> str:
+        # orçamento 0 = sem limite
+        if budget <= 0 or tokens <= budget:
+            return text
+        return self._tokenizer.truncate(text, budget, self._head_ratio)
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import structlog
+
+from app.application.ports.embeddings import EmbeddingsPort
+from app.infrastructure.vector.memmap_label_index import MemmapLabelIndex
+
+log = structlog.get_logger()
+
+# misses esperando o learn(): da ordem das mensagens em voo
+MAX_MISS_VECTORS = 1024
+
+
+class KnnClassifier:
+    """
+    Classificador kNN na frente do classifier-agent. Devolve o mesmo formato
+    do output_schema do classifier.yaml ({"intent", "confidence"}); a
+    confiança é a fração ponderada por similaridade dos k vizinhos que votam
+    no rótulo vencedor, escalada pelo suporte (vizinhos acima de
+    `min_similarity` sobre `min_neighbors`). Abaixo de `threshold` retorna
+    None e o LLM decide.
+    """
+
+    def __init__(
+        self,
+        embeddings: EmbeddingsPort,
+        index: MemmapLabelIndex,
+        k: int = 10,
+        threshold: float = 0.8,
+        min_similarity: float = 0.75,
+        learn_min_confidence: float = 0.85,
+        write_batch_size: int = 32,
+        min_neighbors: int = 3,
+    ):
+        self._embeddings = embeddings
+        self._index = index
+        self._k = k
+        self._threshold = threshold
+        self._min_similarity = min_similarity
+        self._learn_min_confidence = learn_min_confidence
+        self._write_batch_size = write_batch_size
+        self._min_neighbors = max(min_neighbors, 1)
+
+        self._pending_vectors: List[Sequence[float]] = []
+        self._pending_labels: List[str] = []
+        self._lock = threading.Lock()
+        # embedding dos misses, reaproveitado pelo learn() depois da resposta do LLM
+        self._miss_vectors: OrderedDict[str, np.ndarray] = OrderedDict()
+
+        self._hits_total = 0
+        self._misses_total = 0
+        self._learned_total = 0
+
+    def classify(self, text: str) -> Dict[str, Any] | None:
+        try:
+            vector = np.asarray(self._embeddings.embed([text])[0], dtype=np.float32)
+        except Exception as e:
+            log.warning("knn_classifier_error", error=str(e))
+            self._misses_total += 1
+            return None
+
+        result = self._vote(vector)
+        if result is None or result["confidence"] < self._threshold:
+            self._misses_total += 1
+            with self._lock:
+                self._miss_vectors[text] = vector
+                if len(self._miss_vectors) > MAX_MISS_VECTORS:
+                    self._miss_vectors.popitem(last=False)
+            return None
+
+        self._hits_total += 1
+        return result
+
+    def _vote(self, vector: np.ndarray) -> Dict[str, Any] | None:
+        matrix, labels = self._index.view()
+        if not labels:
+            return None
+
+        norm = np.linalg.norm(vector)
+        q = vector / norm if norm else vector
+        scores = np.asarray(matrix @ q)
+
+        k = min(self._k, len(labels))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[scores[top] >= self._min_similarity]
+        if top.size == 0:
+            return None
+
+        votes: Dict[str, float] = {}
+        for i in top:
+            votes[labels[i]] = votes.get(labels[i], 0.0) + float(scores[i])
+
+        intent, weight = max(votes.items(), key=lambda kv: kv[1])
+        # um vizinho só não vale confiança 1.0
+        support = min(top.size / self._min_neighbors, 1.0)
+        return {"intent": intent, "confidence": round(weight / sum(votes.values()) * support, 4)}
+
+    def learn(self, text: str, result: Dict[str, Any]) -> None:
+        """Alimenta o índice com resultados do LLM confiantes o bastante."""
+        intent = result.get("intent")
+        confidence = result.get("confidence") or 0.0
+        if not intent or confidence < self._learn_min_confidence:
+            return
+
+        with self._lock:
+            vector = self._miss_vectors.pop(text, None)
+        if vector is None:
+            try:
+                vector = self._embeddings.embed([text])[0]
+            except Exception as e:
+                log.warning("knn_classifier_error", error=str(e))
+                return
+
+        with self._lock:
+            self._pending_vectors.append(vector)
+            self._pending_labels.append(intent)
+            due = len(self._pending_labels) >= self._write_batch_size
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            vectors, self._pending_vectors = self._pending_vectors, []
+            labels, self._pending_labels = self._pending_labels, []
+        if not labels:
+            return
+        try:
+            self._index.add_batch(vectors, labels)
+            self._learned_total += len(labels)
+        except Exception as e:
+            log.warning("knn_classifier_write_error", size=len(labels), error=str(e))
+
+    def close(self) -> None:
+        self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "examples": len(self._index),
+            "hits_total": self._hits_total,
+            "misses_total": self._misses_total,
+            "learned_total": self._learned_total,
+        }
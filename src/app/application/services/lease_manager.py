@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
+import structlog
+
+from app.application.ports.metrics import MetricsPort
+from app.application.ports.queue import QueuePort
+
+log = structlog.get_logger()
+
+
+@dataclass
+class Lease:
+    message_id: str
+    receipt_handle: str
+    acquired_at: float
+    expires_at: float
+    extensions: int = 0
+
+
+class VisibilityLeaseManager:
+    """
+    Mantém a visibilidade das mensagens em processamento.
+
+    Um heartbeat em background estende, em lote, os receipts que estão a menos
+    de `margin_seconds` de expirar. Para de estender quando o handler libera o
+    lease ou quando o tempo total ultrapassa `max_lease_seconds`.
+    """
+
+    def __init__(
+        self,
+        queue: QueuePort,
+        extension_seconds: int,
+        margin_seconds: int,
+        max_lease_seconds: int,
+        interval_seconds: float,
+        metrics: MetricsPort | None = None,
+    ):
+        self._queue = queue
+        self._extension_seconds = extension_seconds
+        self._margin_seconds = margin_seconds
+        self._max_lease_seconds = max_lease_seconds
+        self._interval_seconds = interval_seconds
+        self._metrics = metrics
+
+        self._leases: Dict[str, Lease] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self._extensions_total = 0
+        self._extension_failures_total = 0
+        self._capped_total = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="sqs-lease-heartbeat", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self._interval_seconds + 5)
+            self._thread = None
+
+    def track(self, message_id: str, receipt_handle: str, visibility_timeout: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._leases[receipt_handle] = Lease(
+                message_id=message_id,
+                receipt_handle=receipt_handle,
+                acquired_at=now,
+                expires_at=now + visibility_timeout,
+            )
+
+    def release(self, receipt_handle: str) -> None:
+        with self._lock:
+            lease = self._leases.pop(receipt_handle, None)
+        if lease is None:
+            return
+        age = time.monotonic() - lease.acquired_at
+        if self._metrics is not None:
+            self._metrics.observe_lease(age, lease.extensions)
+        if lease.extensions:
+            log.info(
+                "lease_released",
+                message_id=lease.message_id,
+                extensions=lease.extensions,
+                lease_age_s=round(age, 3),
+            )
+
+    def snapshot(self) -> Dict[str, float]:
+        now = time.monotonic()
+        with self._lock:
+            ages = [now - lease.acquired_at for lease in self._leases.values()]
+        return {
+            "active": len(ages),
+            "oldest_lease_age_s": round(max(ages, default=0.0), 3),
+            "extensions_total": self._extensions_total,
+            "extension_failures_total": self._extension_failures_total,
+            "capped_total": self._capped_total,
+        }
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self._interval_seconds):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                log.exception("lease_heartbeat_error", error=str(e))
+            if self._metrics is not None:
+                snap = self.snapshot()
+                self._metrics.set_leases(snap["active"], snap["oldest_lease_age_s"])
+
+    def heartbeat(self) -> None:
+        now = time.monotonic()
+        due: List[Lease] = []
+        capped: List[Lease] = []
+        with self._lock:
+            for receipt, lease in list(self._leases.items()):
+                if lease.expires_at - now > self._margin_seconds:
+                    continue
+
+                if now - lease.acquired_at + self._extension_seconds > self._max_lease_seconds:
+                    # teto atingido: deixa expirar e a mensagem volta para a fila
+                    del self._leases[receipt]
+                    self._capped_total += 1
+                    capped.append(lease)
+                    log.warning(
+                        "lease_cap_reached",
+                        message_id=lease.message_id,
+                        extensions=lease.extensions,
+                        lease_age_s=round(now - lease.acquired_at, 3),
+                    )
+                    continue
+
+                due.append(lease)
+
+        if self._metrics is not None:
+            for lease in capped:
+                self._metrics.inc_lease_extensions("capped")
+                self._metrics.observe_lease(now - lease.acquired_at, lease.extensions)
+
+        if not due:
+            return
+
+        failed = set(self._queue.change_visibility_batch(
+            [lease.receipt_handle for lease in due],
+            self._extension_seconds,
+        ))
+
+        with self._lock:
+            for lease in due:
+                if lease.receipt_handle in failed:
+                    self._extension_failures_total += 1
+                    continue
+                lease.extensions += 1
+                lease.expires_at = now + self._extension_seconds
+                self._extensions_total += 1
+
+        if self._metrics is not None:
+            if len(due) > len(failed):
+                self._metrics.inc_lease_extensions("extended", len(due) - len(failed))
+            if failed:
+                self._metrics.inc_lease_extensions("failed", len(failed))
+        log.info("lease_extended", extended=len(due) - len(failed), failed=len(failed))
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
+import structlog
+
+from app.application.ports.result_sink import ResultSinkPort, SinkRecord
+from app.application.services.acknowledger import BatchAcknowledger
+from app.application.services.lease_manager import VisibilityLeaseManager
+from app.domain.models import WorkResult
+
+log = structlog.get_logger()
+
+
+@dataclass
+class _PendingResult:
+    record: SinkRecord
+    receipt_handle: str
+    enqueued_at: float
+    attempts: int = 0
+
+
+class BatchResultWriter:
+    """
+    Bufferiza os WorkResults e grava no sink em lote quando o buffer chega em
+    `batch_size` ou o mais antigo passa de `max_delay_seconds`. A mensagem de
+    origem só vai para o acknowledger depois que o lote foi gravado; falhas
+    voltam para o buffer até `max_attempts` e, depois disso, a mensagem fica
+    sem ack e é reentregue. Registros que o sink rejeita de vez (ex.: acima
+    do limite de tamanho) recebem ack, como um PermanentError. Acima de `max_pending`, `backpressure_seconds()`
+    segura o loop de recebimento.
+
+    Com `leases`, o heartbeat continua estendendo a visibilidade enquanto o
+    resultado espera no buffer; o lease só é liberado no ack ou no descarte.
+    """
+
+    def __init__(
+        self,
+        sink: ResultSinkPort,
+        acker: BatchAcknowledger,
+        batch_size: int = 10,
+        max_delay_seconds: float = 1.0,
+        max_pending: int = 200,
+        max_attempts: int = 3,
+        leases: VisibilityLeaseManager | None = None,
+    ):
+        self._sink = sink
+        self._leases = leases
+        self._acker = acker
+        self._batch_size = batch_size
+        self._max_delay_seconds = max_delay_seconds
+        self._max_pending = max_pending
+        self._max_attempts = max_attempts
+
+        self._pending: List[_PendingResult] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread: threading.Thread | None = None
+
+        self._written_total = 0
+        self._failed_total = 0
+        self._dropped_total = 0
+        self._rejected_total = 0
+        self._batches_total = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="result-sink-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, receipt_handle: str, message_id: str, result: WorkResult) -> None:
+        item = _PendingResult(
+            record=SinkRecord(message_id=message_id, result=result),
+            receipt_handle=receipt_handle,
+            enqueued_at=time.monotonic(),
+        )
+        with self._cond:
+            if self._closed:
+                # mesmo caso do ack_after_close: a mensagem volta para a fila
+                self._dropped_total += 1
+                log.warning("result_after_close", message_id=message_id)
+                self._release(receipt_handle)
+                return
+            self._pending.append(item)
+            # o primeiro do buffer arma o prazo: a thread estava esperando sem timeout
+            if len(self._pending) == 1 or len(self._pending) >= self._batch_size:
+                self._cond.notify()
+
+    def backpressure_seconds(self) -> float:
+        """Quanto o loop de recebimento deve esperar antes de puxar mais mensagens."""
+        with self._cond:
+            saturated = len(self._pending) >= self._max_pending
+        return self._max_delay_seconds if saturated else 0.0
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        self._sink.close()
+
+    def flush(self) -> None:
+        """Grava tudo que está pendente, inclusive as retentativas."""
+        while True:
+            with self._cond:
+                batch = self._take(self._batch_size)
+            if not batch:
+                return
+            self._send(batch)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "written_total": self._written_total,
+            "failed_total": self._failed_total,
+            "dropped_total": self._dropped_total,
+            "rejected_total": self._rejected_total,
+            "batches_total": self._batches_total,
+        }
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and not self._due():
+                    self._cond.wait(timeout=self._wait_timeout())
+                if self._closed:
+                    return
+                batch = self._take(self._batch_size)
+
+            self._send(batch)
+
+    def _due(self) -> bool:
+        if len(self._pending) >= self._batch_size:
+            return True
+        if not self._pending:
+            return False
+        return time.monotonic() - self._pending[0].enqueued_at >= self._max_delay_seconds
+
+    def _wait_timeout(self) -> float | None:
+        if not self._pending:
+            return None
+        age = time.monotonic() - self._pending[0].enqueued_at
+        return max(self._max_delay_seconds - age, 0.0)
+
+    def _take(self, n: int) -> List[_PendingResult]:
+        batch, self._pending = self._pending[:n], self._pending[n:]
+        return batch
+
+    def _send(self, batch: List[_PendingResult]) -> None:
+        self._batches_total += 1
+        try:
+            written = self._sink.write_batch([p.record for p in batch])
+            failed, rejected = set(written.failed), set(written.rejected)
+        except Exception as e:
+            log.warning("result_sink_batch_error", size=len(batch), error=str(e))
+            failed, rejected = {p.record.message_id for p in batch}, set()
+
+        retry: List[_PendingResult] = []
+        now = time.monotonic()
+        for p in batch:
+            if p.record.message_id in rejected:
+                # nunca vai entrar: reentregar só repetiria a rejeição
+                self._rejected_total += 1
+                log.error("result_sink_rejected", message_id=p.record.message_id)
+                self._acker.ack(p.receipt_handle)
+                self._release(p.receipt_handle)
+                continue
+            if p.record.message_id not in failed:
+                self._written_total += 1
+                self._acker.ack(p.receipt_handle)
+                self._release(p.receipt_handle)
+                continue
+            p.attempts += 1
+            self._failed_total += 1
+            if p.attempts >= self._max_attempts:
+                # sem ack: a mensagem volta a ficar visível e o idempotency store
+                # (quando ligado) devolve o resultado sem chamar o LLM de novo
+                self._dropped_total += 1
+                log.error("result_sink_dropped", message_id=p.record.message_id, attempts=p.attempts)
+                self._release(p.receipt_handle)
+                continue
+            p.enqueued_at = now
+            retry.append(p)
+
+        if retry:
+            with self._cond:
+                self._pending[:0] = retry
+
+    def _release(self, receipt_handle: str) -> None:
+        if self._leases is not None:
+            self._leases.release(receipt_handle)
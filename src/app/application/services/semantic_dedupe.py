@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import numpy as np
+import structlog
+
+from app.application.ports.embeddings import EmbeddingsPort
+from app.application.ports.vector_index import VectorIndexPort, VectorItem
+
+log = structlog.get_logger()
+
+
+@dataclass(frozen=True)
+class DuplicateMatch:
+    duplicate_of: str
+    similarity: float
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"duplicate_of": self.duplicate_of, "similarity": round(self.similarity, 4)}
+
+
+class SemanticDeduper:
+    """
+    Fast path de dedupe: embedding + busca ANN antes da chamada ao LLM.
+    Acima de `threshold` a mensagem é resolvida como duplicada; abaixo, o
+    vetor entra num buffer e é gravado no índice em lote: ao chegar em
+    `write_batch_size` ou, por uma thread de fundo, quando o item mais antigo
+    passa de `max_write_delay_seconds`. `close()` grava o que sobrou.
+    """
+
+    def __init__(
+        self,
+        embeddings: EmbeddingsPort,
+        index: VectorIndexPort,
+        threshold: float = 0.92,
+        write_batch_size: int = 32,
+        max_write_delay_seconds: float = 5.0,
+    ):
+        self._embeddings = embeddings
+        self._index = index
+        self._threshold = threshold
+        self._write_batch_size = write_batch_size
+        self._max_write_delay_seconds = max_write_delay_seconds
+
+        self._pending: List[VectorItem] = []
+        self._pending_since: float | None = None
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._closed = False
+        self._thread: threading.Thread | None = None
+
+        self._checks_total = 0
+        self._duplicates_total = 0
+        self._errors_total = 0
+        self._written_total = 0
+
+    def find_duplicate(self, item_id: str, text: str) -> DuplicateMatch | None:
+        self._checks_total += 1
+        try:
+            vector = np.asarray(self._embeddings.embed([text])[0], dtype=np.float32)
+            match = self._best_match(item_id, vector)
+        except Exception as e:
+            # o fast path nunca derruba a mensagem: sem match, segue para o LLM
+            self._errors_total += 1
+            log.warning("semantic_dedupe_error", item_id=item_id, error=str(e))
+            return None
+
+        if match is not None:
+            self._duplicates_total += 1
+            log.info("semantic_dedupe_hit", item_id=item_id, **match.as_dict())
+            return match
+
+        self._buffer(VectorItem(id=item_id, vector=vector.tolist(), metadata={"preview": text[:200]}))
+        return None
+
+    def _best_match(self, item_id: str, vector: np.ndarray) -> DuplicateMatch | None:
+        best: DuplicateMatch | None = None
+        for m in self._index.search(vector.tolist(), k=1):
+            if m.id != item_id and m.score >= self._threshold:
+                best = DuplicateMatch(duplicate_of=m.id, similarity=m.score)
+
+        # itens ainda não gravados também contam como "já vistos"
+        with self._lock:
+            pending = list(self._pending)
+        if pending:
+            matrix = np.asarray([it.vector for it in pending], dtype=np.float32)
+            scores = matrix @ vector / (np.linalg.norm(matrix, axis=1) * (np.linalg.norm(vector) or 1.0) + 1e-12)
+            i = int(np.argmax(scores))
+            if pending[i].id != item_id and scores[i] >= self._threshold:
+                if best is None or scores[i] > best.similarity:
+                    best = DuplicateMatch(duplicate_of=pending[i].id, similarity=float(scores[i]))
+        return best
+
+    def _buffer(self, item: VectorItem) -> None:
+        with self._cond:
+            self._pending.append(item)
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+                # o primeiro do buffer arma o prazo da thread de flush
+                self._start_timer()
+                self._cond.notify()
+            due = len(self._pending) >= self._write_batch_size
+        if due:
+            self.flush()
+
+    def _start_timer(self) -> None:
+        if self._thread is not None or self._closed:
+            return
+        self._thread = threading.Thread(target=self._timer_loop, name="dedupe-flush", daemon=True)
+        self._thread.start()
+
+    def _timer_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and not self._due():
+                    self._cond.wait(timeout=self._wait_timeout())
+                if self._closed:
+                    return
+            self.flush()
+
+    def _due(self) -> bool:
+        if self._pending_since is None:
+            return False
+        return time.monotonic() - self._pending_since >= self._max_write_delay_seconds
+
+    def _wait_timeout(self) -> float | None:
+        if self._pending_since is None:
+            return None
+        return max(self._max_write_delay_seconds - (time.monotonic() - self._pending_since), 0.0)
+
+    def flush(self) -> None:
+        with self._lock:
+            items, self._pending = self._pending, []
+            self._pending_since = None
+        if not items:
+            return
+        try:
+            self._index.add_batch(items)
+            self._written_total += len(items)
+        except Exception as e:
+            self._errors_total += 1
+            log.warning("semantic_dedupe_write_error", size=len(items), error=str(e))
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "checks_total": self._checks_total,
+            "duplicates_total": self._duplicates_total,
+            "errors_total": self._errors_total,
+            "written_total": self._written_total,
+        }
@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, BinaryIO, Deque, Dict, List, Optional, Tuple
+
+import structlog
+
+from app.application.ports.batch import BatchProviderPort
+from app.application.ports.llm import LLMPort, LLMRequest
+from app.application.services.checkpoint import BatchCheckpoint, CheckpointStore
+from app.application.use_cases.process_message import ProcessMessage
+from app.domain.errors import PermanentError, TransientError
+
+log = structlog.get_logger()
+
+# status da Batch API que encerram o polling
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def _skip_to(source: BinaryIO, offset: int) -> None:
+    if offset <= 0:
+        return
+    if source.seekable():
+        source.seek(offset)
+        return
+    # stdin: descarta os bytes já processados (a entrada precisa ser a mesma)
+    remaining = offset
+    while remaining:
+        chunk = source.read(min(remaining, 1 << 20))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+
+
+def _write_line(sink: BinaryIO, record: Dict[str, Any]) -> None:
+    sink.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+class ProcessBatch:
+    """
+    Passa um JSONL (um corpo de mensagem do SQS por linha) pelo mesmo
+    ProcessMessage do worker. No máximo `max_in_flight` linhas ficam em
+    memória; a saída sai na ordem da entrada, o que deixa o checkpoint ser
+    um par de offsets (entrada, saída) e a retomada exata.
+
+    Erro transitório (429/5xx esgotados, circuito aberto) não vira saída:
+    o lote para com o checkpoint antes da linha, e rodar de novo retoma dali.
+    """
+
+    def __init__(
+        self,
+        use_case: ProcessMessage,
+        workers: int = 8,
+        max_in_flight: int = 64,
+        checkpoint_every: int = 100,
+        checkpoint_interval_seconds: float = 5.0,
+    ):
+        self._use_case = use_case
+        self._workers = workers
+        self._max_in_flight = max(max_in_flight, workers)
+        self._checkpoint_every = checkpoint_every
+        self._checkpoint_interval_seconds = checkpoint_interval_seconds
+
+    def run(
+        self,
+        source: BinaryIO,
+        sink: BinaryIO,
+        store: CheckpointStore | None = None,
+        source_name: str = "batch",
+    ) -> BatchCheckpoint:
+        cp = store.load() if store is not None else BatchCheckpoint()
+        if cp.done:
+            log.info("batch_already_done", **cp.__dict__)
+            return cp
+
+        _skip_to(source, cp.input_offset)
+        if store is not None:
+            # descarta saída escrita depois do último checkpoint
+            sink.truncate(cp.output_offset)
+            sink.seek(cp.output_offset)
+
+        window: Deque[Tuple[int, Optional[Future]]] = deque()
+        offset = cp.input_offset
+        last_saved = (cp.processed, time.monotonic())
+        stopped = False
+
+        pool = ThreadPoolExecutor(max_workers=self._workers)
+        try:
+            for line in iter(source.readline, b""):
+                start, offset = offset, offset + len(line)
+                future = pool.submit(self._one, line, f"{source_name}:{start}", start) if line.strip() else None
+                window.append((offset, future))
+
+                while not stopped and window and (
+                    len(window) >= self._max_in_flight or window[0][1] is None or window[0][1].done()
+                ):
+                    cp, stopped = self._drain_head(window, sink, cp)
+                if stopped:
+                    break
+                last_saved = self._maybe_save(store, sink, cp, last_saved)
+
+            while window and not stopped:
+                cp, stopped = self._drain_head(window, sink, cp)
+        finally:
+            # parada por erro transitório: o que ainda não começou nem sai da fila
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        if stopped:
+            cp = self._save(store, sink, cp)
+            log.error(
+                "batch_stopped_transient",
+                input_offset=cp.input_offset,
+                processed=cp.processed,
+                hint="rerun with the same checkpoint to resume from this line",
+            )
+            return cp
+
+        cp = self._save(store, sink, cp.advance(done=True))
+        log.info("batch_finished", processed=cp.processed, failed=cp.failed)
+        return cp
+
+    def _one(self, line: bytes, message_id: str, offset: int) -> Dict[str, Any]:
+        try:
+            result = self._use_case.execute(line.decode("utf-8"), message_id=message_id)
+            return {"offset": offset, "status": "ok", **result.model_dump()}
+        except PermanentError as e:
+            return {"offset": offset, "status": "permanent_error", "error": str(e)}
+        except TransientError as e:
+            return {"offset": offset, "status": "transient_error", "error": str(e)}
+        except Exception as e:
+            log.exception("batch_line_unhandled_error", offset=offset, error=str(e))
+            return {"offset": offset, "status": "unhandled_error", "error": str(e)}
+
+    def _drain_head(
+        self,
+        window: Deque[Tuple[int, Optional[Future]]],
+        sink: BinaryIO,
+        cp: BatchCheckpoint,
+    ) -> Tuple[BatchCheckpoint, bool]:
+        """Grava a linha da frente; True quando ela falhou por erro transitório e o lote deve parar."""
+        end, future = window[0]
+        if future is None:
+            window.popleft()
+            return cp.advance(input_offset=end), False
+
+        record = future.result()
+        if record["status"] == "transient_error":
+            # não grava nem avança o checkpoint: a retomada tenta a linha de novo
+            log.warning("batch_line_transient_error", offset=record["offset"], error=record["error"])
+            return cp, True
+
+        window.popleft()
+        _write_line(sink, record)
+        return cp.advance(
+            input_offset=end,
+            processed=cp.processed + 1,
+            failed=cp.failed + (record["status"] != "ok"),
+        ), False
+
+    def _maybe_save(
+        self,
+        store: CheckpointStore | None,
+        sink: BinaryIO,
+        cp: BatchCheckpoint,
+        last_saved: Tuple[int, float],
+    ) -> Tuple[int, float]:
+        processed, saved_at = last_saved
+        if store is None:
+            return last_saved
+        if cp.processed - processed < self._checkpoint_every and time.monotonic() - saved_at < self._checkpoint_interval_seconds:
+            return last_saved
+        self._save(store, sink, cp)
+        return cp.processed, time.monotonic()
+
+    def _save(self, store: CheckpointStore | None, sink: BinaryIO, cp: BatchCheckpoint) -> BatchCheckpoint:
+        sink.flush()
+        if store is None:
+            return cp
+        # a saída precisa estar em disco antes do checkpoint que aponta para ela
+        os.fsync(sink.fileno())
+        cp = cp.advance(output_offset=sink.tell())
+        store.save(cp)
+        log.info("batch_checkpoint", input_offset=cp.input_offset, processed=cp.processed, failed=cp.failed)
+        return cp
+
+
+class ProviderBatch:
+    """
+    Modalidade provider-batch: gera uma requisição por (linha, prompt) no
+    formato da Batch API, envia ao provedor, acompanha até terminar e junta
+    as respostas validadas por linha. Só os prompts de `prompt_ids` rodam;
+    roteamento e judge do grafo ficam de fora.
+    """
+
+    def __init__(
+        self,
+        llm: LLMPort,
+        provider: BatchProviderPort,
+        prompt_ids: List[str],
+        work_dir: str | Path,
+        poll_interval_seconds: float = 30.0,
+    ):
+        self._llm = llm
+        self._provider = provider
+        self._prompt_ids = prompt_ids
+        self._dir = Path(work_dir)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._poll_interval_seconds = poll_interval_seconds
+
+    def run(self, input_path: str | Path, sink: BinaryIO, store: CheckpointStore) -> BatchCheckpoint:
+        cp = store.load()
+        if cp.done:
+            log.info("batch_already_done", **cp.__dict__)
+            return cp
+
+        if cp.batch_id is None:
+            requests_path = self._dir / "requests.jsonl"
+            count = self._write_requests(Path(input_path), requests_path)
+            cp = cp.advance(batch_id=self._provider.submit(requests_path))
+            store.save(cp)
+            log.info("batch_submitted", batch_id=cp.batch_id, requests=count)
+
+        status = self._wait(cp.batch_id)
+        if status != "completed":
+            raise TransientError(f"batch {cp.batch_id} ended with status {status}")
+
+        output_path = self._dir / f"{cp.batch_id}.output.jsonl"
+        self._provider.download(cp.batch_id, output_path)
+
+        sink.truncate(0)
+        sink.seek(0)
+        cp = self._collect(Path(input_path), output_path, sink, cp)
+        sink.flush()
+        os.fsync(sink.fileno())
+        cp = cp.advance(output_offset=sink.tell(), done=True)
+        store.save(cp)
+        log.info("batch_finished", batch_id=cp.batch_id, processed=cp.processed, failed=cp.failed)
+        return cp
+
+    def _write_requests(self, input_path: Path, requests_path: Path) -> int:
+        count = 0
+        with open(input_path, "rb") as src, open(requests_path, "w", encoding="utf-8") as out:
+            offset = 0
+            for line in iter(src.readline, b""):
+                start, offset = offset, offset + len(line)
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                    variables = {"input_text": data["input_text"]}
+                except (ValueError, KeyError, TypeError):
+                    # linha inválida não vira requisição; aparece como erro na coleta
+                    continue
+                for prompt_id in self._prompt_ids:
+                    req = LLMRequest(prompt_id=prompt_id, variables=variables, correlation_id=data.get("correlation_id"))
+                    out.write(json.dumps(self._llm.batch_request(req, f"{start}:{prompt_id}"), ensure_ascii=False) + "\n")
+                    count += 1
+        return count
+
+    def _wait(self, batch_id: str) -> str:
+        while True:
+            status = self._provider.status(batch_id)
+            if status in TERMINAL_STATUSES:
+                return status
+            log.info("batch_waiting", batch_id=batch_id, status=status)
+            time.sleep(self._poll_interval_seconds)
+
+    def _collect(self, input_path: Path, output_path: Path, sink: BinaryIO, cp: BatchCheckpoint) -> BatchCheckpoint:
+        # a saída da Batch API não vem em ordem: agrupa por linha de entrada
+        grouped: Dict[int, Dict[str, Any]] = {}
+        with open(output_path, "r", encoding="utf-8") as f:
+            for raw in f:
+                if not raw.strip():
+                    continue
+                item = json.loads(raw)
+                offset, prompt_id = item["custom_id"].split(":", 1)
+                grouped.setdefault(int(offset), {})[prompt_id] = item
+
+        processed = failed = 0
+        with open(input_path, "rb") as src:
+            offset = 0
+            for line in iter(src.readline, b""):
+                start, offset = offset, offset + len(line)
+                if not line.strip():
+                    continue
+                record = self._record(start, line, grouped.pop(start, {}))
+                _write_line(sink, record)
+                processed += 1
+                failed += record["status"] != "ok"
+        return cp.advance(input_offset=offset, processed=processed, failed=failed)
+
+    def _record(self, offset: int, line: bytes, items: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            correlation_id = json.loads(line).get("correlation_id")
+        except ValueError:
+            correlation_id = None
+        if not items:
+            return {"offset": offset, "correlation_id": correlation_id, "status": "permanent_error", "error": "invalid input line"}
+
+        outputs: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        for prompt_id in self._prompt_ids:
+            item = items.get(prompt_id)
+            response = (item or {}).get("response") or {}
+            if not item or item.get("error") or response.get("status_code") != 200:
+                errors[prompt_id] = json.dumps((item or {}).get("error") or {"status_code": response.get("status_code")})
+                continue
+            text = response["body"]["choices"][0]["message"]["content"]
+            parsed = self._llm.parse_structured(prompt_id, text, correlation_id=correlation_id)
+            if parsed is None:
+                errors[prompt_id] = "invalid structured output"
+            else:
+                outputs[prompt_id] = parsed
+
+        return {
+            "offset": offset,
+            "correlation_id": correlation_id,
+            "status": "ok" if not errors else "failed",
+            "outputs": outputs,
+            "errors": errors,
+        }
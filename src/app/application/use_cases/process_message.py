@@ -1,28 +1,128 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import time
 from typing import Any, Dict
 
+import structlog
+
 from app.application.ports.llm import LLMPort
+from app.application.ports.metrics import MetricsPort
 from app.agents.graph import build_graph
+from app.application.services.cascade import CascadeRouter
+from app.application.services.idempotency import IdempotencyGuard, idempotency_key
+from app.application.services.input_preprocessor import InputPreprocessor, PreparedInput
+from app.application.services.knn_classifier import KnnClassifier
+from app.application.services.semantic_dedupe import SemanticDeduper
 from app.domain.models import WorkItem, WorkResult
 from app.domain.errors import PermanentError
 
+log = structlog.get_logger()
+
 class ProcessMessage:
-    def __init__(self, llm: LLMPort):
+    def __init__(
+        self,
+        llm: LLMPort,
+        graph_topology: str = "parallel",
+        deduper: SemanticDeduper | None = None,
+        knn: KnnClassifier | None = None,
+        cascade: CascadeRouter | None = None,
+        metrics: MetricsPort | None = None,
+        idempotency: IdempotencyGuard | None = None,
+        preprocessor: InputPreprocessor | None = None,
+    ):
         self._llm = llm
-        self._graph = build_graph(llm)
+        self._graph_topology = graph_topology
+        self._cascade = cascade
+        self._metrics = metrics
+        self._idempotency = idempotency
+        self._preprocessor = preprocessor
+        self._graph = build_graph(llm, topology=graph_topology, deduper=deduper, knn=knn, cascade=cascade)
 
     def execute(self, raw_body: str, message_id:str) -> WorkResult:
         item = self._parse_body(raw_body, message_id)
+        if self._idempotency is None:
+            return self._run(item, message_id)
+
+        # chave sobre o texto bruto: não muda quando o pré-processamento muda
+        key = idempotency_key(item.correlation_id or message_id, item.input_text)
+        stored = self._idempotency.begin(key)
+        if stored is not None:
+            return stored
+        try:
+            result = self._run(item, message_id)
+        except BaseException:
+            self._idempotency.abandon(key)
+            raise
+        self._idempotency.complete(key, result)
+        return result
+
+    async def aexecute(self, raw_body: str, message_id:str) -> WorkResult:
+        item = self._parse_body(raw_body, message_id)
+        if self._idempotency is None:
+            return await self._arun(item, message_id)
+
+        # o store é síncrono (SQLite/psycopg): fora do event loop
+        key = idempotency_key(item.correlation_id or message_id, item.input_text)
+        stored = await asyncio.to_thread(self._idempotency.begin, key)
+        if stored is not None:
+            return stored
+        try:
+            result = await self._arun(item, message_id)
+        except BaseException:
+            # inclui o CancelledError da drenagem: a próxima entrega processa de novo
+            await asyncio.shield(asyncio.to_thread(self._idempotency.abandon, key))
+            raise
+        await asyncio.to_thread(self._idempotency.complete, key, result)
+        return result
+
+    def _run(self, item: WorkItem, message_id: str) -> WorkResult:
+        init_state = self._initial_state(item, message_id, self._prepare(item, message_id))
+        started = time.perf_counter()
+        return self._to_result(self._graph.invoke(init_state), message_id, started)
+
+    async def _arun(self, item: WorkItem, message_id: str) -> WorkResult:
+        # tokenizar um texto longo é CPU: fora do event loop
+        prepared = await asyncio.to_thread(self._prepare, item, message_id) if self._preprocessor else None
+        init_state = self._initial_state(item, message_id, prepared)
+        started = time.perf_counter()
+        return self._to_result(await self._graph.ainvoke(init_state), message_id, started)
+
+    def _prepare(self, item: WorkItem, message_id: str) -> PreparedInput | None:
+        if self._preprocessor is None:
+            return None
+        return self._preprocessor.prepare(item.input_text, correlation_id=item.correlation_id or message_id)
 
-        init_state = {
+    def _initial_state(self, item: WorkItem, message_id: str, prepared: PreparedInput | None) -> Dict[str, Any]:
+        state: Dict[str, Any] = {
             "correlation_id": item.correlation_id or message_id,
             "input_text": item.input_text,
             "context": item.metadata
         }
+        if prepared is not None:
+            state["input_text"] = prepared.text
+            state["prompt_inputs"] = prepared.prompt_texts
+        return state
 
-        final_state = self._graph.invoke(init_state)
+    def _to_result(self, final_state: Dict[str, Any], message_id:str, started: float) -> WorkResult:
+        graph_ms = round((time.perf_counter() - started) * 1000, 1)
+        node_timings = final_state.get("node_timings", {})
+        route = self._cascade.record(final_state, graph_ms) if self._cascade is not None else None
+        if self._metrics is not None:
+            for node, ms in node_timings.items():
+                self._metrics.observe_node(node, ms / 1000)
+
+        # nodes_ms > graph_ms indica o ganho do fan-out em paralelo
+        log.info(
+            "graph_completed",
+            correlation_id=final_state.get("correlation_id", message_id),
+            topology=self._graph_topology,
+            route=route,
+            graph_ms=graph_ms,
+            nodes_ms=round(sum(node_timings.values()), 1),
+            node_timings=node_timings,
+        )
 
         return WorkResult(
             correlation_id=final_state.get("correlation_id", message_id),
@@ -32,6 +132,10 @@ class ProcessMessage:
                 "agent_dedupe": final_state.get("agent_dedupe"),
                 "agent_classifier": final_state.get("agent_classifier"),
                 "agent_classifier_judge": final_state.get("agent_classifier_judge"),
+                "dedupe_match": final_state.get("dedupe_match"),
+                "classifier_result": final_state.get("classifier_result"),
+                "route": route,
+                "node_timings": node_timings,
             },
         )
 
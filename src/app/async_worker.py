@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from typing import Callable, Dict, List, Optional
+
+import structlog
+
+from app.application.ports.metrics import MetricsPort
+from app.application.ports.queue import QueuePort, QueueMessage
+from app.application.services.acknowledger import BatchAcknowledger
+from app.application.services.lease_manager import VisibilityLeaseManager
+from app.application.services.result_writer import BatchResultWriter
+from app.application.use_cases.process_message import ProcessMessage
+from app.domain.errors import CircuitOpenError, PermanentError, TransientError
+
+log = structlog.get_logger()
+
+MAX_BACKPRESSURE_SECONDS = 5.0
+
+
+class AsyncWorker:
+    """
+    Pipeline contínuo: um produtor faz long-polling no SQS enquanto o trabalho
+    em voo está abaixo do high-water mark e N consumidores processam a partir
+    de uma fila limitada em memória. Cada slot é reabastecido assim que uma
+    mensagem termina, sem esperar o lote inteiro.
+    """
+
+    def __init__(
+        self,
+        use_case: ProcessMessage,
+        queue: QueuePort,
+        acker: BatchAcknowledger,
+        concurrency: int,
+        high_water_mark: int,
+        queue_maxsize: int,
+        max_messages: int,
+        wait_time_seconds: int,
+        visibility_timeout: int,
+        leases: VisibilityLeaseManager | None = None,
+        metrics: MetricsPort | None = None,
+        backpressure: Callable[[], float] | None = None,
+        drain_seconds: float | None = None,
+        writer: BatchResultWriter | None = None,
+    ):
+        self._use_case = use_case
+        self._queue = queue
+        self._acker = acker
+        self._concurrency = concurrency
+        self._high_water_mark = max(high_water_mark, concurrency)
+        self._max_messages = max_messages
+        # o receive roda numa thread e não dá para cancelar: o long polling
+        # precisa caber no prazo de drenagem, senão o que ele trouxer fica
+        # invisível até o visibility timeout
+        if drain_seconds is not None:
+            wait_time_seconds = min(wait_time_seconds, max(math.floor(drain_seconds) - 1, 1))
+        self._wait_time_seconds = wait_time_seconds
+        self._visibility_timeout = visibility_timeout
+        self._leases = leases
+        self._metrics = metrics
+        self._backpressure = backpressure
+        self._drain_seconds = drain_seconds
+        self._writer = writer
+
+        self._buffer: asyncio.Queue[Optional[QueueMessage]] = asyncio.Queue(maxsize=queue_maxsize)
+        self._in_flight = 0
+        self._slots = asyncio.Condition()
+        self._stopping = asyncio.Event()
+        self._stop_deadline: float | None = None
+        # recebidas e ainda não concluídas (no buffer ou processando), por receipt handle
+        self._active: Dict[str, QueueMessage] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def run(self) -> None:
+        if self._metrics is not None:
+            self._metrics.set_worker_capacity(self._concurrency)
+        consumers = [asyncio.create_task(self._consume()) for _ in range(self._concurrency)]
+        producer = asyncio.create_task(self._produce())
+        stopping = asyncio.create_task(self._stopping.wait())
+        try:
+            # a drenagem começa no stop, sem esperar o long polling em andamento
+            await asyncio.wait({producer, stopping}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stopping.cancel()
+            await self._drain(producer, consumers)
+        if not producer.cancelled():
+            producer.result()
+
+    async def _drain(self, producer: asyncio.Task, consumers: List[asyncio.Task]) -> None:
+        """
+        Termina o que já foi recebido; o que passar de `drain_seconds` (contados
+        desde o stop) volta para a fila. O long polling em andamento corre junto
+        com a drenagem e o que ele trouxer é devolvido sem processar.
+        """
+        async def _finish() -> None:
+            await asyncio.gather(producer, return_exceptions=True)
+            for _ in consumers:
+                await self._buffer.put(None)
+            await asyncio.gather(*consumers, return_exceptions=True)
+
+        loop = asyncio.get_running_loop()
+        if self._stop_deadline is None and self._drain_seconds is not None:
+            self._stop_deadline = loop.time() + self._drain_seconds
+        timeout = None if self._stop_deadline is None else max(self._stop_deadline - loop.time(), 0.0)
+        try:
+            await asyncio.wait_for(_finish(), timeout=timeout)
+        except asyncio.TimeoutError:
+            for task in (producer, *consumers):
+                task.cancel()
+            await asyncio.gather(producer, *consumers, return_exceptions=True)
+            await self._release_unfinished(list(self._active.values()))
+
+    async def stop(self) -> None:
+        if self._drain_seconds is not None and self._stop_deadline is None:
+            # o prazo corre desde o sinal, não desde o fim do long polling
+            self._stop_deadline = asyncio.get_running_loop().time() + self._drain_seconds
+        self._stopping.set()
+        async with self._slots:
+            self._slots.notify_all()
+
+    async def _produce(self) -> None:
+        while not self._stopping.is_set():
+            async with self._slots:
+                await self._slots.wait_for(
+                    lambda: self._in_flight < self._high_water_mark or self._stopping.is_set()
+                )
+                free = self._high_water_mark - self._in_flight
+
+            if self._stopping.is_set():
+                break
+
+            # sem orçamento de RPM/TPM, com o circuito aberto ou com o sink atrasado não adianta puxar mais do SQS
+            wait = self._backpressure() if self._backpressure is not None else 0.0
+            if wait > 0:
+                log.info("worker_backpressure", wait_seconds=round(wait, 3))
+                await self._sleep_unless_stopping(min(wait, MAX_BACKPRESSURE_SECONDS))
+                continue
+
+            try:
+                messages = await self._queue.areceive(
+                    max_messages=min(self._max_messages, free),
+                    wait_time_seconds=self._wait_time_seconds,
+                    visibility_timeout=self._visibility_timeout,
+                )
+            except Exception as e:
+                log.exception("worker_receive_error", error=str(e))
+                await self._sleep_unless_stopping(1)
+                continue
+
+            if self._stopping.is_set():
+                # chegou durante o long polling do shutdown: nem começa
+                await self._release_unfinished(messages)
+                break
+
+            await self._enqueue(messages)
+
+    async def _sleep_unless_stopping(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _enqueue(self, messages: List[QueueMessage]) -> None:
+        for m in messages:
+            if self._leases is not None:
+                self._leases.track(m.message_id, m.receipt_handle, self._visibility_timeout)
+            self._active[m.receipt_handle] = m
+            async with self._slots:
+                self._in_flight += 1
+            await self._buffer.put(m)
+
+    async def _consume(self) -> None:
+        while True:
+            m = await self._buffer.get()
+            if m is None:
+                return
+
+            try:
+                if self._metrics is not None:
+                    with self._metrics.track_in_flight():
+                        await self._handle_one(m)
+                else:
+                    await self._handle_one(m)
+                # cancelada no fim do prazo de drenagem, fica em _active para ser devolvida
+                self._active.pop(m.receipt_handle, None)
+            finally:
+                async with self._slots:
+                    self._in_flight -= 1
+                    self._slots.notify_all()
+
+    async def _handle_one(self, m: QueueMessage) -> None:
+        started = time.time()
+        outcome = "unhandled_error"
+        handed_off = False
+        try:
+            result = await self._use_case.aexecute(m.body, message_id=m.message_id)
+            if self._writer is not None:
+                # o ack sai do writer depois da gravação durável do resultado;
+                # o lease fica com ele até lá
+                self._writer.submit(m.receipt_handle, m.message_id, result)
+                handed_off = True
+            else:
+                self._acker.ack(m.receipt_handle)
+            outcome = "processed"
+            log.info(
+                "message_processed",
+                message_id=m.message_id,
+                correlation_id=result.correlation_id,
+                intent=result.intent,
+                output_len=len(result.output_text or ""),
+                elapsed_ms=int((time.time() - started) * 1000),
+            )
+
+        except PermanentError as e:
+            self._acker.ack(m.receipt_handle)
+            outcome = "permanent_error"
+            log.warning("message_permanent_error", message_id=m.message_id, error=str(e))
+
+        except CircuitOpenError as e:
+            await self._release_to_queue(m, e.retry_after_seconds)
+            outcome = "circuit_open"
+            log.warning("message_circuit_open", message_id=m.message_id, error=str(e))
+
+        except TransientError as e:
+            outcome = "transient_error"
+            log.warning("message_transient_error", message_id=m.message_id, error=str(e))
+
+        except Exception as e:
+            log.exception("message_unhandled_error", message_id=m.message_id, error=str(e))
+
+        except asyncio.CancelledError:
+            outcome = "released"
+            raise
+
+        finally:
+            if self._leases is not None and not handed_off:
+                self._leases.release(m.receipt_handle)
+            if self._metrics is not None:
+                self._observe(m, outcome, started)
+
+    async def _release_to_queue(self, m: QueueMessage, delay_seconds: float) -> None:
+        """Devolve a mensagem ao SQS já, visível de novo quando o circuito aceitar teste."""
+        if self._leases is not None:
+            self._leases.release(m.receipt_handle)
+        try:
+            await self._queue.achange_visibility(m.receipt_handle, max(1, math.ceil(delay_seconds)))
+        except Exception as e:
+            log.warning("message_release_failed", message_id=m.message_id, error=str(e))
+
+    async def _release_unfinished(self, messages: List[QueueMessage]) -> None:
+        """Devolve ao SQS (visibilidade 0) o que não terminou dentro do prazo de drenagem."""
+        if not messages:
+            return
+        if self._leases is not None:
+            # sem isso o heartbeat estenderia de novo a visibilidade
+            for m in messages:
+                self._leases.release(m.receipt_handle)
+        handles = [m.receipt_handle for m in messages]
+        try:
+            failed = await asyncio.to_thread(self._queue.change_visibility_batch, handles, 0)
+        except Exception as e:
+            log.warning("worker_release_failed", count=len(messages), error=str(e))
+            return
+        log.info("worker_released_unfinished", count=len(messages), failed=len(failed))
+
+    def _observe(self, m: QueueMessage, outcome: str, started: float) -> None:
+        now = time.time()
+        acked = outcome in ("processed", "permanent_error")
+        self._metrics.observe_message(
+            outcome,
+            processing_seconds=now - started,
+            receive_to_ack_seconds=now - m.sent_at if acked and m.sent_at is not None else None,
+        )
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import structlog
+
+from app.settings.settings import settings
+from app.logging import configure_logging
+from app.bootstrap import build_pipeline, build_registry
+from app.application.services.checkpoint import CheckpointStore
+from app.application.use_cases.process_batch import ProcessBatch, ProviderBatch
+
+log = structlog.get_logger()
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.batch_cli",
+        description="Processa um JSONL (um corpo de mensagem por linha) fora do SQS.",
+    )
+    parser.add_argument("input", help="arquivo JSONL de entrada ou '-' para stdin")
+    parser.add_argument("-o", "--output", required=True, help="arquivo JSONL de saída ou '-' para stdout")
+    parser.add_argument("--checkpoint", help="arquivo de checkpoint (padrão: <output>.checkpoint.json)")
+    parser.add_argument("--workers", type=int, default=settings.batch_workers)
+    parser.add_argument("--max-in-flight", type=int, default=settings.batch_max_in_flight)
+    parser.add_argument(
+        "--provider-batch",
+        choices=("openai", "local"),
+        help="envia as requisições pela Batch API (openai) ou pelo dublê local",
+    )
+    parser.add_argument(
+        "--batch-prompts",
+        default="classifier-agent",
+        help="prompts executados na modalidade provider-batch, separados por vírgula",
+    )
+    parser.add_argument("--work-dir", help="diretório dos arquivos da Batch API (padrão: <output>.batch)")
+    parser.add_argument("--poll-interval", type=float, default=settings.batch_poll_interval_seconds)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    configure_logging(settings.log_level)
+
+    if args.provider_batch and (args.input == "-" or args.output == "-"):
+        log.error("batch_invalid_args", error="--provider-batch requires file input and output")
+        return 2
+
+    registry = build_registry()
+    pipeline = build_pipeline(registry)
+
+    # stdout sem checkpoint: não dá para truncar nem retomar
+    store = None
+    if args.output != "-":
+        store = CheckpointStore(args.checkpoint or f"{args.output}.checkpoint.json")
+
+    try:
+        if args.provider_batch:
+            cp = _run_provider_batch(args, pipeline.llm, store)
+        else:
+            cp = _run_streaming(args, pipeline.use_case, store)
+    finally:
+        pipeline.close()
+        log.info("batch_stopped", **pipeline.stats())
+
+    return 0 if cp.done else 1
+
+
+def _run_streaming(args, use_case, store):
+    batch = ProcessBatch(
+        use_case,
+        workers=args.workers,
+        max_in_flight=args.max_in_flight,
+        checkpoint_every=settings.batch_checkpoint_every,
+    )
+    source = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+    if args.output == "-":
+        sink = sys.stdout.buffer
+    else:
+        # "r+b" preserva o que já foi escrito para a retomada truncar no offset
+        sink = open(args.output, "r+b" if os.path.exists(args.output) else "w+b")
+    try:
+        return batch.run(source, sink, store, source_name=Path(args.input).name if args.input != "-" else "stdin")
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if sink is not sys.stdout.buffer:
+            sink.close()
+
+
+def _run_provider_batch(args, llm, store):
+    work_dir = Path(args.work_dir or f"{args.output}.batch")
+    if args.provider_batch == "openai":
+        from app.infrastructure.batch.openai_batch import OpenAIBatchProvider
+
+        provider = OpenAIBatchProvider(api_key=settings.openai_api_key, timeout_seconds=settings.default_timeout_seconds)
+    else:
+        from app.infrastructure.batch.local_batch import LocalBatchProvider
+
+        provider = LocalBatchProvider(llm, work_dir, workers=args.workers, max_in_flight=args.max_in_flight)
+
+    batch = ProviderBatch(
+        llm,
+        provider,
+        prompt_ids=[p.strip() for p in args.batch_prompts.split(",") if p.strip()],
+        work_dir=work_dir,
+        poll_interval_seconds=args.poll_interval,
+    )
+    with open(args.output, "r+b" if os.path.exists(args.output) else "w+b") as sink:
+        return batch.run(args.input, sink, store)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
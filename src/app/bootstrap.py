@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from app.settings.settings import settings
+from app.prompts.registry import PromptRegistry
+from app.infrastructure.cache.llm_cache import LRUTTLCache, SqliteCache, TieredCache
+from app.infrastructure.idempotency.sqlite_store import SqliteIdempotencyStore
+from app.infrastructure.sinks.jsonl_sink import JsonlResultSink
+from app.infrastructure.sinks.sqs_sink import SqsResultSink
+from app.infrastructure.embeddings.hashing_embeddings import HashingEmbeddings
+from app.infrastructure.embeddings.openai_embeddings import OpenAIEmbeddingsAdapter
+from app.infrastructure.vector.memmap_label_index import MemmapLabelIndex
+from app.infrastructure.vector.numpy_index import NumpyVectorIndex
+from app.infrastructure.llm.opeanai_provider import OpenAILangChainAdapter
+from app.infrastructure.llm.hedging import RequestHedger
+from app.infrastructure.llm.micro_batcher import MicroBatcher
+from app.infrastructure.llm.circuit_breaker import CircuitBreaker, RetryBudget
+from app.infrastructure.llm.rate_limiter import AdaptiveRateLimiter
+from app.infrastructure.llm.tokens import LocalTokenizer
+from app.application.ports.metrics import MetricsPort
+from app.application.ports.result_sink import ResultSinkPort
+from app.application.use_cases.process_message import ProcessMessage
+from app.application.services.cascade import CascadeRouter
+from app.application.services.idempotency import IdempotencyGuard
+from app.application.services.input_preprocessor import InputPreprocessor
+from app.application.services.knn_classifier import KnnClassifier
+from app.application.services.semantic_dedupe import SemanticDeduper
+
+
+@dataclass
+class Pipeline:
+    """Tudo o que o worker do SQS e o CLI de batch compartilham."""
+    registry: PromptRegistry
+    llm: OpenAILangChainAdapter
+    use_case: ProcessMessage
+    deduper: SemanticDeduper | None = None
+    knn: KnnClassifier | None = None
+    cascade: CascadeRouter | None = None
+    idempotency: IdempotencyGuard | None = None
+
+    async def aclose(self) -> None:
+        """Recursos presos ao event loop (httpx async); antes de sair do asyncio.run."""
+        await self.llm.aclose()
+
+    def close(self) -> None:
+        self.registry.stop_watching()
+        self.llm.close()
+        if self.idempotency is not None:
+            self.idempotency.close()
+        if self.deduper is not None:
+            self.deduper.close()
+        if self.knn is not None:
+            self.knn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "knn": self.knn.stats() if self.knn is not None else None,
+            "cascade": self.cascade.stats() if self.cascade is not None else None,
+            "llm_cache": self.llm.cache_stats(),
+            "llm_pool": self.llm.pool_stats(),
+            "llm_rate_limit": self.llm.rate_limit_stats(),
+            "llm_resilience": self.llm.resilience_stats(),
+            "llm_repair": self.llm.repair_stats(),
+            "llm_micro_batch": self.llm.micro_batch_stats(),
+            "llm_hedge": self.llm.hedge_stats(),
+            "idempotency": self.idempotency.stats() if self.idempotency is not None else None,
+        }
+
+
+def build_registry() -> PromptRegistry:
+    registry = PromptRegistry(prompts_dir=settings.prompts_dir)
+    registry.load()
+    if settings.prompts_hot_reload:
+        registry.start_watching(settings.prompts_reload_interval_seconds)
+    return registry
+
+
+def build_llm(registry: PromptRegistry, metrics: MetricsPort | None = None) -> OpenAILangChainAdapter:
+    cache = None
+    if settings.llm_cache_enabled:
+        cache = TieredCache(
+            local=LRUTTLCache(
+                max_entries=settings.llm_cache_max_entries,
+                ttl_seconds=settings.llm_cache_ttl_seconds,
+            ),
+            shared=(
+                SqliteCache(settings.llm_cache_sqlite_path, ttl_seconds=settings.llm_cache_shared_ttl_seconds)
+                if settings.llm_cache_sqlite_path
+                else None
+            ),
+        )
+
+    rate_limiter = None
+    if settings.openai_rate_limit_enabled:
+        rate_limiter = AdaptiveRateLimiter(
+            requests_per_minute=settings.openai_rpm_limit,
+            tokens_per_minute=settings.openai_tpm_limit,
+            max_concurrency=settings.openai_max_concurrency,
+            min_concurrency=settings.openai_min_concurrency,
+        )
+
+    return OpenAILangChainAdapter(
+        registry=registry,
+        api_key=settings.openai_api_key,
+        default_model=settings.openai_default_model,
+        default_temperature=settings.openai_default_temperature,
+        timeout_seconds=settings.default_timeout_seconds,
+        max_repair_attemps=settings.default_max_repair_attemps,
+        cache=cache,
+        max_connections=settings.openai_max_connections,
+        max_keepalive_connections=settings.openai_max_keepalive_connections,
+        keepalive_expiry_seconds=settings.openai_keepalive_expiry_seconds,
+        metrics=metrics,
+        rate_limiter=rate_limiter,
+        circuit_breaker=(
+            CircuitBreaker(
+                failure_threshold=settings.openai_breaker_failure_threshold,
+                recovery_seconds=settings.openai_breaker_recovery_seconds,
+                half_open_max_calls=settings.openai_breaker_half_open_max_calls,
+            )
+            if settings.openai_breaker_enabled
+            else None
+        ),
+        retry_budget=RetryBudget(
+            ratio=settings.openai_retry_budget_ratio,
+            min_per_second=settings.openai_retry_budget_min_per_second,
+        ),
+        streaming=settings.openai_streaming_enabled,
+        micro_batcher=(
+            MicroBatcher(
+                max_batch_size=settings.openai_micro_batch_max_size,
+                window_seconds=settings.openai_micro_batch_window_ms / 1000,
+            )
+            if settings.openai_micro_batch_enabled
+            else None
+        ),
+        hedger=(
+            RequestHedger(
+                quantile=settings.openai_hedge_quantile,
+                min_delay_seconds=settings.openai_hedge_min_delay_seconds,
+                min_samples=settings.openai_hedge_min_samples,
+                budget_ratio=settings.openai_hedge_budget_ratio,
+                budget_min_per_second=settings.openai_hedge_budget_min_per_second,
+                max_workers=settings.openai_hedge_max_workers,
+            )
+            if settings.openai_hedge_enabled
+            else None
+        ),
+    )
+
+
+def build_pipeline(registry: PromptRegistry, metrics: MetricsPort | None = None) -> Pipeline:
+    llm = build_llm(registry, metrics)
+    deduper = _build_deduper() if settings.dedupe_semantic_enabled else None
+    knn = _build_knn_classifier() if settings.classifier_knn_enabled else None
+    cascade = None
+    if settings.graph_cascade_enabled:
+        # thresholds no bloco `routing` do classifier.yaml, relidos a cada hot reload
+        cascade = CascadeRouter(lambda: registry.get("classifier-agent").routing)
+    idempotency = _build_idempotency() if settings.idempotency_enabled else None
+    preprocessor = _build_preprocessor(registry) if settings.preprocess_enabled else None
+    use_case = ProcessMessage(
+        llm,
+        graph_topology=settings.graph_topology,
+        deduper=deduper,
+        knn=knn,
+        cascade=cascade,
+        metrics=metrics,
+        idempotency=idempotency,
+        preprocessor=preprocessor,
+    )
+    return Pipeline(
+        registry=registry,
+        llm=llm,
+        use_case=use_case,
+        deduper=deduper,
+        knn=knn,
+        cascade=cascade,
+        idempotency=idempotency,
+    )
+
+
+def build_result_sink() -> ResultSinkPort | None:
+    if settings.result_sink == "none":
+        return None
+    if settings.result_sink == "jsonl":
+        return JsonlResultSink(settings.result_sink_jsonl_path)
+    if settings.result_sink == "sqs":
+        return SqsResultSink(region=settings.aws_region, queue_url=settings.result_sink_sqs_queue_url)
+    if settings.result_sink == "postgres":
+        # import tardio: psycopg só é necessário com o sink no Postgres
+        from app.infrastructure.sinks.pg_sink import PgResultSink
+
+        return PgResultSink(settings.pg_database_url, table=settings.result_sink_pg_table)
+    raise ValueError(f"Unknown result sink: {settings.result_sink}, expected none | jsonl | sqs | postgres")
+
+
+def _build_idempotency() -> IdempotencyGuard:
+    if settings.idempotency_store == "sqlite":
+        store = SqliteIdempotencyStore(settings.idempotency_sqlite_path, table=settings.idempotency_table)
+    else:
+        # import tardio: psycopg só é necessário com o store no Postgres
+        from app.infrastructure.idempotency.pg_store import PgIdempotencyStore
+
+        store = PgIdempotencyStore(settings.pg_database_url, table=settings.idempotency_table)
+
+    return IdempotencyGuard(
+        store=store,
+        local=LRUTTLCache(
+            max_entries=settings.idempotency_local_max_entries,
+            ttl_seconds=settings.idempotency_ttl_seconds,
+        ),
+        ttl_seconds=settings.idempotency_ttl_seconds,
+        in_progress_seconds=settings.idempotency_in_progress_seconds,
+    )
+
+
+def _build_preprocessor(registry: PromptRegistry) -> InputPreprocessor:
+    def budgets() -> Dict[str, int]:
+        # `max_input_tokens` no bloco model do YAML; relido a cada hot reload
+        return {
+            prompt_id: int(spec.model["max_input_tokens"])
+            for prompt_id, spec in registry.specs().items()
+            if spec.model.get("max_input_tokens")
+        }
+
+    return InputPreprocessor(
+        LocalTokenizer(settings.openai_default_model),
+        budgets=budgets,
+        default_max_tokens=settings.preprocess_max_input_tokens,
+        head_ratio=settings.preprocess_head_ratio,
+        strip_reply_history=settings.preprocess_strip_reply_history,
+    )
+
+
+def _build_embeddings(provider: str):
+    if provider == "hashing":
+        return HashingEmbeddings()
+    return OpenAIEmbeddingsAdapter(
+        api_key=settings.openai_api_key,
+        model=settings.openai_default_embedding_model,
+        timeout_seconds=settings.default_timeout_seconds,
+    )
+
+
+def _build_deduper() -> SemanticDeduper:
+    embeddings = _build_embeddings(settings.dedupe_embeddings_provider)
+
+    if settings.dedupe_vector_index == "numpy":
+        index = NumpyVectorIndex()
+    else:
+        # import tardio: psycopg só é necessário com o índice no Postgres
+        from app.infrastructure.vector.pgvector_index import PgVectorIndex
+
+        index = PgVectorIndex(
+            database_url=settings.pg_database_url,
+            table=settings.pg_vector_collection_name,
+            index_type=settings.pg_vector_index_type,
+            pool_max_size=settings.pg_vector_pool_max_size,
+        )
+
+    return SemanticDeduper(
+        embeddings=embeddings,
+        index=index,
+        threshold=settings.dedupe_similarity_threshold,
+        write_batch_size=settings.dedupe_write_batch_size,
+    )
+
+
+def _build_knn_classifier() -> KnnClassifier:
+    return KnnClassifier(
+        embeddings=_build_embeddings(settings.classifier_knn_embeddings_provider),
+        index=MemmapLabelIndex(settings.classifier_knn_index_dir),
+        k=settings.classifier_knn_k,
+        threshold=settings.classifier_knn_threshold,
+        min_similarity=settings.classifier_knn_min_similarity,
+        min_neighbors=settings.classifier_knn_min_neighbors,
+        learn_min_confidence=settings.classifier_knn_learn_min_confidence,
+        write_batch_size=settings.classifier_knn_write_batch_size,
+    )
@@ -3,4 +3,20 @@ class PermanentError(Exception):
 
 
 class TransientError(Exception):
-    """Retryable; external dependency or temporary issue."""
\ No newline at end of file
+    """Retryable; external dependency or temporary issue."""
+
+
+class RateLimitedError(TransientError):
+    """Provider returned 429; the rate limiter handles the backoff."""
+
+
+class CircuitOpenError(TransientError):
+    """Circuit is open for the dependency; fail fast without calling it."""
+
+    def __init__(self, message: str, retry_after_seconds: float = 0.0):
+        super().__init__(message)
+        self.retry_after_seconds = retry_after_seconds
+
+
+class DuplicateInProgressError(TransientError):
+    """Another worker holds the same message; let it come back after the visibility timeout."""
@@ -1,7 +1,10 @@
+import asyncio
 import boto3
 from typing import List
 from app.application.ports.queue import QueuePort, QueueMessage
 
+SQS_BATCH_LIMIT = 10
+
 
 class SqsQueueAdapter(QueuePort):
     def __init__(self, region: str, queue_url: str):
@@ -36,9 +39,46 @@ class SqsQueueAdapter(QueuePort):
     def delete(self, receipt_handle: str) -> None:
         self._client.delete_message(QueueUrl=self._queue_url, ReceiptHandle=receipt_handle)
 
+    def delete_batch(self, receipt_handles: List[str]) -> List[str]:
+        failed: List[str] = []
+        for start in range(0, len(receipt_handles), SQS_BATCH_LIMIT):
+            chunk = receipt_handles[start:start + SQS_BATCH_LIMIT]
+            resp = self._client.delete_message_batch(
+                QueueUrl=self._queue_url,
+                Entries=[{"Id": str(i), "ReceiptHandle": r} for i, r in enumerate(chunk)],
+            )
+            for f in resp.get("Failed", []):
+                failed.append(chunk[int(f["Id"])])
+        return failed
+
     def change_visibility(self, receipt_handle: str, timeout_seconds: int) -> None:
         self._client.change_message_visibility(
             QueueUrl=self._queue_url,
             ReceiptHandle=receipt_handle,
             VisibilityTimeout=timeout_seconds,
         )
+
+    def change_visibility_batch(self, receipt_handles: List[str], timeout_seconds: int) -> List[str]:
+        failed: List[str] = []
+        for start in range(0, len(receipt_handles), SQS_BATCH_LIMIT):
+            chunk = receipt_handles[start:start + SQS_BATCH_LIMIT]
+            resp = self._client.change_message_visibility_batch(
+                QueueUrl=self._queue_url,
+                Entries=[
+                    {"Id": str(i), "ReceiptHandle": r, "VisibilityTimeout": timeout_seconds}
+                    for i, r in enumerate(chunk)
+                ],
+            )
+            for f in resp.get("Failed", []):
+                failed.append(chunk[int(f["Id"])])
+        return failed
+
+    # boto3 é síncrono: as variantes async delegam para uma thread.
+    async def areceive(self, max_messages: int, wait_time_seconds: int, visibility_timeout: int) -> List[QueueMessage]:
+        return await asyncio.to_thread(self.receive, max_messages, wait_time_seconds, visibility_timeout)
+
+    async def adelete(self, receipt_handle: str) -> None:
+        await asyncio.to_thread(self.delete, receipt_handle)
+
+    async def achange_visibility(self, receipt_handle: str, timeout_seconds: int) -> None:
+        await asyncio.to_thread(self.change_visibility, receipt_handle, timeout_seconds)
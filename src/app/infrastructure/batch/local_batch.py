@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import json
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Deque, Dict
+
+from app.application.ports.batch import BatchProviderPort
+from app.application.ports.llm import LLMPort
+
+
+class LocalBatchProvider(BatchProviderPort):
+    """
+    Dublê da Batch API para testes: executa o arquivo de requisições pelo
+    próprio adapter (chamadas síncronas) e grava a saída no mesmo formato,
+    então o fluxo submit/poll/download é exercitado sem esperar a janela
+    de 24h do provedor.
+    """
+
+    def __init__(self, llm: LLMPort, work_dir: str | Path, workers: int = 4, max_in_flight: int | None = None):
+        self._llm = llm
+        self._dir = Path(work_dir)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._workers = workers
+        self._max_in_flight = max(max_in_flight or 4 * workers, workers)
+        self._status: Dict[str, str] = {}
+
+    def submit(self, requests_path: Path) -> str:
+        batch_id = f"local_batch_{uuid.uuid4().hex[:12]}"
+        output = self._dir / f"{batch_id}.output.jsonl"
+
+        def _lines():
+            with open(requests_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+        def _write(future: Future) -> None:
+            out.write(json.dumps(future.result(), ensure_ascii=False) + "\n")
+
+        # janela limitada como no ProcessBatch: pool.map enfileiraria o arquivo inteiro
+        window: Deque[Future] = deque()
+        with ThreadPoolExecutor(max_workers=self._workers) as pool, open(output, "w", encoding="utf-8") as out:
+            for request in _lines():
+                window.append(pool.submit(self._llm.complete_batch_request, request))
+                while len(window) >= self._max_in_flight or (window and window[0].done()):
+                    _write(window.popleft())
+            while window:
+                _write(window.popleft())
+
+        self._status[batch_id] = "completed"
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        if batch_id in self._status:
+            return self._status[batch_id]
+        # retomada em outro processo: a saída já gravada basta
+        return "completed" if (self._dir / f"{batch_id}.output.jsonl").exists() else "failed"
+
+    def download(self, batch_id: str, output_path: Path) -> None:
+        Path(output_path).write_bytes((self._dir / f"{batch_id}.output.jsonl").read_bytes())
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import openai
+
+from app.application.ports.batch import BatchProviderPort
+from app.domain.errors import PermanentError, TransientError
+
+
+class OpenAIBatchProvider(BatchProviderPort):
+    """Batch API da OpenAI: upload do JSONL, criação do batch e download da saída."""
+
+    def __init__(self, api_key: str, completion_window: str = "24h", timeout_seconds: int = 60):
+        self._client = openai.OpenAI(api_key=api_key, timeout=timeout_seconds)
+        self._completion_window = completion_window
+
+    def submit(self, requests_path: Path) -> str:
+        try:
+            with open(requests_path, "rb") as f:
+                uploaded = self._client.files.create(file=f, purpose="batch")
+            batch = self._client.batches.create(
+                input_file_id=uploaded.id,
+                endpoint="/v1/chat/completions",
+                completion_window=self._completion_window,
+            )
+        except openai.APIError as e:
+            raise TransientError(f"openai_batch_submit_error: {e}") from e
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        try:
+            return self._client.batches.retrieve(batch_id).status
+        except openai.APIError as e:
+            raise TransientError(f"openai_batch_status_error: {e}") from e
+
+    def download(self, batch_id: str, output_path: Path) -> None:
+        try:
+            batch = self._client.batches.retrieve(batch_id)
+            if not batch.output_file_id:
+                raise PermanentError(f"batch {batch_id} has no output file (status={batch.status})")
+            content = self._client.files.content(batch.output_file_id)
+            Path(output_path).write_bytes(content.read())
+        except openai.APIError as e:
+            raise TransientError(f"openai_batch_download_error: {e}") from e
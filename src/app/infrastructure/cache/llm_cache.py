@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import structlog
+
+from app.application.ports.cache import CachePort
+
+log = structlog.get_logger()
+
+
+class LRUTTLCache(CachePort):
+    """Cache em processo com despejo por tamanho (LRU) e por idade (TTL)."""
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 3600):
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self._misses += 1
+                return None
+
+            expires_at, value = item
+            if expires_at <= now:
+                del self._data[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self._ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self._max_entries:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+
+class SqliteCache(CachePort):
+    """
+    Tier compartilhado em disco. Vários processos do mesmo host podem
+    apontar para o mesmo arquivo; os valores são gravados como JSON.
+    """
+
+    def __init__(self, path: str | Path, ttl_seconds: float = 86400):
+        self._ttl_seconds = ttl_seconds
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+
+            value, expires_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, time.time() + self._ttl_seconds),
+            )
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+        return cur.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "expirations": self._expirations,
+        }
+
+
+class TieredCache(CachePort):
+    """LRU local na frente de um tier compartilhado opcional (promove em hit)."""
+
+    def __init__(self, local: LRUTTLCache, shared: CachePort | None = None):
+        self._local = local
+        self._shared = shared
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._local.get(key)
+        if value is not None or self._shared is None:
+            return value
+
+        try:
+            value = self._shared.get(key)
+        except Exception as e:
+            log.warning("llm_cache_shared_error", op="get", error=str(e))
+            return None
+
+        if value is not None:
+            self._local.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._local.set(key, value)
+        if self._shared is None:
+            return
+        try:
+            self._shared.set(key, value)
+        except Exception as e:
+            log.warning("llm_cache_shared_error", op="set", error=str(e))
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"local": self._local.stats()}
+        if self._shared is not None:
+            out["shared"] = self._shared.stats()
+        return out
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import re
+import zlib
+from typing import List
+
+import numpy as np
+
+from app.application.ports.embeddings import EmbeddingsPort
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbeddings(EmbeddingsPort):
+    """
+    Stand-in local e determinístico para embeddings: feature hashing de
+    palavras e trigramas de caracteres, normalizado (L2). Textos quase
+    idênticos ficam com cosseno alto, o que basta para testar a etapa de
+    dedupe sem rede.
+    """
+
+    def __init__(self, dimensions: int = 256):
+        self._dimensions = dimensions
+
+    @property
+    def dimensions(self) -> int:
+        return self._dimensions
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed_one(t).tolist() for t in texts]
+
+    def _embed_one(self, text: str) -> np.ndarray:
+        vec = np.zeros(self._dimensions, dtype=np.float32)
+        normalized = " ".join(_WORD.findall(text.lower()))
+
+        features = normalized.split()
+        padded = f" {normalized} "
+        features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+        for f in features:
+            h = zlib.crc32(f.encode("utf-8"))
+            # bit extra do hash decide o sinal para reduzir colisões enviesadas
+            vec[h % self._dimensions] += 1.0 if (h >> 31) & 1 else -1.0
+
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from typing import List
+
+from langchain_openai import OpenAIEmbeddings
+
+from app.application.ports.embeddings import EmbeddingsPort
+from app.domain.errors import TransientError
+
+
+class OpenAIEmbeddingsAdapter(EmbeddingsPort):
+    def __init__(self, api_key: str, model: str, timeout_seconds: int = 30):
+        self._client = OpenAIEmbeddings(api_key=api_key, model=model, timeout=timeout_seconds)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        try:
+            return self._client.embed_documents(texts)
+        except Exception as e:
+            raise TransientError(f"openai_embeddings_error: {e}") from e
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+import threading
+from typing import Any, Dict, Optional
+
+import psycopg
+from psycopg import sql
+
+from app.application.ports.idempotency import COMPLETED, IN_PROGRESS, IdempotencyRecord, IdempotencyStorePort
+from app.domain.errors import TransientError
+from app.infrastructure.postgres import normalize_dsn
+
+
+class PgIdempotencyStore(IdempotencyStorePort):
+    """
+    Store compartilhado no Postgres. O claim é um único upsert condicional:
+    só sobrescreve a linha existente quando ela já expirou, e o RETURNING
+    diz se esta chamada ficou com a chave.
+    """
+
+    def __init__(self, database_url: str, table: str = "idempotency_keys"):
+        self._table = sql.Identifier(table)
+        self._conn = psycopg.connect(normalize_dsn(database_url), autocommit=True)
+        self._lock = threading.Lock()
+        self._conn.execute(
+            sql.SQL(
+                "CREATE TABLE IF NOT EXISTS {t} ("
+                "key text PRIMARY KEY, state text NOT NULL, result jsonb, expires_at timestamptz NOT NULL)"
+            ).format(t=self._table)
+        )
+
+    def claim(self, key: str, lease_seconds: float) -> Optional[IdempotencyRecord]:
+        upsert = sql.SQL(
+            "INSERT INTO {t} AS cur (key, state, result, expires_at) "
+            "VALUES (%(k)s, %(s)s, NULL, now() + make_interval(secs => %(lease)s)) "
+            "ON CONFLICT (key) DO UPDATE SET state = EXCLUDED.state, result = NULL, expires_at = EXCLUDED.expires_at "
+            "WHERE cur.expires_at <= now() "
+            "RETURNING key"
+        ).format(t=self._table)
+        select = sql.SQL("SELECT state, result FROM {t} WHERE key = %(k)s").format(t=self._table)
+
+        try:
+            with self._lock, self._conn.cursor() as cur:
+                cur.execute(upsert, {"k": key, "s": IN_PROGRESS, "lease": lease_seconds})
+                if cur.fetchone() is not None:
+                    return None
+                cur.execute(select, {"k": key})
+                row = cur.fetchone()
+        except psycopg.OperationalError as e:
+            raise TransientError(f"idempotency_claim_error: {e}") from e
+
+        if row is None:
+            # apagada (release) entre as duas queries: trata como chave livre
+            return None
+        return IdempotencyRecord(key=key, state=row[0], result=row[1])
+
+    def complete(self, key: str, result: Dict[str, Any], ttl_seconds: float) -> None:
+        query = sql.SQL(
+            "INSERT INTO {t} (key, state, result, expires_at) "
+            "VALUES (%(k)s, %(s)s, %(r)s::jsonb, now() + make_interval(secs => %(ttl)s)) "
+            "ON CONFLICT (key) DO UPDATE SET state = EXCLUDED.state, result = EXCLUDED.result, "
+            "expires_at = EXCLUDED.expires_at"
+        ).format(t=self._table)
+        payload = json.dumps(result, ensure_ascii=False)
+        try:
+            with self._lock:
+                self._conn.execute(query, {"k": key, "s": COMPLETED, "r": payload, "ttl": ttl_seconds})
+        except psycopg.OperationalError as e:
+            raise TransientError(f"idempotency_complete_error: {e}") from e
+
+    def release(self, key: str) -> None:
+        query = sql.SQL("DELETE FROM {t} WHERE key = %(k)s AND state = %(s)s").format(t=self._table)
+        try:
+            with self._lock:
+                self._conn.execute(query, {"k": key, "s": IN_PROGRESS})
+        except psycopg.OperationalError as e:
+            raise TransientError(f"idempotency_release_error: {e}") from e
+
+    def purge_expired(self) -> int:
+        query = sql.SQL("DELETE FROM {t} WHERE expires_at <= now()").format(t=self._table)
+        with self._lock:
+            cur = self._conn.execute(query)
+        return cur.rowcount
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.application.ports.idempotency import COMPLETED, IN_PROGRESS, IdempotencyRecord, IdempotencyStorePort
+
+
+class SqliteIdempotencyStore(IdempotencyStorePort):
+    """
+    Store local em SQLite. Processos do mesmo host podem compartilhar o
+    arquivo: o claim roda em BEGIN IMMEDIATE, então só um deles toma a chave.
+    """
+
+    def __init__(self, path: str | Path, table: str = "idempotency_keys"):
+        self._table = table
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f'CREATE TABLE IF NOT EXISTS "{table}" '
+            "(key TEXT PRIMARY KEY, state TEXT NOT NULL, result TEXT, expires_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def claim(self, key: str, lease_seconds: float) -> Optional[IdempotencyRecord]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    f'SELECT state, result, expires_at FROM "{self._table}" WHERE key = ?', (key,)
+                ).fetchone()
+                if row is not None and row[2] > now:
+                    self._conn.execute("COMMIT")
+                    state, result, _ = row
+                    return IdempotencyRecord(key=key, state=state, result=json.loads(result) if result else None)
+
+                self._conn.execute(
+                    f'INSERT OR REPLACE INTO "{self._table}" (key, state, result, expires_at) VALUES (?, ?, NULL, ?)',
+                    (key, IN_PROGRESS, now + lease_seconds),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return None
+
+    def complete(self, key: str, result: Dict[str, Any], ttl_seconds: float) -> None:
+        payload = json.dumps(result, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                f'INSERT OR REPLACE INTO "{self._table}" (key, state, result, expires_at) VALUES (?, ?, ?, ?)',
+                (key, COMPLETED, payload, time.time() + ttl_seconds),
+            )
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f'DELETE FROM "{self._table}" WHERE key = ? AND state = ?', (key, IN_PROGRESS))
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cur = self._conn.execute(f'DELETE FROM "{self._table}" WHERE expires_at <= ?', (time.time(),))
+        return cur.rowcount
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict
+
+import structlog
+
+from app.domain.errors import CircuitOpenError
+
+log = structlog.get_logger()
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass
+class _Circuit:
+    state: str = CLOSED
+    failures: int = 0
+    opened_at: float = 0.0
+    trials: int = 0
+    opened_total: int = 0
+    rejected_total: int = 0
+
+
+class CircuitBreaker:
+    """
+    Um circuito por chave (o modelo). `failure_threshold` falhas seguidas de
+    infraestrutura abrem o circuito; depois de `recovery_seconds` até
+    `half_open_max_calls` chamadas de teste passam: sucesso fecha, falha
+    reabre. Enquanto aberto, `before_call` levanta CircuitOpenError.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_seconds: float = 30.0, half_open_max_calls: int = 1):
+        self._failure_threshold = failure_threshold
+        self._recovery_seconds = recovery_seconds
+        self._half_open_max_calls = half_open_max_calls
+        self._circuits: Dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def before_call(self, key: str) -> None:
+        with self._lock:
+            c = self._circuits.setdefault(key, _Circuit())
+            if c.state == CLOSED:
+                return
+
+            now = time.monotonic()
+            if c.state == OPEN:
+                remaining = c.opened_at + self._recovery_seconds - now
+                if remaining > 0:
+                    c.rejected_total += 1
+                    raise CircuitOpenError(f"circuit_open: {key}", retry_after_seconds=remaining)
+                c.state, c.trials = HALF_OPEN, 0
+                log.info("circuit_half_open", key=key)
+
+            if c.trials >= self._half_open_max_calls:
+                c.rejected_total += 1
+                raise CircuitOpenError(f"circuit_half_open: {key}", retry_after_seconds=self._recovery_seconds)
+            c.trials += 1
+
+    def record_success(self, key: str) -> None:
+        with self._lock:
+            c = self._circuits.setdefault(key, _Circuit())
+            if c.state != CLOSED:
+                log.info("circuit_closed", key=key)
+            c.state, c.failures, c.trials = CLOSED, 0, 0
+
+    def record_failure(self, key: str) -> None:
+        with self._lock:
+            c = self._circuits.setdefault(key, _Circuit())
+            c.failures += 1
+            if c.state == HALF_OPEN or (c.state == CLOSED and c.failures >= self._failure_threshold):
+                c.state, c.opened_at, c.trials = OPEN, time.monotonic(), 0
+                c.opened_total += 1
+                log.warning("circuit_opened", key=key, failures=c.failures)
+
+    def record_ignored(self, key: str) -> None:
+        """Erro que não diz nada sobre a saúde do serviço (4xx): libera o slot de teste."""
+        with self._lock:
+            c = self._circuits.get(key)
+            if c is not None and c.state == HALF_OPEN:
+                c.trials = max(c.trials - 1, 0)
+
+    def open_seconds(self, key: str) -> float:
+        """Quanto falta para o circuito de `key` aceitar chamadas de teste (0 se fechado)."""
+        with self._lock:
+            c = self._circuits.get(key)
+            if c is None or c.state != OPEN:
+                return 0.0
+            return max(c.opened_at + self._recovery_seconds - time.monotonic(), 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                key: {
+                    "state": c.state,
+                    "failures": c.failures,
+                    "opened_total": c.opened_total,
+                    "rejected_total": c.rejected_total,
+                }
+                for key, c in self._circuits.items()
+            }
+
+
+class RetryBudget:
+    """
+    Orçamento global de retries: cada chamada deposita `ratio` e cada retry
+    saca 1, com um piso de `min_per_second` para tráfego baixo. Em pane
+    geral os retries param em ~ratio das chamadas em vez de multiplicá-las.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_per_second: float = 1.0, max_balance: float = 10.0):
+        self._ratio = ratio
+        self._min_per_second = min_per_second
+        self._max_balance = max_balance
+        self._balance = max_balance
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._spent_total = 0
+        self._denied_total = 0
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._balance = min(self._max_balance, self._balance + self._ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._balance = min(self._max_balance, self._balance + (now - self._updated) * self._min_per_second)
+            self._updated = now
+            if self._balance >= 1.0:
+                self._balance -= 1.0
+                self._spent_total += 1
+                return True
+            self._denied_total += 1
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "balance": round(self._balance, 2),
+                "spent_total": self._spent_total,
+                "denied_total": self._denied_total,
+            }
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import httpx
+import structlog
+from langchain_openai import ChatOpenAI
+
+from app.application.ports.metrics import MetricsPort
+
+log = structlog.get_logger()
+
+ClientKey = Tuple[str, float, Optional[int]]
+
+
+class ChatClientPool:
+    """
+    Um ChatOpenAI por (model, temperature, max_tokens), todos em cima do
+    mesmo pool httpx (sync e async). Evita abrir conexões e refazer o
+    handshake TLS a cada prompt com temperatura diferente da default.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        timeout_seconds: int = 30,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry_seconds: float = 30.0,
+        include_response_headers: bool = False,
+        metrics: MetricsPort | None = None,
+    ):
+        self._api_key = api_key
+        self._metrics = metrics
+        self._include_response_headers = include_response_headers
+        self._timeout_seconds = timeout_seconds
+        self._max_connections = max_connections
+
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_seconds,
+        )
+        self._http = httpx.Client(limits=limits, timeout=timeout_seconds)
+        self._http_async = httpx.AsyncClient(limits=limits, timeout=timeout_seconds)
+
+        self._clients: Dict[ClientKey, ChatOpenAI] = {}
+        self._lock = threading.Lock()
+
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._saturated_total = 0
+        self._requests_total = 0
+
+    def get(self, model: str, temperature: float, max_tokens: Optional[int] = None) -> ChatOpenAI:
+        key: ClientKey = (model, float(temperature), max_tokens)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = ChatOpenAI(
+                    api_key=self._api_key,
+                    model=model,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=self._timeout_seconds,
+                    # o retry é só do tenacity + RetryBudget: o SDK repetiria 429/5xx
+                    # por baixo, sem passar pelo orçamento, circuito e limiter
+                    max_retries=0,
+                    http_client=self._http,
+                    http_async_client=self._http_async,
+                    include_response_headers=self._include_response_headers,
+                )
+                self._clients[key] = client
+        return client
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Conta requisições em voo para medir a saturação do pool."""
+        with self._lock:
+            self._in_flight += 1
+            self._requests_total += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+            if self._in_flight > self._max_connections:
+                # acima do limite a requisição espera conexão livre no httpx
+                self._saturated_total += 1
+            in_flight = self._in_flight
+        self._publish(in_flight)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                in_flight = self._in_flight
+            self._publish(in_flight)
+
+    def _publish(self, in_flight: int) -> None:
+        if self._metrics is not None:
+            self._metrics.set_llm_pool(
+                in_use=min(in_flight, self._max_connections),
+                waiting=max(in_flight - self._max_connections, 0),
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "max_connections": self._max_connections,
+                "in_flight": self._in_flight,
+                "peak_in_flight": self._peak_in_flight,
+                "saturation": round(self._in_flight / self._max_connections, 3),
+                "saturated_total": self._saturated_total,
+                "requests_total": self._requests_total,
+            }
+
+    async def aclose(self) -> None:
+        """Fecha o cliente async no event loop em que as conexões foram abertas."""
+        await self._http_async.aclose()
+
+    def close(self) -> None:
+        self._http.close()
+        if self._http_async.is_closed:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # modo threads/CLI: o cliente async não abriu conexões, fecha num loop próprio
+            try:
+                asyncio.run(self._http_async.aclose())
+            except Exception as e:
+                log.warning("llm_pool_close_failed", error=str(e))
+        else:
+            log.warning("llm_pool_close_in_loop", hint="use aclose() inside the event loop")
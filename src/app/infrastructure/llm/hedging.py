@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+import structlog
+
+from app.infrastructure.llm.circuit_breaker import RetryBudget
+
+log = structlog.get_logger()
+
+T = TypeVar("T")
+
+
+class _PromptState:
+    def __init__(self, window_size: int, budget: RetryBudget):
+        self.latencies: Deque[float] = deque(maxlen=window_size)
+        self.budget = budget
+        self.calls = 0
+        self.fired = 0
+        self.won = 0
+        self.denied = 0
+
+
+class RequestHedger:
+    """
+    Dispara uma duplicata quando a chamada passa do quantil `quantile` da
+    latência observada para a mesma chave (prompt id) e fica com a primeira
+    resposta sem erro que passe em `accept` (quando dado). Até `min_samples`
+    observações não há hedge. Cada chave tem seu orçamento (`budget_ratio` das
+    chamadas, como o RetryBudget).
+
+    No asyncio a perdedora é cancelada de fato (a requisição HTTP é
+    abortada); no modo threads uma chamada síncrona não pode ser
+    interrompida: ela termina na sua thread e o resultado é descartado. A
+    original roda numa thread própria (quem chama só espera) e as duplicatas
+    num pool de `max_workers`.
+    """
+
+    def __init__(
+        self,
+        quantile: float = 0.95,
+        min_delay_seconds: float = 0.5,
+        min_samples: int = 20,
+        window_size: int = 200,
+        budget_ratio: float = 0.05,
+        budget_min_per_second: float = 0.1,
+        max_workers: int = 32,
+    ):
+        self._quantile = quantile
+        self._min_delay_seconds = min_delay_seconds
+        self._min_samples = min_samples
+        self._window_size = window_size
+        self._budget_ratio = budget_ratio
+        self._budget_min_per_second = budget_min_per_second
+        self._max_workers = max_workers
+
+        self._states: Dict[str, _PromptState] = {}
+        self._lock = threading.Lock()
+        self._pool: concurrent.futures.ThreadPoolExecutor | None = None
+
+    def run(
+        self,
+        key: str,
+        call: Callable[[], T],
+        on_event: Optional[Callable[[str], None]] = None,
+        accept: Optional[Callable[[T], bool]] = None,
+    ) -> T:
+        delay = self._start(key)
+        if delay is None:
+            return self._timed(key, call)
+
+        # a original não passa pelo pool: na fila dele o tempo de espera viraria
+        # latência e dispararia hedge à toa; o pool só leva as duplicatas
+        primary: concurrent.futures.Future = concurrent.futures.Future()
+        threading.Thread(target=self._run_primary, args=(primary, key, call), name="llm-hedge-primary", daemon=True).start()
+        try:
+            return primary.result(timeout=delay)
+        except concurrent.futures.TimeoutError:
+            pass
+
+        if not self._try_fire(key, delay, on_event):
+            return primary.result()
+
+        hedge = self._executor().submit(call)
+        pending = {primary: False, hedge: True}
+        error: BaseException | None = None
+        rejected: List[T] = []
+        while pending:
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for f in done:
+                is_hedge = pending.pop(f)
+                if f.exception() is not None:
+                    error = f.exception()
+                    continue
+                if accept is not None and not accept(f.result()):
+                    # resposta rápida mas inválida não ganha da outra
+                    rejected.append(f.result())
+                    continue
+                for loser in pending:
+                    loser.cancel()
+                self._settle(key, is_hedge, on_event)
+                return f.result()
+        if rejected:
+            return rejected[0]
+        raise error
+
+    async def arun(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[T]],
+        on_event: Optional[Callable[[str], None]] = None,
+        accept: Optional[Callable[[T], bool]] = None,
+    ) -> T:
+        delay = self._start(key)
+        if delay is None:
+            return await self._atimed(key, call)
+
+        started = time.perf_counter()
+        primary = asyncio.ensure_future(self._atimed(key, call))
+        hedge: asyncio.Future | None = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self._try_fire(key, delay, on_event):
+                return await primary
+
+            hedge = asyncio.ensure_future(call())
+            pending = {primary, hedge}
+            error: BaseException | None = None
+            rejected: List[T] = []
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    if t.exception() is not None:
+                        error = t.exception()
+                        continue
+                    if accept is not None and not accept(t.result()):
+                        rejected.append(t.result())
+                        continue
+                    if t is hedge and not primary.done():
+                        # a original vai ser cancelada: entra no quantil com o tempo
+                        # que já levou, senão a cauda some da janela
+                        self._observe(key, time.perf_counter() - started)
+                    self._settle(key, t is hedge, on_event)
+                    return t.result()
+            if rejected:
+                return rejected[0]
+            raise error
+        finally:
+            # perdedora (ou as duas, se quem chamou foi cancelado)
+            for t in (primary, hedge):
+                if t is not None and not t.done():
+                    t.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        with self._lock:
+            for key, st in self._states.items():
+                out[key] = {
+                    "calls": st.calls,
+                    "hedged": st.fired,
+                    "hedge_wins": st.won,
+                    "denied": st.denied,
+                    "hedge_rate": round(st.fired / st.calls, 4) if st.calls else 0.0,
+                    "win_rate": round(st.won / st.fired, 4) if st.fired else 0.0,
+                    "delay_seconds": self._delay_locked(st),
+                }
+        return out
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="llm-hedge"
+                )
+            return self._pool
+
+    def _state(self, key: str) -> _PromptState:
+        st = self._states.get(key)
+        if st is None:
+            st = self._states[key] = _PromptState(
+                self._window_size,
+                RetryBudget(ratio=self._budget_ratio, min_per_second=self._budget_min_per_second),
+            )
+        return st
+
+    def _start(self, key: str) -> float | None:
+        """Conta a chamada no orçamento e devolve o atraso do hedge (None: sem amostras suficientes)."""
+        with self._lock:
+            st = self._state(key)
+            st.calls += 1
+            delay = self._delay_locked(st)
+        st.budget.deposit()
+        return delay
+
+    def _delay_locked(self, st: _PromptState) -> float | None:
+        if len(st.latencies) < self._min_samples:
+            return None
+        ordered = sorted(st.latencies)
+        q = ordered[min(len(ordered) - 1, int(self._quantile * len(ordered)))]
+        return round(max(q, self._min_delay_seconds), 3)
+
+    def _try_fire(self, key: str, delay: float, on_event: Optional[Callable[[str], None]]) -> bool:
+        with self._lock:
+            st = self._state(key)
+        if not st.budget.try_spend():
+            with self._lock:
+                st.denied += 1
+            if on_event is not None:
+                on_event("denied")
+            return False
+        with self._lock:
+            st.fired += 1
+        log.info("llm_hedge_fired", key=key, delay_seconds=delay)
+        if on_event is not None:
+            on_event("fired")
+        return True
+
+    def _settle(self, key: str, hedge_won: bool, on_event: Optional[Callable[[str], None]]) -> None:
+        if hedge_won:
+            with self._lock:
+                self._state(key).won += 1
+        if on_event is not None:
+            on_event("won" if hedge_won else "lost")
+
+    def _observe(self, key: str, seconds: float) -> None:
+        with self._lock:
+            self._state(key).latencies.append(seconds)
+
+    def _run_primary(self, future: concurrent.futures.Future, key: str, call: Callable[[], T]) -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(self._timed(key, call))
+        except BaseException as e:
+            future.set_exception(e)
+
+    # só a chamada original alimenta o quantil: a duplicata enviesaria para baixo
+    def _timed(self, key: str, call: Callable[[], T]) -> T:
+        started = time.perf_counter()
+        result = call()
+        self._observe(key, time.perf_counter() - started)
+        return result
+
+    async def _atimed(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        started = time.perf_counter()
+        result = await call()
+        self._observe(key, time.perf_counter() - started)
+        return result
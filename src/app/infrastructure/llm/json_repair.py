@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional
+
+# true/false/null no estilo Python, comum quando o modelo "pensa" em dict
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_IDENT = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_BOOLEANS = {"true": True, "false": False, "yes": True, "no": False, "sim": True, "não": False, "1": True, "0": False}
+
+# cortes tentados para objetos truncados (cada um custa um json.loads)
+MAX_TRUNCATION_CANDIDATES = 16
+
+
+def _scan(text: str, start: int) -> tuple[int | None, List[int], List[str]]:
+    """
+    Percorre a partir de `start` (um '{' ou '[') respeitando strings com
+    aspas simples ou duplas. Retorna (fim exclusivo | None se truncado,
+    posições das vírgulas de nível estrutural, pilha de fechamentos pendente).
+    """
+    closers: List[str] = []
+    commas: List[int] = []
+    quote: str | None = None
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if quote is not None:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == quote:
+                quote = None
+            continue
+        if ch in "\"'":
+            quote = ch
+        elif ch in "{[":
+            closers.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if not closers or closers[-1] != ch:
+                return i, commas, []
+            closers.pop()
+            if not closers:
+                return i + 1, commas, []
+        elif ch == ",":
+            commas.append(i)
+    if quote is not None:
+        closers.append(quote)
+    return None, commas, closers
+
+
+def _candidates(text: str) -> Iterator[str]:
+    """Primeiro objeto/array JSON do texto; se truncado, versões fechadas à força."""
+    start = next((i for i, ch in enumerate(text) if ch in "{["), None)
+    if start is None:
+        return
+    end, commas, closers = _scan(text, start)
+    if end is not None:
+        yield text[start:end]
+        return
+
+    # truncado (limite de tokens, fence cortada): fecha o que ficou aberto e,
+    # se ainda não parsear, recua até a última vírgula estrutural
+    yield text[start:] + "".join(reversed(closers))
+    for cut in reversed(commas[-MAX_TRUNCATION_CANDIDATES:]):
+        _, _, closers = _scan(text[:cut], start)
+        yield text[start:cut] + "".join(reversed(closers))
+
+
+def _normalize(text: str) -> str:
+    """
+    Reescreve JSON "quase válido": strings em aspas simples, vírgula antes
+    de '}'/']', True/False/None e chaves sem aspas.
+    """
+    out: List[str] = []
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch in "\"'":
+            j, escaped, buf = i + 1, False, []
+            while j < n:
+                c = text[j]
+                if escaped:
+                    buf.append(c if (ch == "'" and c == "'") else "\\" + c)
+                    escaped = False
+                elif c == "\\":
+                    escaped = True
+                elif c == ch:
+                    break
+                elif c == '"':
+                    buf.append('\\"')
+                else:
+                    buf.append(c)
+                j += 1
+            out.append('"' + "".join(buf) + '"')
+            i = j + 1
+            continue
+        if ch == ",":
+            k = i + 1
+            while k < n and text[k].isspace():
+                k += 1
+            if k < n and text[k] in "}]":
+                i += 1
+                continue
+        m = _IDENT.match(text, i) if ch.isalpha() or ch == "_" else None
+        if m:
+            word = m.group(0)
+            k = m.end()
+            while k < n and text[k].isspace():
+                k += 1
+            if k < n and text[k] == ":":
+                out.append(json.dumps(word))
+            else:
+                out.append(_LITERALS.get(word, word))
+            i = m.end()
+            continue
+        out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+def tolerant_loads(text: str) -> Any:
+    """Extrai o primeiro valor JSON do texto e parseia, corrigindo os erros comuns de LLM."""
+    for candidate in _candidates(text):
+        for attempt in (candidate, _normalize(candidate)):
+            try:
+                return json.loads(attempt)
+            except ValueError:
+                continue
+    raise ValueError("no JSON object found")
+
+
+def coerce(value: Any, schema: Optional[Dict[str, Any]]) -> Any:
+    """
+    Ajusta tipos ao output_schema onde a conversão não é ambígua: números e
+    booleanos em string, número onde se espera string, enum com outra caixa,
+    escalar onde se espera array e chaves extras com additionalProperties
+    false. O resto fica como veio para o validador decidir.
+    """
+    if not isinstance(schema, dict):
+        return value
+
+    if "enum" in schema and isinstance(value, str):
+        folded = value.strip().casefold()
+        for option in schema["enum"]:
+            if isinstance(option, str) and option.casefold() == folded:
+                return option
+        return value
+
+    t = schema.get("type")
+    if t == "object" and isinstance(value, dict):
+        props: Dict[str, Any] = schema.get("properties", {})
+        out = {k: coerce(v, props.get(k)) for k, v in value.items()}
+        if schema.get("additionalProperties", True) is False and props:
+            out = {k: v for k, v in out.items() if k in props}
+        return out
+
+    if t == "array":
+        items = schema.get("items")
+        if not isinstance(value, list):
+            value = [value]
+        return [coerce(v, items) for v in value]
+
+    if t == "number" and isinstance(value, str):
+        try:
+            return float(value.strip().replace(",", "."))
+        except ValueError:
+            return value
+
+    if t == "integer":
+        if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+            return int(value.strip())
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
+
+    if t == "boolean" and isinstance(value, str):
+        return _BOOLEANS.get(value.strip().casefold(), value)
+
+    if t == "string" and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+
+    return value
+
+
+def repair_json(text: str, schema: Optional[Dict[str, Any]] = None) -> Any:
+    """Reparo local e determinístico: extração + parse tolerante + coerção ao schema."""
+    return coerce(tolerant_loads(text), schema)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class _Batch:
+    def __init__(self):
+        self.items: List[Any] = []
+        self.results: Optional[List[Any]] = None
+        self.error: BaseException | None = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class _AsyncBatch:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.items: List[Any] = []
+        self.full = asyncio.Event()
+        self.future: asyncio.Future = loop.create_future()
+
+
+class MicroBatcher:
+    """
+    Junta chamadas com a mesma chave que chegam dentro de `window_seconds`
+    (ou até `max_batch_size`) e executa `run(itens)` uma vez para o lote.
+    `run` devolve um resultado por item, na mesma ordem; uma exceção vale
+    para todos os que esperam o lote.
+
+    No modo threads quem abre o lote é o líder: espera a janela e executa
+    na própria thread. No asyncio o lote roda numa task própria, então o
+    cancelamento de quem abriu não deixa os outros esperando para sempre.
+    """
+
+    def __init__(self, max_batch_size: int = 8, window_seconds: float = 0.02):
+        self._max_batch_size = max_batch_size
+        self._window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._open: Dict[str, _Batch] = {}
+        self._aopen: Dict[str, _AsyncBatch] = {}
+
+    def submit(self, key: str, item: Any, run: Callable[[List[Any]], List[Any]]) -> Any:
+        with self._lock:
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._open[key] = _Batch()
+            index = len(batch.items)
+            batch.items.append(item)
+            if len(batch.items) >= self._max_batch_size:
+                # lote cheio: a próxima chamada abre outro
+                del self._open[key]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self._window_seconds)
+            with self._lock:
+                if self._open.get(key) is batch:
+                    del self._open[key]
+            try:
+                batch.results = run(batch.items)
+            except BaseException as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[index]
+
+    async def asubmit(self, key: str, item: Any, run: Callable[[List[Any]], Awaitable[List[Any]]]) -> Any:
+        batch = self._aopen.get(key)
+        if batch is None:
+            batch = self._aopen[key] = _AsyncBatch(asyncio.get_running_loop())
+            asyncio.ensure_future(self._afire(key, batch, run))
+        index = len(batch.items)
+        batch.items.append(item)
+        if len(batch.items) >= self._max_batch_size:
+            del self._aopen[key]
+            batch.full.set()
+
+        # shield: quem é cancelado sai sem derrubar o lote dos outros
+        results = await asyncio.shield(batch.future)
+        return results[index]
+
+    async def _afire(self, key: str, batch: _AsyncBatch, run: Callable[[List[Any]], Awaitable[List[Any]]]) -> None:
+        try:
+            await asyncio.wait_for(batch.full.wait(), timeout=self._window_seconds)
+        except asyncio.TimeoutError:
+            pass
+        if self._aopen.get(key) is batch:
+            del self._aopen[key]
+
+        try:
+            batch.future.set_result(await run(batch.items))
+        except asyncio.CancelledError:
+            batch.future.cancel()
+            raise
+        except Exception as e:
+            batch.future.set_exception(e)
+            # evita "exception was never retrieved" quando todos foram cancelados
+            batch.future.exception()
@@ -1,55 +1,111 @@
 from __future__ import annotations
-from typing import Dict, List, Any, Type
+from typing import Any, Callable, Dict, List
 from tenacity import (
     retry,
     stop_after_attempt,
-    wait_exponential,
-    retry_if_exception_type
+    wait_random_exponential,
 )
 
-from pydantic import BaseModel, ValidationError, create_model
+from pydantic import ValidationError
 
+import hashlib
 import json
+import threading
+import time
+from contextlib import aclosing, closing
+from dataclasses import dataclass
 import structlog
 
+import httpx
+import openai
 from langchain_openai import ChatOpenAI
 
-from app.application.ports.llm import LLMPort, LLMRequest, LLMResponse
-from app.prompts.registry import PromptRegistry
-from app.domain.errors import PermanentError, TransientError
+from app.application.ports.cache import CachePort
+from app.application.ports.llm import FusedResponse, LLMPort, LLMRequest, LLMResponse
+from app.application.ports.metrics import MetricsPort
+from app.prompts.registry import PromptRegistry, PromptSpec
+from app.infrastructure.llm.circuit_breaker import CircuitBreaker, RetryBudget
+from app.infrastructure.llm.json_repair import coerce, repair_json, tolerant_loads
+from app.infrastructure.llm.client_pool import ChatClientPool
+from app.infrastructure.llm.hedging import RequestHedger
+from app.infrastructure.llm.micro_batcher import MicroBatcher
+from app.infrastructure.llm.rate_limiter import AdaptiveRateLimiter, Permit
+from app.infrastructure.llm.schema_compiler import SchemaCompiler
+from app.infrastructure.llm.stream_parser import COMPLETE, PENDING, StreamingJsonParser
+from app.infrastructure.llm.tokens import count_message_tokens, count_tokens
+from app.domain.errors import CircuitOpenError, PermanentError, RateLimitedError, TransientError
 
 log = structlog.get_logger()
 
+REPAIR_PROMPT_ID = "__repair__"
 
-def _pydantic_model_from_json_schema(name: str, schema: Dict[str, Any]) -> Type[BaseModel]:
-    if schema.get("type") != "object":
-        raise PermanentError("Only 'type: object' schemas are supported")
+# estimativa de saída quando o prompt não define max_tokens
+DEFAULT_COMPLETION_TOKENS = 512
 
-    props = schema.get("properties", {})
-    required = set(schema.get("required", []))
-    additional = schema.get("additionalProperties", True)
+FUSED_SYSTEM_PROMPT = (
+    "Você executa vários agentes sobre a mesma entrada. Siga as instruções de cada seção "
+    "e responda APENAS um objeto JSON com uma chave por agente, obedecendo ao SCHEMA."
+)
+
+MICRO_BATCH_SYSTEM_PROMPT = (
+    "Você recebe vários itens independentes, cada um identificado por `id`. Aplique as instruções abaixo "
+    "a cada item separadamente e responda APENAS um objeto JSON no formato do SCHEMA, com um elemento "
+    "em `items` por item recebido."
+)
+
+
+@dataclass
+class _FusedPlan:
+    req: LLMRequest
+    cached: Dict[str, Dict[str, Any]]
+    pending: List[PromptSpec]
+    keys: Dict[str, str | None]
+    separate_tokens: int
+    client: ChatOpenAI | None = None
+    model: str | None = None
+    messages: List[Dict[str, str]] | None = None
+
+
+@dataclass(frozen=True)
+class _MicroBatchItem:
+    req: LLMRequest
+    spec: PromptSpec
+    model: str
+    temperature: float
+    system: str
+    user: str
+    enqueued_at: float
+
+    @property
+    def group_key(self) -> str:
+        # só entram no mesmo lote chamadas com o mesmo preâmbulo renderizado
+        digest = hashlib.sha256(self.system.encode("utf-8")).hexdigest()[:16]
+        return f"{self.spec.id}:v{self.spec.version}:{self.model}:{self.temperature}:{digest}"
 
-    fields: Dict[str, tuple[Any, Any]] = {}
-    for key, spec in props.items():
-        t = spec.get("type")
-        py_type = {
-            "string": str,
-            "number": float,
-            "integer": int,
-            "boolean": bool,
-            "object": dict,
-            "array": list,
-        }.get(t, Any)
 
-        default = None
-        fields[key] = (py_type, default)
+@dataclass
+class _MicroBatchPlan:
+    items: List[_MicroBatchItem]
+    ids: List[str]
+    req: LLMRequest
+    client: ChatOpenAI
+    model: str
+    messages: List[Dict[str, str]]
+    separate_tokens: int
 
-    Model = create_model(name, **fields)
 
-    if additional is False:
-        Model.model_config["extra"] = "forbid"
+def _micro_batch_ids(items: List[_MicroBatchItem]) -> List[str]:
+    """correlation_id de cada item, com sufixo quando se repete (ou falta) no lote."""
+    ids: List[str] = []
+    seen: set[str] = set()
+    for i, item in enumerate(items):
+        item_id = item.req.correlation_id or str(i)
+        if item_id in seen:
+            item_id = f"{item_id}#{i}"
+        seen.add(item_id)
+        ids.append(item_id)
+    return ids
 
-    return Model
 
 def _strip_code_fences(text: str) -> str:
     t = text.strip()
@@ -70,35 +126,44 @@ def _extract_json(text: str) -> Any:
     t = _strip_code_fences(text)
     return json.loads(t)
 
-def _repair_json(self, bad_text: str, schema: Dict[str, Any], req: LLMRequest) -> str:
-        """
-        Faz uma segunda chamada pedindo para "consertar" o JSON.
-        Mantém o significado, remove lixo e retorna JSON válido.
-        """
-        repair_prompt_id = "__repair__"
+def _is_outage(e: Exception) -> bool:
+    """Falhas que indicam serviço indisponível; só elas contam para o circuit breaker."""
+    return isinstance(e, (openai.APIConnectionError, openai.InternalServerError, httpx.TransportError))
 
-        # Prompt inline (poderia virar YAML também)
-        messages = [
-            {"role": "system", "content": "Você é um reparador de JSON. Retorne APENAS JSON válido."},
-            {
-                "role": "user",
-                "content": (
-                    "Corrija o JSON abaixo para obedecer ao schema. "
-                    "Não adicione campos além do permitido. "
-                    "Retorne somente JSON.\n\n"
-                    f"SCHEMA:\n{json.dumps(schema, ensure_ascii=False)}\n\n"
-                    f"BAD_OUTPUT:\n{bad_text}"
-                ),
-            },
-        ]
 
-        try:
-            resp = self._client.invoke(messages)
-            text = resp.content if hasattr(resp, "content") else str(resp)
-            log.info("llm_structured_repair_ok", correlation_id=req.correlation_id, prompt_id=req.prompt_id)
-            return text
-        except Exception as e:
-            raise TransientError(f"repair_failed: {e}") from e
+def _should_retry(retry_state) -> bool:
+    exc = retry_state.outcome.exception()
+    if not isinstance(exc, TransientError) or isinstance(exc, CircuitOpenError):
+        return False
+    adapter, _, model, _, req = retry_state.args
+    if adapter._retry_budget is not None and not adapter._retry_budget.try_spend():
+        log.warning("llm_retry_budget_exhausted", prompt_id=req.prompt_id, model=model)
+        return False
+    return True
+
+
+def _count_retry(retry_state) -> None:
+    # before_sleep do tenacity: args de _invoke/_ainvoke são (self, client, model, messages, req)
+    adapter, _, model, _, req = retry_state.args
+    if adapter._metrics is not None:
+        adapter._metrics.inc_llm_retry(req.prompt_id, model)
+
+
+def _repair_messages(bad_text: str, schema: Dict[str, Any]) -> List[Dict[str, str]]:
+    # Prompt inline (poderia virar YAML também)
+    return [
+        {"role": "system", "content": "Você é um reparador de JSON. Retorne APENAS JSON válido."},
+        {
+            "role": "user",
+            "content": (
+                "Corrija o JSON abaixo para obedecer ao schema. "
+                "Não adicione campos além do permitido. "
+                "Retorne somente JSON.\n\n"
+                f"SCHEMA:\n{json.dumps(schema, ensure_ascii=False)}\n\n"
+                f"BAD_OUTPUT:\n{bad_text}"
+            ),
+        },
+    ]
 
 class OpenAILangChainAdapter(LLMPort):
     def __init__(
@@ -109,74 +174,579 @@ class OpenAILangChainAdapter(LLMPort):
         default_temperature: float,
         timeout_seconds: int = 30,
         max_repair_attemps: int = 1,
+        cache: CachePort | None = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry_seconds: float = 30.0,
+        metrics: MetricsPort | None = None,
+        rate_limiter: AdaptiveRateLimiter | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        retry_budget: RetryBudget | None = None,
+        streaming: bool = False,
+        micro_batcher: MicroBatcher | None = None,
+        hedger: RequestHedger | None = None,
     ):
         self._registry = registry
         self._default_model = default_model
         self._default_temperature = default_temperature
         self._max_repair_attempts = max_repair_attemps
+        self._cache = cache
+        self._metrics = metrics
+        self._limiter = rate_limiter
+        self._breaker = circuit_breaker
+        self._retry_budget = retry_budget
+        self._streaming = streaming
+        self._schemas = SchemaCompiler()
+        self._repairs = {"local_ok": 0, "llm_ok": 0, "llm_failed": 0}
+        self._repairs_lock = threading.Lock()
+        self._batcher = micro_batcher
+        self._hedger = hedger
+        self._micro_lock = threading.Lock()
+        self._micro = {
+            "batches": 0,
+            "items": 0,
+            "singletons": 0,
+            "fallbacks": 0,
+            "input_tokens": 0,
+            "input_tokens_separate_est": 0,
+            "wait_ms": 0.0,
+        }
 
-        self._client = ChatOpenAI(
+        self._pool = ChatClientPool(
             api_key=api_key,
-            model=default_model,
-            temperature=default_temperature,
-            timeout=timeout_seconds
+            timeout_seconds=timeout_seconds,
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry_seconds=keepalive_expiry_seconds,
+            # x-ratelimit-* realimentam o limiter
+            include_response_headers=rate_limiter is not None,
+            metrics=metrics,
         )
+        self._client = self._pool.get(default_model, default_temperature)
+
+    def _client_for(self, model:str, temperature: float, max_tokens: int | None = None) -> ChatOpenAI:
+        return self._pool.get(model=model, temperature=temperature, max_tokens=max_tokens)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return self._pool.stats()
 
-    def _client_for(self, model:str, temperature: float) -> ChatOpenAI:
-        if model == self._default_model and temperature == self._default_temperature:
-            return self._client
-        
-        return ChatOpenAI(
-            api_key=self._client.openai_api_key,
+    def hedge_stats(self) -> Dict[str, Any]:
+        return self._hedger.stats() if self._hedger is not None else {}
+
+    async def aclose(self) -> None:
+        await self._pool.aclose()
+
+    def close(self) -> None:
+        if self._hedger is not None:
+            self._hedger.close()
+        self._pool.close()
+    
+    def _prepare(self, req: LLMRequest, kind: str) -> tuple[ChatOpenAI, str, List[Dict[str, str]], str | None]:
+        spec = self._registry.get(req.prompt_id)
+
+        model = req.model or spec.model.get("name") or self._default_model
+        temperature = req.temperature if req.temperature is not None else spec.model.get("temperature", self._default_temperature)
+        client = self._client_for(model=model, temperature=temperature, max_tokens=spec.model.get("max_tokens"))
+
+        messages = self._registry.render_messages(req.prompt_id, req.variables)
+        cache_key = self._cache_key(kind, spec, model, temperature, messages)
+        return client, model, messages, cache_key
+
+    def _cache_key(
+        self,
+        kind: str,
+        spec: PromptSpec,
+        model: str,
+        temperature: float,
+        messages: List[Dict[str, str]],
+    ) -> str | None:
+        if self._cache is None:
+            return None
+
+        # só as bordas: dentro do texto o espaço é conteúdo (stack trace, código, tabela)
+        rendered = [[m["role"], m["content"].strip()] for m in messages]
+        digest = hashlib.sha256(json.dumps(rendered, ensure_ascii=False).encode("utf-8")).hexdigest()
+        # a versão do prompt faz parte da chave: mudou o YAML, invalida sozinho;
+        # "k2": chaves antigas colapsavam espaços internos e não podem ser reaproveitadas
+        return f"k2:{kind}:{spec.id}:v{spec.version}:{model}:{temperature}:{digest}"
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self._cache.stats() if self._cache is not None else {}
+
+    def _cache_get(self, key: str | None, req: LLMRequest) -> Any:
+        if key is None:
+            return None
+        value = self._cache.get(key)
+        if value is not None:
+            log.info("llm_cache_hit", correlation_id=req.correlation_id, prompt_id=req.prompt_id)
+        return value
+
+    def _cache_set(self, key: str | None, value: Any) -> None:
+        if key is not None:
+            self._cache.set(key, value)
+
+    def _to_response(self, resp: Any, req: LLMRequest, model: str) -> LLMResponse:
+        text = resp.content if hasattr(resp, "content") else str(resp)
+
+        usage = getattr(resp, "usage_metadata", None)
+
+        log.info(
+            "llm_invoke_text_ok",
+            correlation_id=req.correlation_id,
+            prompt_id=req.prompt_id,
+            model=model
+        )
+
+        return LLMResponse(text=text, raw=resp, model=model, usage=usage)
+
+    def _observe(self, req: LLMRequest, model: str, status: str, started: float, usage: Dict[str, Any] | None = None) -> None:
+        if self._metrics is None:
+            return
+        usage = usage or {}
+        self._metrics.observe_llm_call(
+            prompt_id=req.prompt_id,
             model=model,
-            temperature=temperature,
-            timeout=self._client.timeout,
+            status=status,
+            latency_seconds=time.perf_counter() - started,
+            input_tokens=int(usage.get("input_tokens") or 0),
+            output_tokens=int(usage.get("output_tokens") or 0),
         )
-    
+
+    def _estimate_tokens(self, client: ChatOpenAI, model: str, messages: List[Dict[str, str]]) -> int:
+        return count_message_tokens(messages, model) + (getattr(client, "max_tokens", None) or DEFAULT_COMPLETION_TOKENS)
+
+    def _release_ok(self, permit: Permit | None, resp: LLMResponse) -> None:
+        if permit is None:
+            return
+        usage = resp.usage or {}
+        headers = (getattr(resp.raw, "response_metadata", None) or {}).get("headers")
+        self._limiter.release(permit, actual_tokens=usage.get("total_tokens"), headers=headers)
+
+    def _release_error(self, permit: Permit | None, err: Exception, e: Exception) -> None:
+        if permit is None:
+            return
+        if isinstance(err, RateLimitedError):
+            response = getattr(e, "response", None)
+            self._limiter.release_rate_limited(permit, headers=getattr(response, "headers", None))
+        else:
+            self._limiter.release_failed(permit)
+
+    def _before_call(self, model: str) -> None:
+        if self._retry_budget is not None:
+            self._retry_budget.deposit()
+        if self._breaker is not None:
+            self._breaker.before_call(model)
+
+    def _record_outcome(self, model: str, e: Exception | None) -> None:
+        if self._breaker is None:
+            return
+        if e is None:
+            self._breaker.record_success(model)
+        elif _is_outage(e):
+            self._breaker.record_failure(model)
+        else:
+            self._breaker.record_ignored(model)
+
+    def backpressure_seconds(self) -> float:
+        """
+        Segundos até valer a pena puxar mensagens de novo: orçamento de RPM/TPM
+        esgotado ou circuito do modelo default aberto.
+        """
+        wait = self._limiter.wait_seconds() if self._limiter is not None else 0.0
+        if self._breaker is not None:
+            wait = max(wait, self._breaker.open_seconds(self._default_model))
+        return wait
+
+    def rate_limit_stats(self) -> Dict[str, Any]:
+        return self._limiter.stats() if self._limiter is not None else {}
+
+    def resilience_stats(self) -> Dict[str, Any]:
+        return {
+            "circuits": self._breaker.stats() if self._breaker is not None else {},
+            "retry_budget": self._retry_budget.stats() if self._retry_budget is not None else {},
+        }
+
+    def repair_stats(self) -> Dict[str, Any]:
+        with self._repairs_lock:
+            stats = dict(self._repairs)
+        # cada reparo local bem-sucedido é uma chamada de reparo ao LLM a menos
+        stats["llm_repairs_avoided"] = stats["local_ok"] if self._max_repair_attempts else 0
+        return stats
+
+    def micro_batch_stats(self) -> Dict[str, Any]:
+        with self._micro_lock:
+            stats = dict(self._micro)
+        stats["avg_batch_size"] = round(stats["items"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["input_tokens_saved_est"] = stats["input_tokens_separate_est"] - stats["input_tokens"]
+        # cada lote de n itens poupa n - 1 chamadas, menos os que voltaram para chamada individual
+        stats["calls_saved"] = stats["items"] - stats["batches"] - stats["fallbacks"]
+        stats["wait_ms"] = round(stats["wait_ms"], 1)
+        return stats
+
+    def _record_micro(self, **deltas: float) -> None:
+        with self._micro_lock:
+            for k, v in deltas.items():
+                self._micro[k] += v
+
+    def _record_repair(self, req: LLMRequest, outcome: str) -> None:
+        key = {"local": "local_ok", "ok": "llm_ok", "failed": "llm_failed"}[outcome]
+        with self._repairs_lock:
+            self._repairs[key] += 1
+        if self._metrics is not None:
+            self._metrics.inc_llm_repair(req.prompt_id, outcome)
+
+    def _repair_client(self) -> ChatOpenAI:
+        return self._client_for(model=self._default_model, temperature=self._default_temperature)
+
+    def _repair_json(self, bad_text: str, schema: Dict[str, Any], req: LLMRequest) -> str:
+        """
+        Faz uma segunda chamada pedindo para "consertar" o JSON.
+        Mantém o significado, remove lixo e retorna JSON válido.
+        """
+        repair_req = LLMRequest(prompt_id=REPAIR_PROMPT_ID, variables={}, correlation_id=req.correlation_id)
+        resp = self._invoke(self._repair_client(), self._default_model, _repair_messages(bad_text, schema), repair_req)
+        log.info("llm_structured_repair_ok", correlation_id=req.correlation_id, prompt_id=req.prompt_id)
+        return resp.text
+
+    async def _arepair_json(self, bad_text: str, schema: Dict[str, Any], req: LLMRequest) -> str:
+        repair_req = LLMRequest(prompt_id=REPAIR_PROMPT_ID, variables={}, correlation_id=req.correlation_id)
+        resp = await self._ainvoke(self._repair_client(), self._default_model, _repair_messages(bad_text, schema), repair_req)
+        log.info("llm_structured_repair_ok", correlation_id=req.correlation_id, prompt_id=req.prompt_id)
+        return resp.text
+
+    def _map_error(self, e: Exception) -> Exception:
+        if isinstance(e, (openai.AuthenticationError, openai.PermissionDeniedError)):
+            return PermanentError(f"openai_auth_error: {e}")
+
+        if isinstance(e, (openai.BadRequestError, openai.NotFoundError, openai.UnprocessableEntityError)):
+            return PermanentError(f"openai_request_error: {e}")
+
+        if isinstance(e, openai.RateLimitError):
+            return RateLimitedError(f"openai_rate_limited: {e}")
+
+        # APITimeoutError é subclasse de APIConnectionError; httpx.TimeoutException de TransportError
+        if isinstance(e, (openai.APIConnectionError, httpx.TransportError)):
+            return TransientError(f"openai_connection_error: {e}")
+
+        return TransientError(f"openai_error: {e}")
+
+    def _parse_and_validate(self, text: str, spec: PromptSpec, req: LLMRequest) -> Dict[str, Any] | None:
+        try:
+            data = _extract_json(text)
+            return self._schemas.validate(spec, data)
+        except (ValueError, ValidationError) as e:
+            error = str(e)
+
+        # reparo local (texto em volta, vírgula sobrando, aspas simples, tipos)
+        # antes de gastar uma chamada de reparo no LLM
+        try:
+            repaired = self._schemas.validate(spec, repair_json(text, spec.output_schema))
+        except (ValueError, ValidationError):
+            log.warning(
+                "llm_structured_invalid",
+                correlation_id=req.correlation_id,
+                prompt_id=req.prompt_id,
+                error=error,
+            )
+            return None
+
+        self._record_repair(req, "local")
+        log.info("llm_structured_local_repair_ok", correlation_id=req.correlation_id, prompt_id=req.prompt_id)
+        return repaired
+
+    def _validate_member(self, spec: PromptSpec, value: Any) -> Dict[str, Any] | None:
+        """Valida um pedaço de resposta combinada (fused/micro-batch); None se não bater com o schema."""
+        try:
+            return self._schemas.validate(spec, value)
+        except ValidationError:
+            pass
+        try:
+            return self._schemas.validate(spec, coerce(value, spec.output_schema))
+        except ValidationError:
+            return None
+
     @retry(
         reraise=True,
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=30),
-        retry=retry_if_exception_type(TransientError),
+        wait=wait_random_exponential(multiplier=1, max=30),
+        retry=_should_retry,
+        before_sleep=_count_retry,
+    )
+    def _invoke(self, client: ChatOpenAI, model: str, messages: List[Dict[str, str]], req: LLMRequest) -> LLMResponse:
+        # circuito aberto falha antes de consumir orçamento do limiter
+        self._before_call(model)
+        permit = None
+        if self._limiter is not None:
+            permit = self._limiter.acquire(self._estimate_tokens(client, model, messages))
 
+        started = time.perf_counter()
+        try:
+            with self._pool.track():
+                resp = client.invoke(messages)
+        except Exception as e:
+            err = self._map_error(e)
+            self._observe(req, model, "error", started)
+            self._release_error(permit, err, e)
+            self._record_outcome(model, e)
+            raise err from e
 
+        out = self._to_response(resp, req, model)
+        self._observe(req, model, "ok", started, out.usage)
+        self._release_ok(permit, out)
+        self._record_outcome(model, None)
+        return out
+
+    @retry(
+        reraise=True,
+        stop=stop_after_attempt(3),
+        wait=wait_random_exponential(multiplier=1, max=30),
+        retry=_should_retry,
+        before_sleep=_count_retry,
     )
-    def invoke_text(self, req: LLMRequest) -> LLMResponse:
+    async def _ainvoke(self, client: ChatOpenAI, model: str, messages: List[Dict[str, str]], req: LLMRequest) -> LLMResponse:
+        # circuito aberto falha antes de consumir orçamento do limiter
+        self._before_call(model)
+        permit = None
+        if self._limiter is not None:
+            permit = await self._limiter.aacquire(self._estimate_tokens(client, model, messages))
+
+        started = time.perf_counter()
+        try:
+            with self._pool.track():
+                resp = await client.ainvoke(messages)
+        except Exception as e:
+            err = self._map_error(e)
+            self._observe(req, model, "error", started)
+            self._release_error(permit, err, e)
+            self._record_outcome(model, e)
+            raise err from e
+
+        out = self._to_response(resp, req, model)
+        self._observe(req, model, "ok", started, out.usage)
+        self._release_ok(permit, out)
+        self._record_outcome(model, None)
+        return out
+
+    def _call(
+        self,
+        client: ChatOpenAI,
+        model: str,
+        messages: List[Dict[str, str]],
+        req: LLMRequest,
+        spec: PromptSpec | None = None,
+    ) -> LLMResponse:
+        """_invoke com hedge (quando ligado) contra a cauda de latência do prompt; com `spec`, só resposta válida ganha."""
+        if self._hedger is None:
+            return self._invoke(client, model, messages, req)
+        return self._hedger.run(
+            req.prompt_id,
+            lambda: self._invoke(client, model, messages, req),
+            on_event=lambda outcome: self._record_hedge(req, outcome),
+            accept=self._valid_for(spec) if spec is not None else None,
+        )
+
+    async def _acall(
+        self,
+        client: ChatOpenAI,
+        model: str,
+        messages: List[Dict[str, str]],
+        req: LLMRequest,
+        spec: PromptSpec | None = None,
+    ) -> LLMResponse:
+        if self._hedger is None:
+            return await self._ainvoke(client, model, messages, req)
+        return await self._hedger.arun(
+            req.prompt_id,
+            lambda: self._ainvoke(client, model, messages, req),
+            on_event=lambda outcome: self._record_hedge(req, outcome),
+            accept=self._valid_for(spec) if spec is not None else None,
+        )
+
+    def _valid_for(self, spec: PromptSpec) -> Callable[[LLMResponse], bool]:
+        """Mesmo critério do _parse_and_validate (inclusive o reparo local), sem log nem contadores."""
+        def _valid(resp: LLMResponse) -> bool:
+            for candidate in (lambda: _extract_json(resp.text), lambda: repair_json(resp.text, spec.output_schema)):
+                try:
+                    self._schemas.validate(spec, candidate())
+                    return True
+                except (ValueError, ValidationError):
+                    continue
+            return False
+
+        return _valid
+
+    def _record_hedge(self, req: LLMRequest, outcome: str) -> None:
+        if outcome == "won":
+            log.info("llm_hedge_won", correlation_id=req.correlation_id, prompt_id=req.prompt_id)
+        if self._metrics is not None:
+            self._metrics.inc_llm_hedge(req.prompt_id, outcome)
+
+    def _member_check(self, spec: PromptSpec) -> Callable[[str, Any], str | None]:
+        properties = (spec.output_schema or {}).get("properties") or {}
+
+        def check(key: str, value: Any) -> str | None:
+            adapter = self._schemas.property_adapter(spec, key)
+            if adapter is None:
+                # campo extra o reparo local remove; não justifica cortar o stream
+                return None
+            try:
+                adapter.validate_python(coerce(value, properties[key]))
+            except ValidationError as e:
+                return e.errors()[0].get("msg", "invalid value")
+            return None
+
+        return check
+
+    def _finish_stream(
+        self,
+        acc: Any,
+        parser: StreamingJsonParser,
+        req: LLMRequest,
+        model: str,
+        messages: List[Dict[str, str]],
+        started: float,
+        first_token_at: float | None,
+    ) -> LLMResponse:
         spec = self._registry.get(req.prompt_id)
+        outcome = "incomplete" if parser.state == PENDING else parser.state
+        text = parser.object_text if parser.state == COMPLETE else parser.text
 
-        model = req.model or self._default_model
-        temperature = req.temperature if req.temperature is not None else spec.model.get("temperature", self._lldefault_temperature)
-        client = self._client_for(model=model, temperature=temperature)
+        valid_at = None
+        if parser.state == COMPLETE:
+            try:
+                self._schemas.validate(spec, repair_json(text, spec.output_schema))
+                valid_at = time.perf_counter()
+            except (ValueError, ValidationError):
+                pass
 
-        messages = self._registry.render_messages(req.prompt_id, req.variables)
+        # stream cortado antes do chunk final não traz usage: estima
+        usage = getattr(acc, "usage_metadata", None)
+        if not usage:
+            input_tokens = count_message_tokens(messages, model)
+            output_tokens = count_tokens(parser.text, model)
+            usage = {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
 
+        ttft = first_token_at - started if first_token_at is not None else None
+        ttvo = valid_at - started if valid_at is not None else None
+        if self._metrics is not None:
+            self._metrics.observe_llm_stream(req.prompt_id, model, outcome, ttft, ttvo)
+        log.info(
+            "llm_stream_finished" if outcome != "aborted" else "llm_stream_aborted",
+            correlation_id=req.correlation_id,
+            prompt_id=req.prompt_id,
+            model=model,
+            outcome=outcome,
+            reason=parser.abort_reason,
+            ttft_ms=round(ttft * 1000, 1) if ttft is not None else None,
+            ttvo_ms=round(ttvo * 1000, 1) if ttvo is not None else None,
+            output_tokens=usage.get("output_tokens"),
+        )
+        return LLMResponse(text=text, raw=acc, model=model, usage=usage)
+
+    @retry(
+        reraise=True,
+        stop=stop_after_attempt(3),
+        wait=wait_random_exponential(multiplier=1, max=30),
+        retry=_should_retry,
+        before_sleep=_count_retry,
+    )
+    def _stream(self, client: ChatOpenAI, model: str, messages: List[Dict[str, str]], req: LLMRequest) -> LLMResponse:
+        """
+        Como _invoke, mas lê a resposta em streaming e encerra assim que o
+        objeto JSON fecha ou um campo viola o schema; fechar o stream
+        interrompe a geração e o resto não é cobrado.
+        """
+        self._before_call(model)
+        permit = None
+        if self._limiter is not None:
+            permit = self._limiter.acquire(self._estimate_tokens(client, model, messages))
+
+        parser = StreamingJsonParser(self._member_check(self._registry.get(req.prompt_id)))
+        acc, first_token_at = None, None
+        started = time.perf_counter()
         try:
-            resp = client.invoke(messages)
-            text = resp.content if hasattr(resp, "content") else str(resp)
+            with self._pool.track(), closing(client.stream(messages, stream_usage=True)) as chunks:
+                for chunk in chunks:
+                    acc = chunk if acc is None else acc + chunk
+                    text = chunk.content if isinstance(chunk.content, str) else ""
+                    if text and first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    if parser.feed(text) != PENDING:
+                        break
+        except Exception as e:
+            err = self._map_error(e)
+            self._observe(req, model, "error", started)
+            self._release_error(permit, err, e)
+            self._record_outcome(model, e)
+            raise err from e
 
-            usage = getattr(resp, "usage_metadata", None)
+        out = self._finish_stream(acc, parser, req, model, messages, started, first_token_at)
+        self._observe(req, model, "ok", started, out.usage)
+        self._release_ok(permit, out)
+        self._record_outcome(model, None)
+        return out
 
-            log.info(
-                "llm_invoke_text_ok",
-                correlation_id=req.correlation_id,
-                prompt_id=req.prompt_id,
-                model=model
-            )
+    @retry(
+        reraise=True,
+        stop=stop_after_attempt(3),
+        wait=wait_random_exponential(multiplier=1, max=30),
+        retry=_should_retry,
+        before_sleep=_count_retry,
+    )
+    async def _astream(self, client: ChatOpenAI, model: str, messages: List[Dict[str, str]], req: LLMRequest) -> LLMResponse:
+        self._before_call(model)
+        permit = None
+        if self._limiter is not None:
+            permit = await self._limiter.aacquire(self._estimate_tokens(client, model, messages))
 
-            return LLMResponse(text=text, raw=resp, model=model, usage=usage)
-        
+        parser = StreamingJsonParser(self._member_check(self._registry.get(req.prompt_id)))
+        acc, first_token_at = None, None
+        started = time.perf_counter()
+        try:
+            with self._pool.track():
+                async with aclosing(client.astream(messages, stream_usage=True)) as chunks:
+                    async for chunk in chunks:
+                        acc = chunk if acc is None else acc + chunk
+                        text = chunk.content if isinstance(chunk.content, str) else ""
+                        if text and first_token_at is None:
+                            first_token_at = time.perf_counter()
+                        if parser.feed(text) != PENDING:
+                            break
         except Exception as e:
-            
-            msg = str(e).lower()
+            err = self._map_error(e)
+            self._observe(req, model, "error", started)
+            self._release_error(permit, err, e)
+            self._record_outcome(model, e)
+            raise err from e
+
+        out = self._finish_stream(acc, parser, req, model, messages, started, first_token_at)
+        self._observe(req, model, "ok", started, out.usage)
+        self._release_ok(permit, out)
+        self._record_outcome(model, None)
+        return out
+
+    def invoke_text(self, req: LLMRequest) -> LLMResponse:
+        client, model, messages, key = self._prepare(req, kind="text")
+
+        cached = self._cache_get(key, req)
+        if cached is not None:
+            return LLMResponse(text=cached["text"], raw=None, model=model, usage=cached.get("usage"))
+
+        resp = self._call(client, model, messages, req)
+        self._cache_set(key, {"text": resp.text, "usage": resp.usage})
+        return resp
+
+    async def ainvoke_text(self, req: LLMRequest) -> LLMResponse:
+        client, model, messages, key = self._prepare(req, kind="text")
+
+        cached = self._cache_get(key, req)
+        if cached is not None:
+            return LLMResponse(text=cached["text"], raw=None, model=model, usage=cached.get("usage"))
+
+        resp = await self._acall(client, model, messages, req)
+        self._cache_set(key, {"text": resp.text, "usage": resp.usage})
+        return resp
 
-            if "autentication" in msg or "invalid api key" in msg:
-                raise PermanentError(f"openai_auth_error: {e}") from e
-            
-            if "rate limit" in msg or "timeout" in msg:
-                raise TransientError(f"openai_transient_error: {e}") from e
-            
-            raise TransientError(f"openaai_error: {e}") from e
-        
     def invoke_structured(self, req: LLMRequest) -> Dict[str, Any]:
         spec = self._registry.get(req.prompt_id)
 
@@ -189,26 +759,395 @@ class OpenAILangChainAdapter(LLMPort):
             except Exception:
                 return {"value": resp.text}
             
-        if not isinstance(spec.output_schema, dict):
-            raise PermanentError(f"prompt {req.prompt_id} output_schema missing json_schema")
-        
-        Model = _pydantic_model_from_json_schema(req.prompt_id, spec.output_schema)
+        # compila (ou reaproveita) o validador antes de gastar a chamada
+        self._schemas.model_for(spec)
+
+        client, model, messages, key = self._prepare(req, kind="structured")
+        cached = self._cache_get(key, req)
+        if cached is not None:
+            return cached
 
-        # 1) tentativa normal
-        resp = self.invoke_text(req)
-        parsed = self._parse_and_validate(resp.text, Model, req)
+        if self._batcher is not None:
+            parsed = self._micro_batch(req, spec, model, messages)
+            if parsed is not None:
+                self._cache_set(key, parsed)
+                return parsed
+            # fora do lote, sozinho na janela ou inválido no lote: chamada individual
+
+        # 1) tentativa normal (em streaming, encerra no fechamento do objeto)
+        if self._streaming:
+            resp = self._stream(client, model, messages, req)
+        else:
+            resp = self._call(client, model, messages, req, spec=spec)
+        parsed = self._parse_and_validate(resp.text, spec, req)
 
         if parsed is not None:
+            self._cache_set(key, parsed)
             return parsed
 
         # 2) repair (opcional)
         for attempt in range(self._max_repair_attempts):
             repaired = self._repair_json(resp.text, spec.output_schema, req)
-            parsed2 = self._parse_and_validate(repaired, Model, req)
+            parsed2 = self._parse_and_validate(repaired, spec, req)
+            self._record_repair(req, "ok" if parsed2 is not None else "failed")
             if parsed2 is not None:
+                self._cache_set(key, parsed2)
                 return parsed2
 
         # se não rolou, é transient (modelo não obedeceu / output “quebrado”)
         raise TransientError(f"structured_output_failed for prompt={req.prompt_id}")
-        
 
+    async def ainvoke_structured(self, req: LLMRequest) -> Dict[str, Any]:
+        spec = self._registry.get(req.prompt_id)
+
+        if not spec.output_schema:
+
+            resp = await self.ainvoke_text(req)
+
+            try:
+                return _extract_json(resp.text)
+            except Exception:
+                return {"value": resp.text}
+
+        # compila (ou reaproveita) o validador antes de gastar a chamada
+        self._schemas.model_for(spec)
+
+        client, model, messages, key = self._prepare(req, kind="structured")
+        cached = self._cache_get(key, req)
+        if cached is not None:
+            return cached
+
+        if self._batcher is not None:
+            parsed = await self._amicro_batch(req, spec, model, messages)
+            if parsed is not None:
+                self._cache_set(key, parsed)
+                return parsed
+
+        if self._streaming:
+            resp = await self._astream(client, model, messages, req)
+        else:
+            resp = await self._acall(client, model, messages, req, spec=spec)
+        parsed = self._parse_and_validate(resp.text, spec, req)
+
+        if parsed is not None:
+            self._cache_set(key, parsed)
+            return parsed
+
+        for attempt in range(self._max_repair_attempts):
+            repaired = await self._arepair_json(resp.text, spec.output_schema, req)
+            parsed2 = self._parse_and_validate(repaired, spec, req)
+            self._record_repair(req, "ok" if parsed2 is not None else "failed")
+            if parsed2 is not None:
+                self._cache_set(key, parsed2)
+                return parsed2
+
+        raise TransientError(f"structured_output_failed for prompt={req.prompt_id}")
+
+    def _micro_batch_item(
+        self, req: LLMRequest, spec: PromptSpec, model: str, messages: List[Dict[str, str]]
+    ) -> _MicroBatchItem | None:
+        turns = [m for m in messages if m["role"] != "system"]
+        if len(turns) != 1 or turns[0]["role"] != "user":
+            # few-shot com turnos de exemplo não cabe no formato de itens
+            return None
+        return _MicroBatchItem(
+            req=req,
+            spec=spec,
+            model=model,
+            temperature=req.temperature if req.temperature is not None else spec.model.get("temperature", self._default_temperature),
+            system="\n".join(m["content"].strip() for m in messages if m["role"] == "system"),
+            user=turns[0]["content"].strip(),
+            enqueued_at=time.perf_counter(),
+        )
+
+    def _micro_batch(
+        self, req: LLMRequest, spec: PromptSpec, model: str, messages: List[Dict[str, str]]
+    ) -> Dict[str, Any] | None:
+        item = self._micro_batch_item(req, spec, model, messages)
+        if item is None:
+            return None
+        return self._batcher.submit(item.group_key, item, self._run_micro_batch)
+
+    async def _amicro_batch(
+        self, req: LLMRequest, spec: PromptSpec, model: str, messages: List[Dict[str, str]]
+    ) -> Dict[str, Any] | None:
+        item = self._micro_batch_item(req, spec, model, messages)
+        if item is None:
+            return None
+        return await self._batcher.asubmit(item.group_key, item, self._arun_micro_batch)
+
+    def _plan_micro_batch(self, items: List[_MicroBatchItem]) -> _MicroBatchPlan:
+        first = items[0]
+        ids = _micro_batch_ids(items)
+        schema = {
+            "type": "object",
+            "required": ["items"],
+            "properties": {
+                "items": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "required": ["id", "output"],
+                        "properties": {"id": {"type": "string"}, "output": first.spec.output_schema},
+                    },
+                }
+            },
+        }
+        messages = [
+            {
+                "role": "system",
+                "content": (
+                    MICRO_BATCH_SYSTEM_PROMPT + "\n\n" + first.system
+                    + f"\n\nSCHEMA:\n{json.dumps(schema, ensure_ascii=False)}"
+                ),
+            },
+            {"role": "user", "content": "\n\n".join(f"### id: {i}\n{item.user}" for i, item in zip(ids, items))},
+        ]
+        max_tokens = (first.spec.model.get("max_tokens") or 0) * len(items) or None
+        separate_tokens = sum(
+            count_message_tokens([{"role": "system", "content": it.system}, {"role": "user", "content": it.user}], first.model)
+            for it in items
+        )
+        return _MicroBatchPlan(
+            items=items,
+            ids=ids,
+            req=LLMRequest(prompt_id=f"microbatch:{first.spec.id}", variables={}),
+            client=self._client_for(model=first.model, temperature=first.temperature, max_tokens=max_tokens),
+            model=first.model,
+            messages=messages,
+            separate_tokens=separate_tokens,
+        )
+
+    def _finish_micro_batch(self, plan: _MicroBatchPlan, resp: LLMResponse, started: float) -> List[Dict[str, Any] | None]:
+        try:
+            data = tolerant_loads(resp.text)
+        except ValueError:
+            data = {}
+        entries = data.get("items") if isinstance(data, dict) else data
+        outputs: Dict[str, Any] = {}
+        if isinstance(entries, list):
+            for entry in entries:
+                if isinstance(entry, dict) and "id" in entry:
+                    outputs[str(entry["id"])] = entry.get("output")
+
+        results = [self._validate_member(item.spec, outputs.get(item_id)) for item_id, item in zip(plan.ids, plan.items)]
+        failed = [item_id for item_id, r in zip(plan.ids, results) if r is None]
+
+        usage = resp.usage or {}
+        batch_tokens = usage.get("input_tokens") or count_message_tokens(plan.messages, plan.model)
+        # quanto o primeiro item esperou a janela fechar
+        wait_ms = (started - min(it.enqueued_at for it in plan.items)) * 1000
+        self._record_micro(
+            batches=1,
+            items=len(plan.items),
+            fallbacks=len(failed),
+            input_tokens=batch_tokens,
+            input_tokens_separate_est=plan.separate_tokens,
+            wait_ms=wait_ms,
+        )
+        log.info(
+            "llm_micro_batch_ok",
+            prompt_id=plan.items[0].spec.id,
+            correlation_ids=plan.ids,
+            size=len(plan.items),
+            failed=failed,
+            input_tokens=batch_tokens,
+            input_tokens_separate_est=plan.separate_tokens,
+            input_tokens_saved_est=plan.separate_tokens - batch_tokens,
+            wait_ms=round(wait_ms, 1),
+            latency_ms=round((time.perf_counter() - started) * 1000, 1),
+        )
+        return results
+
+    def _run_micro_batch(self, items: List[_MicroBatchItem]) -> List[Dict[str, Any] | None]:
+        if len(items) == 1:
+            self._record_micro(singletons=1)
+            return [None]
+        plan = self._plan_micro_batch(items)
+        started = time.perf_counter()
+        try:
+            resp = self._invoke(plan.client, plan.model, plan.messages, plan.req)
+        except PermanentError as e:
+            # ex.: o lote estourou o contexto; cada item ainda cabe sozinho
+            log.warning("llm_micro_batch_rejected", prompt_id=plan.items[0].spec.id, size=len(items), error=str(e))
+            self._record_micro(batches=1, items=len(items), fallbacks=len(items))
+            return [None] * len(items)
+        return self._finish_micro_batch(plan, resp, started)
+
+    async def _arun_micro_batch(self, items: List[_MicroBatchItem]) -> List[Dict[str, Any] | None]:
+        if len(items) == 1:
+            self._record_micro(singletons=1)
+            return [None]
+        plan = self._plan_micro_batch(items)
+        started = time.perf_counter()
+        try:
+            resp = await self._ainvoke(plan.client, plan.model, plan.messages, plan.req)
+        except PermanentError as e:
+            log.warning("llm_micro_batch_rejected", prompt_id=plan.items[0].spec.id, size=len(items), error=str(e))
+            self._record_micro(batches=1, items=len(items), fallbacks=len(items))
+            return [None] * len(items)
+        return self._finish_micro_batch(plan, resp, started)
+
+    def batch_request(self, req: LLMRequest, custom_id: str) -> Dict[str, Any]:
+        spec = self._registry.get(req.prompt_id)
+        body: Dict[str, Any] = {
+            "model": req.model or spec.model.get("name") or self._default_model,
+            "messages": self._registry.render_messages(req.prompt_id, req.variables),
+            "temperature": req.temperature if req.temperature is not None else spec.model.get("temperature", self._default_temperature),
+        }
+        if spec.model.get("max_tokens"):
+            body["max_tokens"] = spec.model["max_tokens"]
+        return {"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}
+
+    def complete_batch_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        body = request["body"]
+        req = LLMRequest(prompt_id=f"batch:{request['custom_id']}", variables={})
+        client = self._client_for(
+            model=body["model"],
+            temperature=body.get("temperature", self._default_temperature),
+            max_tokens=body.get("max_tokens"),
+        )
+        out: Dict[str, Any] = {"id": f"local-{request['custom_id']}", "custom_id": request["custom_id"]}
+        try:
+            resp = self._invoke(client, body["model"], body["messages"], req)
+        except (PermanentError, TransientError) as e:
+            out.update(response=None, error={"code": type(e).__name__, "message": str(e)})
+            return out
+
+        # mesmo formato da saída da Batch API
+        usage = resp.usage or {}
+        out["response"] = {
+            "status_code": 200,
+            "body": {
+                "model": resp.model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": resp.text}}],
+                "usage": {
+                    "prompt_tokens": usage.get("input_tokens", 0),
+                    "completion_tokens": usage.get("output_tokens", 0),
+                    "total_tokens": usage.get("total_tokens", 0),
+                },
+            },
+        }
+        out["error"] = None
+        return out
+
+    def parse_structured(self, prompt_id: str, text: str, correlation_id: str | None = None) -> Dict[str, Any] | None:
+        spec = self._registry.get(prompt_id)
+        req = LLMRequest(prompt_id=prompt_id, variables={}, correlation_id=correlation_id)
+        if not spec.output_schema:
+            try:
+                return _extract_json(text)
+            except Exception:
+                return {"value": text}
+        return self._parse_and_validate(text, spec, req)
+
+    def _plan_fused(self, prompt_ids: List[str], variables: Dict[str, Any], correlation_id: str | None) -> _FusedPlan:
+        req = LLMRequest(prompt_id="fused:" + "+".join(prompt_ids), variables=variables, correlation_id=correlation_id)
+        model = self._default_model
+        plan = _FusedPlan(req=req, cached={}, pending=[], keys={}, separate_tokens=0, model=model)
+
+        system_parts: List[str] = []
+        user_parts: List[tuple[str, str]] = []
+        for pid in prompt_ids:
+            spec = self._registry.get(pid)
+            self._schemas.model_for(spec)
+            temperature = spec.model.get("temperature", self._default_temperature)
+            rendered = self._registry.render_messages(pid, variables)
+
+            key = self._cache_key("structured", spec, model, temperature, rendered)
+            cached = self._cache_get(key, LLMRequest(prompt_id=pid, variables=variables, correlation_id=correlation_id))
+            if cached is not None:
+                plan.cached[pid] = cached
+                continue
+
+            plan.keys[pid] = key
+            plan.pending.append(spec)
+            plan.separate_tokens += count_message_tokens(rendered, model)
+            system_parts.append(
+                f"### {pid}\n" + "\n".join(m["content"].strip() for m in rendered if m["role"] == "system")
+            )
+            user_parts.append((pid, "\n".join(m["content"].strip() for m in rendered if m["role"] != "system")))
+
+        if not plan.pending:
+            return plan
+
+        schema = {
+            "type": "object",
+            "required": [spec.id for spec in plan.pending],
+            "properties": {spec.id: spec.output_schema for spec in plan.pending},
+        }
+        # a entrada só é enviada uma vez quando todos os prompts renderizam o mesmo texto de usuário
+        if len({text for _, text in user_parts}) == 1:
+            user = user_parts[0][1]
+        else:
+            user = "\n\n".join(f"### {pid}\n{text}" for pid, text in user_parts)
+
+        plan.messages = [
+            {
+                "role": "system",
+                "content": (
+                    FUSED_SYSTEM_PROMPT + "\n\n" + "\n\n".join(system_parts)
+                    + f"\n\nSCHEMA:\n{json.dumps(schema, ensure_ascii=False)}"
+                ),
+            },
+            {"role": "user", "content": user},
+        ]
+        max_tokens = sum(spec.model.get("max_tokens") or 0 for spec in plan.pending) or None
+        temperature = min(spec.model.get("temperature", self._default_temperature) for spec in plan.pending)
+        plan.client = self._client_for(model=model, temperature=temperature, max_tokens=max_tokens)
+        return plan
+
+    def _finish_fused(self, plan: _FusedPlan, resp: LLMResponse, started: float) -> FusedResponse:
+        try:
+            data = _extract_json(resp.text)
+        except ValueError:
+            try:
+                data = tolerant_loads(resp.text)
+            except ValueError:
+                data = {}
+        if not isinstance(data, dict):
+            data = {}
+
+        sections = dict(plan.cached)
+        failed: List[str] = []
+        for spec in plan.pending:
+            value = self._validate_member(spec, data.get(spec.id))
+            if value is None:
+                failed.append(spec.id)
+                continue
+            sections[spec.id] = value
+            self._cache_set(plan.keys[spec.id], value)
+
+        usage = resp.usage or {}
+        fused_tokens = usage.get("input_tokens") or count_message_tokens(plan.messages, plan.model)
+        log.info(
+            "llm_fused_ok",
+            correlation_id=plan.req.correlation_id,
+            prompt_ids=[spec.id for spec in plan.pending],
+            cached=list(plan.cached),
+            failed=failed,
+            calls_saved=len(plan.pending) - 1 - len(failed),
+            input_tokens=fused_tokens,
+            input_tokens_separate_est=plan.separate_tokens,
+            input_tokens_saved_est=plan.separate_tokens - fused_tokens,
+            latency_ms=round((time.perf_counter() - started) * 1000, 1),
+        )
+        return FusedResponse(sections=sections, failed=failed, usage=resp.usage)
+
+    def invoke_fused(self, prompt_ids: List[str], variables: Dict[str, Any], correlation_id: str | None = None) -> FusedResponse:
+        plan = self._plan_fused(prompt_ids, variables, correlation_id)
+        if not plan.pending:
+            return FusedResponse(sections=plan.cached, failed=[])
+
+        started = time.perf_counter()
+        resp = self._invoke(plan.client, plan.model, plan.messages, plan.req)
+        return self._finish_fused(plan, resp, started)
+
+    async def ainvoke_fused(self, prompt_ids: List[str], variables: Dict[str, Any], correlation_id: str | None = None) -> FusedResponse:
+        plan = self._plan_fused(prompt_ids, variables, correlation_id)
+        if not plan.pending:
+            return FusedResponse(sections=plan.cached, failed=[])
+
+        started = time.perf_counter()
+        resp = await self._ainvoke(plan.client, plan.model, plan.messages, plan.req)
+        return self._finish_fused(plan, resp, started)
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping
+
+import structlog
+
+log = structlog.get_logger()
+
+# "6m0s", "1s", "20ms", "1h2m3.5s"
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+# espera máxima entre reavaliações quando não há previsão (slot de concorrência)
+_POLL_SECONDS = 0.05
+
+
+def parse_duration(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+
+
+def retry_after_seconds(headers: Mapping[str, Any] | None) -> float | None:
+    if not headers:
+        return None
+    h = {str(k).lower(): v for k, v in headers.items()}
+    if h.get("retry-after-ms"):
+        try:
+            return float(h["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    return parse_duration(h.get("retry-after"))
+
+
+class _TokenBucket:
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_for(self, cost: float) -> float:
+        cost = min(cost, self.capacity)
+        if self.level >= cost:
+            return 0.0
+        return (cost - self.level) / self.rate
+
+
+@dataclass(frozen=True)
+class Permit:
+    estimated_tokens: int
+
+
+class AdaptiveRateLimiter:
+    """
+    Limitador client-side para a API da OpenAI: token buckets de
+    requisições/min e tokens/min mais um teto de concorrência ajustado em
+    AIMD (+1 a cada `limit` sucessos, ×decrease_factor a cada 429).
+    Os headers x-ratelimit-* ressincronizam os buckets com o orçamento
+    real da organização, que é compartilhado entre as réplicas.
+    rpm/tpm = 0 desliga o respectivo bucket.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        decrease_factor: float = 0.5,
+        decrease_cooldown_seconds: float = 1.0,
+    ):
+        self._rpm = _TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tpm = _TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._max_concurrency = max_concurrency
+        self._min_concurrency = min_concurrency
+        self._decrease_factor = decrease_factor
+        self._decrease_cooldown_seconds = decrease_cooldown_seconds
+
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self._limit = float(max_concurrency)
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._avg_cost = 0.0
+
+        self._acquired_total = 0
+        self._throttled_total = 0
+        self._rate_limited_total = 0
+        self._wait_seconds_total = 0.0
+
+    # --- aquisição -------------------------------------------------------
+
+    def _try_acquire(self, cost: int) -> float | None:
+        """0 = adquirido; >0 = segundos até tentar de novo; None = sem slot."""
+        now = time.monotonic()
+        if self._paused_until > now:
+            return self._paused_until - now
+        if self._in_flight >= int(self._limit):
+            return None
+
+        wait = 0.0
+        for bucket, amount in ((self._rpm, 1), (self._tpm, cost)):
+            if bucket is not None:
+                bucket.refill(now)
+                wait = max(wait, bucket.wait_for(amount))
+        if wait > 0:
+            return wait
+
+        if self._rpm is not None:
+            self._rpm.level -= 1
+        if self._tpm is not None:
+            self._tpm.level -= min(cost, self._tpm.capacity)
+        self._in_flight += 1
+        self._acquired_total += 1
+        self._avg_cost = cost if not self._avg_cost else 0.9 * self._avg_cost + 0.1 * cost
+        return 0.0
+
+    def acquire(self, estimated_tokens: int) -> Permit:
+        started = time.monotonic()
+        with self._released:
+            while True:
+                wait = self._try_acquire(estimated_tokens)
+                if wait == 0.0:
+                    break
+                self._released.wait(timeout=wait if wait is not None else _POLL_SECONDS)
+        return self._permit(estimated_tokens, started)
+
+    async def aacquire(self, estimated_tokens: int) -> Permit:
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                wait = self._try_acquire(estimated_tokens)
+            if wait == 0.0:
+                break
+            await asyncio.sleep(min(wait, 1.0) if wait is not None else _POLL_SECONDS)
+        return self._permit(estimated_tokens, started)
+
+    def _permit(self, estimated_tokens: int, started: float) -> Permit:
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            with self._lock:
+                self._throttled_total += 1
+                self._wait_seconds_total += waited
+        return Permit(estimated_tokens=estimated_tokens)
+
+    # --- feedback --------------------------------------------------------
+
+    def release(
+        self,
+        permit: Permit,
+        actual_tokens: int | None = None,
+        headers: Mapping[str, Any] | None = None,
+    ) -> None:
+        """Sucesso: devolve a sobra estimada e faz o aumento aditivo."""
+        with self._released:
+            self._in_flight -= 1
+            if self._tpm is not None and actual_tokens is not None:
+                # estimativa usa max_tokens inteiro; devolve o que não foi gasto
+                self._tpm.level = min(self._tpm.capacity, self._tpm.level + permit.estimated_tokens - actual_tokens)
+            self._limit = min(float(self._max_concurrency), self._limit + 1.0 / max(self._limit, 1.0))
+            self._sync_headers(headers)
+            self._released.notify_all()
+
+    def release_rate_limited(self, permit: Permit, headers: Mapping[str, Any] | None = None) -> None:
+        """429: corte multiplicativo e pausa global até o retry-after."""
+        now = time.monotonic()
+        retry_after = retry_after_seconds(headers)
+        with self._released:
+            self._in_flight -= 1
+            self._rate_limited_total += 1
+            # vários 429 da mesma rajada contam como um único sinal
+            if now - self._last_decrease >= self._decrease_cooldown_seconds:
+                self._limit = max(float(self._min_concurrency), self._limit * self._decrease_factor)
+                self._last_decrease = now
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            self._sync_headers(headers)
+            self._released.notify_all()
+            limit, paused = self._limit, max(self._paused_until - now, 0.0)
+        log.warning("llm_rate_limited", concurrency_limit=round(limit, 2), paused_seconds=round(paused, 3))
+
+    def release_failed(self, permit: Permit) -> None:
+        with self._released:
+            self._in_flight -= 1
+            self._released.notify_all()
+
+    def _sync_headers(self, headers: Mapping[str, Any] | None) -> None:
+        if not headers:
+            return
+        h = {str(k).lower(): v for k, v in headers.items()}
+        for bucket, key in ((self._rpm, "requests"), (self._tpm, "tokens")):
+            remaining = h.get(f"x-ratelimit-remaining-{key}")
+            if bucket is None or remaining is None:
+                continue
+            try:
+                bucket.level = min(bucket.level, float(remaining))
+            except ValueError:
+                continue
+
+    # --- backpressure ----------------------------------------------------
+
+    def wait_seconds(self) -> float:
+        """Quanto falta para caber uma chamada típica; o loop do SQS pausa enquanto > 0."""
+        now = time.monotonic()
+        with self._lock:
+            wait = max(self._paused_until - now, 0.0)
+            for bucket, amount in ((self._rpm, 1), (self._tpm, self._avg_cost)):
+                if bucket is not None:
+                    bucket.refill(now)
+                    wait = max(wait, bucket.wait_for(amount))
+            return wait
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "concurrency_limit": round(self._limit, 2),
+                "in_flight": self._in_flight,
+                "rpm_available": round(self._rpm.level, 1) if self._rpm is not None else None,
+                "tpm_available": round(self._tpm.level, 1) if self._tpm is not None else None,
+                "acquired_total": self._acquired_total,
+                "throttled_total": self._throttled_total,
+                "rate_limited_total": self._rate_limited_total,
+                "wait_seconds_total": round(self._wait_seconds_total, 3),
+            }
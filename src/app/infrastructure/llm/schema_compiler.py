@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+from typing import Annotated, Any, Dict, List, Literal, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, create_model
+
+from app.domain.errors import PermanentError
+from app.prompts.registry import PromptSpec
+
+_SCALARS: Dict[str, Any] = {
+    "string": str,
+    "number": float,
+    "integer": int,
+    "boolean": bool,
+    "null": type(None),
+}
+
+# palavra-chave JSON Schema -> argumento do pydantic.Field
+_CONSTRAINTS = {
+    "minLength": "min_length",
+    "maxLength": "max_length",
+    "pattern": "pattern",
+    "minimum": "ge",
+    "maximum": "le",
+    "exclusiveMinimum": "gt",
+    "exclusiveMaximum": "lt",
+    "minItems": "min_length",
+    "maxItems": "max_length",
+}
+
+_IDENTIFIER = re.compile(r"^[A-Za-z][A-Za-z0-9_]*$")
+
+
+def compile_schema(name: str, schema: Dict[str, Any]) -> Type[BaseModel]:
+    """
+    Converte um JSON Schema (subset usado nos YAMLs) num model pydantic:
+    required/opcionais, objetos aninhados, arrays tipados, enum/const,
+    anyOf/oneOf, tipos nulláveis e constraints numéricas/de tamanho.
+    """
+    if schema.get("type") != "object":
+        raise PermanentError("Only 'type: object' schemas are supported")
+
+    return _object_model(_model_name(name), schema)
+
+
+def _model_name(name: str) -> str:
+    return "".join(part.capitalize() for part in re.split(r"[^A-Za-z0-9]+", name) if part) or "Output"
+
+
+def _object_model(name: str, schema: Dict[str, Any]) -> Type[BaseModel]:
+    props: Dict[str, Any] = schema.get("properties", {})
+    required = set(schema.get("required", []))
+    additional = schema.get("additionalProperties", True)
+
+    unknown = required - set(props)
+    if unknown:
+        raise PermanentError(f"schema {name} requires undeclared properties: {sorted(unknown)}")
+
+    fields: Dict[str, Tuple[Any, Any]] = {}
+    for i, (key, spec) in enumerate(props.items()):
+        annotation = _annotation(f"{name}_{_model_name(key)}", spec)
+
+        field_name = key
+        alias = None
+        if not _IDENTIFIER.match(key) or hasattr(BaseModel, key):
+            field_name, alias = f"field_{i}", key
+
+        if key in required:
+            fields[field_name] = (annotation, Field(..., alias=alias))
+        else:
+            fields[field_name] = (Optional[annotation], Field(spec.get("default"), alias=alias))
+
+    config = ConfigDict(extra="forbid" if additional is False else "ignore", populate_by_name=True)
+    return create_model(name, __config__=config, **fields)
+
+
+def _annotation(name: str, spec: Dict[str, Any]) -> Any:
+    base = _base_annotation(name, spec)
+    constraints = {arg: spec[kw] for kw, arg in _CONSTRAINTS.items() if kw in spec}
+    if constraints:
+        return Annotated[base, Field(**constraints)]
+    return base
+
+
+def _base_annotation(name: str, spec: Dict[str, Any]) -> Any:
+    if "$ref" in spec:
+        raise PermanentError(f"schema {name}: $ref is not supported")
+
+    if "enum" in spec:
+        return Literal[tuple(spec["enum"])]
+
+    if "const" in spec:
+        return Literal[spec["const"]]
+
+    for combinator in ("anyOf", "oneOf"):
+        if combinator in spec:
+            options = tuple(_annotation(f"{name}{i}", s) for i, s in enumerate(spec[combinator]))
+            return Union[options]
+
+    t = spec.get("type")
+    if isinstance(t, list):
+        options = tuple(_base_annotation(name, {**spec, "type": one}) for one in t)
+        return Union[options]
+
+    if t == "object":
+        if "properties" in spec:
+            return _object_model(name, spec)
+        return Dict[str, Any]
+
+    if t == "array":
+        items = spec.get("items")
+        if not items:
+            return List[Any]
+        return List[_annotation(f"{name}Item", items)]
+
+    if t is None:
+        return Any
+
+    try:
+        return _SCALARS[t]
+    except KeyError as e:
+        raise PermanentError(f"schema {name}: unsupported type {t!r}") from e
+
+
+def _fingerprint(schema: Any) -> str:
+    return hashlib.sha1(json.dumps(schema, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class SchemaCompiler:
+    """
+    Compila cada output_schema uma única vez por conteúdo: editar o schema no
+    YAML sem subir a versão (hot reload) recompila na próxima chamada. Guarda
+    só a compilação mais recente de cada prompt.
+    """
+
+    def __init__(self) -> None:
+        self._models: Dict[str, Tuple[str, Type[BaseModel]]] = {}
+        self._properties: Dict[Tuple[str, str], Tuple[str, Optional[TypeAdapter]]] = {}
+        # id(output_schema) -> (schema, fingerprint); o spec é imutável, só muda no reload
+        self._fingerprints: Dict[int, Tuple[Any, str]] = {}
+        self._lock = threading.Lock()
+
+    def model_for(self, spec: PromptSpec) -> Type[BaseModel]:
+        fingerprint = self._fingerprint_of(spec)
+        cached = self._models.get(spec.id)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
+        if not isinstance(spec.output_schema, dict):
+            raise PermanentError(f"prompt {spec.id} output_schema missing json_schema")
+
+        Model = compile_schema(spec.id, spec.output_schema)
+        with self._lock:
+            self._models[spec.id] = (fingerprint, Model)
+        return Model
+
+    def validate(self, spec: PromptSpec, data: Any) -> Dict[str, Any]:
+        return self.model_for(spec).model_validate(data).model_dump(by_alias=True)
+
+    def property_adapter(self, spec: PromptSpec, key: str) -> Optional[TypeAdapter]:
+        """Validador de um único campo (parse em streaming); None se o campo não é declarado."""
+        fingerprint = self._fingerprint_of(spec)
+        cached = self._properties.get((spec.id, key))
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
+        prop = ((spec.output_schema or {}).get("properties") or {}).get(key)
+        adapter = None
+        if prop is not None:
+            adapter = TypeAdapter(_annotation(f"{_model_name(spec.id)}_{_model_name(key)}", prop))
+        with self._lock:
+            self._properties[(spec.id, key)] = (fingerprint, adapter)
+        return adapter
+
+    def _fingerprint_of(self, spec: PromptSpec) -> str:
+        schema = spec.output_schema
+        cached = self._fingerprints.get(id(schema))
+        # compara o objeto: o id pode ser reaproveitado depois que o schema antigo some
+        if cached is not None and cached[0] is schema:
+            return cached[1]
+        fingerprint = _fingerprint(schema)
+        with self._lock:
+            if len(self._fingerprints) > 1024:
+                self._fingerprints.clear()
+            self._fingerprints[id(schema)] = (schema, fingerprint)
+        return fingerprint
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Optional
+
+from app.infrastructure.llm.json_repair import tolerant_loads
+
+PENDING = "pending"
+COMPLETE = "complete"
+ABORTED = "aborted"
+
+# texto antes do '{' que ainda tratamos como preâmbulo ("Claro! ```json")
+MAX_PREAMBLE_CHARS = 500
+
+
+class StreamingJsonParser:
+    """
+    Recebe a resposta do LLM em pedaços e acompanha o primeiro objeto JSON:
+    cada membro de nível 1 é parseado assim que a vírgula (ou o '}') chega e
+    passa por `check_member(chave, valor)`, que devolve o motivo quando o
+    valor já viola o schema. O estado vira COMPLETE quando o objeto fecha e
+    ABORTED na primeira violação clara — nos dois casos o resto do stream
+    pode ser descartado.
+    """
+
+    def __init__(
+        self,
+        check_member: Optional[Callable[[str, Any], Optional[str]]] = None,
+        max_preamble_chars: int = MAX_PREAMBLE_CHARS,
+    ):
+        self._check_member = check_member
+        self._max_preamble_chars = max_preamble_chars
+        self._buf = ""
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._end: Optional[int] = None
+        self._member_start = 0
+        self._depth = 0
+        self._quote: Optional[str] = None
+        self._escaped = False
+        self.state = PENDING
+        self.abort_reason: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return self._buf
+
+    @property
+    def object_text(self) -> Optional[str]:
+        if self._start is None or self._end is None:
+            return None
+        return self._buf[self._start:self._end]
+
+    def feed(self, chunk: str) -> str:
+        if self.state != PENDING or not chunk:
+            return self.state
+        self._buf += chunk
+        buf = self._buf
+        for i in range(self._pos, len(buf)):
+            ch = buf[i]
+            if self._start is None:
+                self._before_object(ch, i)
+            elif self._quote is not None:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == self._quote:
+                    self._quote = None
+            elif ch in "\"'":
+                self._quote = ch
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._member_done(i)
+                    if self.state == PENDING:
+                        self._end = i + 1
+                        self.state = COMPLETE
+            elif ch == "," and self._depth == 1:
+                self._member_done(i)
+                self._member_start = i + 1
+            if self.state != PENDING:
+                break
+        self._pos = len(buf)
+        return self.state
+
+    def _before_object(self, ch: str, i: int) -> None:
+        if ch == "{":
+            self._start, self._depth, self._member_start = i, 1, i + 1
+        elif ch == "[":
+            self._abort("top-level array where an object was expected")
+        elif i >= self._max_preamble_chars:
+            self._abort(f"no JSON object in the first {self._max_preamble_chars} chars")
+
+    def _member_done(self, end: int) -> None:
+        segment = self._buf[self._member_start:end].strip()
+        if not segment or self._check_member is None:
+            return
+        try:
+            member = tolerant_loads("{" + segment + "}")
+        except ValueError:
+            # sintaxe estranha não é violação clara: o reparo local decide no fim
+            return
+        if not isinstance(member, dict):
+            return
+        for key, value in member.items():
+            reason = self._check_member(key, value)
+            if reason:
+                self._abort(f"{key}: {reason}")
+                return
+
+    def _abort(self, reason: str) -> None:
+        self.state = ABORTED
+        self.abort_reason = reason
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import structlog
+
+from app.application.ports.tokenizer import TokenizerPort
+
+log = structlog.get_logger()
+
+# overhead aproximado por mensagem no formato chat (role + separadores)
+MESSAGE_OVERHEAD_TOKENS = 4
+_CHARS_PER_TOKEN = 4
+# depois de uma falha ao carregar o BPE, a próxima tentativa espera isso
+ENCODING_RETRY_SECONDS = 300.0
+
+# só os sucessos ficam em cache: uma falha de rede no startup não pode
+# deixar o processo inteiro na heurística
+_encodings: Dict[Optional[str], Any] = {}
+_failed_at: Dict[Optional[str], float] = {}
+_encodings_lock = threading.Lock()
+
+
+def _load_encoding(model: Optional[str]) -> Any:
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model or "")
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # sem o arquivo BPE em cache (ambiente offline): cai para a heurística
+        log.warning("tokenizer_unavailable", model=model, error=str(e), retry_in_s=ENCODING_RETRY_SECONDS)
+        return None
+
+
+def _encoding(model: Optional[str]) -> Any:
+    enc = _encodings.get(model)
+    if enc is not None:
+        return enc
+    with _encodings_lock:
+        if model in _encodings:
+            return _encodings[model]
+        failed_at = _failed_at.get(model)
+        if failed_at is not None and time.monotonic() - failed_at < ENCODING_RETRY_SECONDS:
+            return None
+        enc = _load_encoding(model)
+        if enc is None:
+            _failed_at[model] = time.monotonic()
+        else:
+            _encodings[model] = enc
+            _failed_at.pop(model, None)
+        return enc
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    enc = _encoding(model)
+    if enc is None:
+        return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: List[Dict[str, str]], model: Optional[str] = None) -> int:
+    return sum(count_tokens(m["content"], model) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+TRUNCATION_MARKER = "\n[... {omitted} tokens omitidos ...]\n"
+# reserva para o marcador, que também entra no orçamento
+_MARKER_TOKENS = 16
+
+
+class LocalTokenizer(TokenizerPort):
+    """Contagem e corte com o BPE do modelo (tiktoken); offline, na heurística de caracteres."""
+
+    def __init__(self, model: Optional[str] = None):
+        self._model = model
+
+    def count(self, text: str) -> int:
+        return count_tokens(text, self._model)
+
+    def truncate(self, text: str, max_tokens: int, head_ratio: float = 0.7) -> str:
+        enc = _encoding(self._model)
+        ids = enc.encode(text, disallowed_special=()) if enc is not None else None
+        total = len(ids) if ids is not None else count_tokens(text, self._model)
+        if total <= max_tokens:
+            return text
+
+        keep = max(max_tokens - _MARKER_TOKENS, 0)
+        head = int(keep * head_ratio)
+        tail = keep - head
+        marker = TRUNCATION_MARKER.format(omitted=total - keep)
+        if ids is None:
+            head_text = text[: head * _CHARS_PER_TOKEN]
+            tail_text = text[len(text) - tail * _CHARS_PER_TOKEN:] if tail else ""
+        else:
+            # corte no meio de um caractere multibyte vira U+FFFD na borda
+            head_text = enc.decode(ids[:head]).rstrip("\ufffd")
+            tail_text = enc.decode(ids[-tail:]).lstrip("\ufffd") if tail else ""
+        return head_text.rstrip() + marker + tail_text.lstrip()
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, List, Set
+
+from app.application.ports.queue import QueuePort, QueueMessage
+
+EMPTY_POLL_SECONDS = 0.01
+
+
+@dataclass
+class _StoredMessage:
+    message_id: str
+    body: str
+    sent_at: float
+    visible_at: float = 0.0
+    receive_count: int = 0
+    receipt_handle: str | None = None
+
+
+class InMemoryQueueAdapter(QueuePort):
+    """
+    Fila em memória com a semântica de visibilidade do SQS (receipt handle
+    por recebimento, reentrega após o timeout). Usada em testes locais e
+    benchmarks; `fail_receipts` permite simular falhas por entrada nos batches.
+    """
+
+    def __init__(self, fail_receipts: Set[str] | None = None):
+        self.fail_receipts: Set[str] = fail_receipts or set()
+        self._messages: Dict[str, _StoredMessage] = {}
+        self._by_receipt: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.deleted: List[str] = []
+
+    def send(self, body: str) -> str:
+        message_id = str(uuid.uuid4())
+        with self._lock:
+            self._messages[message_id] = _StoredMessage(message_id=message_id, body=body, sent_at=time.time())
+        return message_id
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._messages)
+
+    def receive(self, max_messages: int, wait_time_seconds: int, visibility_timeout: int) -> List[QueueMessage]:
+        deadline = time.monotonic() + wait_time_seconds
+        while True:
+            out = self._receive_now(max_messages, visibility_timeout)
+            if out:
+                return out
+            # simula o round trip de um poll vazio
+            time.sleep(EMPTY_POLL_SECONDS)
+            if time.monotonic() >= deadline:
+                return out
+
+    def _receive_now(self, max_messages: int, visibility_timeout: int) -> List[QueueMessage]:
+        now = time.monotonic()
+        out: List[QueueMessage] = []
+        with self._lock:
+            for stored in self._messages.values():
+                if len(out) >= max_messages:
+                    break
+                if stored.visible_at > now:
+                    continue
+
+                if stored.receipt_handle is not None:
+                    self._by_receipt.pop(stored.receipt_handle, None)
+                stored.receipt_handle = str(uuid.uuid4())
+                stored.visible_at = now + visibility_timeout
+                stored.receive_count += 1
+                self._by_receipt[stored.receipt_handle] = stored.message_id
+
+                out.append(
+                    QueueMessage(
+                        message_id=stored.message_id,
+                        receipt_handle=stored.receipt_handle,
+                        body=stored.body,
+                        attributes={
+                            "attributes": {
+                                "SentTimestamp": str(int(stored.sent_at * 1000)),
+                                "ApproximateReceiveCount": str(stored.receive_count),
+                            },
+                            "message_attributes": {},
+                        },
+                    )
+                )
+        return out
+
+    def delete(self, receipt_handle: str) -> None:
+        with self._lock:
+            message_id = self._by_receipt.pop(receipt_handle, None)
+            if message_id is not None:
+                self._messages.pop(message_id, None)
+                self.deleted.append(message_id)
+
+    def delete_batch(self, receipt_handles: List[str]) -> List[str]:
+        failed: List[str] = []
+        for r in receipt_handles:
+            if r in self.fail_receipts:
+                failed.append(r)
+                continue
+            self.delete(r)
+        return failed
+
+    def change_visibility(self, receipt_handle: str, timeout_seconds: int) -> None:
+        with self._lock:
+            message_id = self._by_receipt.get(receipt_handle)
+            if message_id is not None:
+                self._messages[message_id].visible_at = time.monotonic() + timeout_seconds
+
+    def change_visibility_batch(self, receipt_handles: List[str], timeout_seconds: int) -> List[str]:
+        failed: List[str] = []
+        for r in receipt_handles:
+            if r in self.fail_receipts:
+                failed.append(r)
+                continue
+            self.change_visibility(r, timeout_seconds)
+        return failed
+
+    async def areceive(self, max_messages: int, wait_time_seconds: int, visibility_timeout: int) -> List[QueueMessage]:
+        deadline = time.monotonic() + wait_time_seconds
+        while True:
+            out = self._receive_now(max_messages, visibility_timeout)
+            if out:
+                return out
+            await asyncio.sleep(EMPTY_POLL_SECONDS)
+            if time.monotonic() >= deadline:
+                return out
+
+    async def adelete(self, receipt_handle: str) -> None:
+        self.delete(receipt_handle)
+
+    async def achange_visibility(self, receipt_handle: str, timeout_seconds: int) -> None:
+        self.change_visibility(receipt_handle, timeout_seconds)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+from typing import ContextManager, Dict, Mapping, Optional, Sequence, Tuple
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server
+
+from app.application.ports.metrics import MetricsPort
+
+# USD por 1M tokens (entrada, saída); sobrescrito por METRICS_MODEL_PRICES
+DEFAULT_MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+
+LLM_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+STREAM_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+NODE_LATENCY_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+LEASE_EXTENSION_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21)
+MESSAGE_LATENCY_BUCKETS = (0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 900.0)
+
+
+class PrometheusMetrics(MetricsPort):
+    """
+    Métricas no formato Prometheus em um CollectorRegistry próprio, expostas
+    por `serve()` num endpoint HTTP local (/metrics).
+    """
+
+    def __init__(self, model_prices: Optional[Mapping[str, Sequence[float]]] = None):
+        self._prices: Dict[str, Tuple[float, float]] = dict(DEFAULT_MODEL_PRICES)
+        for model, (price_in, price_out) in (model_prices or {}).items():
+            self._prices[model] = (float(price_in), float(price_out))
+
+        self.registry = CollectorRegistry()
+
+        self._llm_latency = Histogram(
+            "llm_request_duration_seconds",
+            "Latência das chamadas ao LLM",
+            ["prompt_id", "model", "status"],
+            buckets=LLM_LATENCY_BUCKETS,
+            registry=self.registry,
+        )
+        self._llm_tokens = Counter(
+            "llm_tokens",
+            "Tokens consumidos",
+            ["prompt_id", "model", "direction"],
+            registry=self.registry,
+        )
+        self._llm_cost = Counter(
+            "llm_cost_usd",
+            "Custo estimado em USD (tabela de preços por modelo)",
+            ["prompt_id", "model"],
+            registry=self.registry,
+        )
+        self._llm_ttft = Histogram(
+            "llm_time_to_first_token_seconds",
+            "Tempo até o primeiro token no modo streaming",
+            ["prompt_id", "model"],
+            buckets=STREAM_LATENCY_BUCKETS,
+            registry=self.registry,
+        )
+        self._llm_ttvo = Histogram(
+            "llm_time_to_valid_object_seconds",
+            "Tempo até o objeto JSON fechar e validar no modo streaming",
+            ["prompt_id", "model"],
+            buckets=STREAM_LATENCY_BUCKETS,
+            registry=self.registry,
+        )
+        self._llm_streams = Counter(
+            "llm_streams",
+            "Chamadas em streaming por desfecho (complete, aborted, incomplete)",
+            ["prompt_id", "outcome"],
+            registry=self.registry,
+        )
+        self._llm_retries = Counter(
+            "llm_retries",
+            "Novas tentativas após erro transitório",
+            ["prompt_id", "model"],
+            registry=self.registry,
+        )
+        self._llm_repairs = Counter(
+            "llm_repairs",
+            "Tentativas de reparo de JSON",
+            ["prompt_id", "outcome"],
+            registry=self.registry,
+        )
+        self._llm_hedges = Counter(
+            "llm_hedges",
+            "Requisições duplicadas contra a cauda de latência (fired, won, lost, denied)",
+            ["prompt_id", "outcome"],
+            registry=self.registry,
+        )
+        self._llm_pool_in_use = Gauge(
+            "llm_pool_connections_in_use",
+            "Requisições ao LLM ocupando conexão do pool httpx",
+            registry=self.registry,
+        )
+        self._llm_pool_waiting = Gauge(
+            "llm_pool_waiting",
+            "Requisições ao LLM esperando conexão livre (acima de max_connections)",
+            registry=self.registry,
+        )
+        self._node_latency = Histogram(
+            "graph_node_duration_seconds",
+            "Latência por nó do grafo",
+            ["node"],
+            buckets=NODE_LATENCY_BUCKETS,
+            registry=self.registry,
+        )
+        self._messages = Histogram(
+            "worker_message_processing_seconds",
+            "Tempo de processamento por mensagem",
+            ["outcome"],
+            buckets=MESSAGE_LATENCY_BUCKETS,
+            registry=self.registry,
+        )
+        self._receive_to_ack = Histogram(
+            "queue_receive_to_ack_seconds",
+            "Do SentTimestamp do SQS até o ack",
+            buckets=MESSAGE_LATENCY_BUCKETS,
+            registry=self.registry,
+        )
+        self._lease_extensions = Counter(
+            "queue_lease_extensions",
+            "Extensões de visibilidade pelo heartbeat (extended, failed, capped)",
+            ["outcome"],
+            registry=self.registry,
+        )
+        self._lease_age = Histogram(
+            "queue_lease_age_seconds",
+            "Idade do lease quando liberado ou cortado pelo teto",
+            buckets=MESSAGE_LATENCY_BUCKETS,
+            registry=self.registry,
+        )
+        self._lease_extensions_per_message = Histogram(
+            "queue_lease_extensions_per_message",
+            "Extensões por mensagem até o lease ser encerrado",
+            buckets=LEASE_EXTENSION_BUCKETS,
+            registry=self.registry,
+        )
+        self._leases_active = Gauge(
+            "queue_leases_active",
+            "Leases acompanhados pelo heartbeat",
+            registry=self.registry,
+        )
+        self._lease_oldest_age = Gauge(
+            "queue_lease_oldest_age_seconds",
+            "Idade do lease ativo mais antigo",
+            registry=self.registry,
+        )
+        self._capacity = Gauge(
+            "worker_capacity",
+            "Slots de processamento configurados",
+            registry=self.registry,
+        )
+        self._in_flight = Gauge(
+            "worker_in_flight",
+            "Mensagens em processamento",
+            registry=self.registry,
+        )
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> None:
+        start_http_server(port, addr=host, registry=self.registry)
+
+    def estimate_cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
+        price_in, price_out = self._prices.get(model, (0.0, 0.0))
+        return (input_tokens * price_in + output_tokens * price_out) / 1_000_000
+
+    def observe_llm_call(
+        self,
+        prompt_id: str,
+        model: str,
+        status: str,
+        latency_seconds: float,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+    ) -> None:
+        self._llm_latency.labels(prompt_id, model, status).observe(latency_seconds)
+        if input_tokens:
+            self._llm_tokens.labels(prompt_id, model, "input").inc(input_tokens)
+        if output_tokens:
+            self._llm_tokens.labels(prompt_id, model, "output").inc(output_tokens)
+        cost = self.estimate_cost(model, input_tokens, output_tokens)
+        if cost:
+            self._llm_cost.labels(prompt_id, model).inc(cost)
+
+    def observe_llm_stream(
+        self,
+        prompt_id: str,
+        model: str,
+        outcome: str,
+        time_to_first_token_seconds: Optional[float],
+        time_to_valid_object_seconds: Optional[float],
+    ) -> None:
+        self._llm_streams.labels(prompt_id, outcome).inc()
+        if time_to_first_token_seconds is not None:
+            self._llm_ttft.labels(prompt_id, model).observe(time_to_first_token_seconds)
+        if time_to_valid_object_seconds is not None:
+            self._llm_ttvo.labels(prompt_id, model).observe(time_to_valid_object_seconds)
+
+    def inc_llm_retry(self, prompt_id: str, model: str) -> None:
+        self._llm_retries.labels(prompt_id, model).inc()
+
+    def inc_llm_repair(self, prompt_id: str, outcome: str) -> None:
+        self._llm_repairs.labels(prompt_id, outcome).inc()
+
+    def inc_llm_hedge(self, prompt_id: str, outcome: str) -> None:
+        self._llm_hedges.labels(prompt_id, outcome).inc()
+
+    def set_llm_pool(self, in_use: int, waiting: int) -> None:
+        self._llm_pool_in_use.set(in_use)
+        self._llm_pool_waiting.set(waiting)
+
+    def observe_node(self, node: str, latency_seconds: float) -> None:
+        self._node_latency.labels(node).observe(latency_seconds)
+
+    def observe_message(
+        self,
+        outcome: str,
+        processing_seconds: float,
+        receive_to_ack_seconds: Optional[float] = None,
+    ) -> None:
+        self._messages.labels(outcome).observe(processing_seconds)
+        if receive_to_ack_seconds is not None:
+            self._receive_to_ack.observe(max(receive_to_ack_seconds, 0.0))
+
+    def inc_lease_extensions(self, outcome: str, count: int = 1) -> None:
+        self._lease_extensions.labels(outcome).inc(count)
+
+    def observe_lease(self, age_seconds: float, extensions: int) -> None:
+        self._lease_age.observe(age_seconds)
+        self._lease_extensions_per_message.observe(extensions)
+
+    def set_leases(self, active: int, oldest_age_seconds: float) -> None:
+        self._leases_active.set(active)
+        self._lease_oldest_age.set(oldest_age_seconds)
+
+    def set_worker_capacity(self, capacity: int) -> None:
+        self._capacity.set(capacity)
+
+    def track_in_flight(self) -> ContextManager[None]:
+        return self._in_flight.track_inprogress()
@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+import re
+
+
+def normalize_dsn(database_url: str) -> str:
+    """
+    DSN aceito pelo psycopg a partir de PG_DATABASE_URL, que pode vir no
+    formato SQLAlchemy (postgresql+psycopg://...).
+    """
+    return re.sub(r"^postgres(ql)?\+\w+://", "postgresql://", database_url)
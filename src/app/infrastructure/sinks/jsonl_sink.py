@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import List
+
+from app.application.ports.result_sink import ResultSinkPort, SinkRecord, SinkWriteResult
+
+
+class JsonlResultSink(ResultSinkPort):
+    """Append em arquivo local, uma linha por resultado; o lote só conta como gravado depois do fsync."""
+
+    def __init__(self, path: str | Path):
+        self._file = open(path, "ab")
+        self._lock = threading.Lock()
+
+    def write_batch(self, records: List[SinkRecord]) -> SinkWriteResult:
+        payload = b"".join(json.dumps(r.as_dict(), ensure_ascii=False).encode("utf-8") + b"\n" for r in records)
+        with self._lock:
+            self._file.write(payload)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        return SinkWriteResult()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+import threading
+from typing import List
+
+import psycopg
+from psycopg import sql
+
+from app.application.ports.result_sink import ResultSinkPort, SinkRecord, SinkWriteResult
+from app.domain.errors import TransientError
+from app.infrastructure.postgres import normalize_dsn
+
+_COLUMNS = ("message_id", "correlation_id", "intent", "output_text", "details")
+
+
+class PgResultSink(ResultSinkPort):
+    """
+    Grava os resultados no Postgres com COPY numa tabela temporária e um
+    INSERT ... ON CONFLICT DO NOTHING na mesma transação: o lote entra
+    inteiro ou não entra, e uma reentrega do mesmo message_id não duplica.
+    """
+
+    def __init__(self, database_url: str, table: str = "work_results"):
+        self._table = sql.Identifier(table)
+        self._conn = psycopg.connect(normalize_dsn(database_url))
+        self._lock = threading.Lock()
+        with self._conn.transaction():
+            self._conn.execute(
+                sql.SQL(
+                    "CREATE TABLE IF NOT EXISTS {t} ("
+                    "message_id text PRIMARY KEY, correlation_id text NOT NULL, intent text, "
+                    "output_text text NOT NULL, details jsonb NOT NULL DEFAULT '{{}}', "
+                    "created_at timestamptz NOT NULL DEFAULT now())"
+                ).format(t=self._table)
+            )
+
+    def write_batch(self, records: List[SinkRecord]) -> SinkWriteResult:
+        if not records:
+            return SinkWriteResult()
+
+        cols = sql.SQL(", ").join(map(sql.Identifier, _COLUMNS))
+        try:
+            with self._lock, self._conn.transaction(), self._conn.cursor() as cur:
+                cur.execute(
+                    sql.SQL("CREATE TEMP TABLE IF NOT EXISTS _results_stage (LIKE {t} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS").format(
+                        t=self._table
+                    )
+                )
+                with cur.copy(sql.SQL("COPY _results_stage ({c}) FROM STDIN").format(c=cols)) as copy:
+                    for r in records:
+                        row = r.as_dict()
+                        row["details"] = json.dumps(row["details"], ensure_ascii=False)
+                        copy.write_row(tuple(row[c] for c in _COLUMNS))
+                cur.execute(
+                    sql.SQL("INSERT INTO {t} ({c}) SELECT {c} FROM _results_stage ON CONFLICT (message_id) DO NOTHING").format(
+                        t=self._table, c=cols
+                    )
+                )
+        except psycopg.OperationalError as e:
+            raise TransientError(f"result_sink_write_error: {e}") from e
+        return SinkWriteResult()
+
+    def close(self) -> None:
+        self._conn.close()
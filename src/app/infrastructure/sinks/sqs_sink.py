@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Tuple
+
+import boto3
+import structlog
+
+from app.application.ports.result_sink import ResultSinkPort, SinkRecord, SinkWriteResult
+from app.infrastructure.aws.sqs_client import SQS_BATCH_LIMIT
+
+log = structlog.get_logger()
+
+# limite por mensagem (corpo + atributos) e do payload somado do SendMessageBatch
+SQS_MESSAGE_MAX_BYTES = 262_144
+SQS_BATCH_MAX_BYTES = 262_144
+
+
+class SqsResultSink(ResultSinkPort):
+    """
+    Publica os resultados numa fila de saída via `send_message_batch` (até 10
+    por chamada). Erro numa chamada só falha as mensagens daquele pedaço;
+    resultado maior que o limite do SQS ou recusado por culpa do remetente
+    (`SenderFault`) volta como rejeitado, sem retentativa.
+    """
+
+    def __init__(self, region: str, queue_url: str):
+        self._client = boto3.client("sqs", region_name=region)
+        self._queue_url = queue_url
+
+    def write_batch(self, records: List[SinkRecord]) -> SinkWriteResult:
+        failed: List[str] = []
+        rejected: List[str] = []
+        accepted: List[Tuple[Dict[str, Any], int]] = []
+        for i, r in enumerate(records):
+            entry = self._entry(str(i), r)
+            size = _message_size(entry)
+            if size > SQS_MESSAGE_MAX_BYTES:
+                log.error("result_sink_sqs_oversized", message_id=r.message_id, size=size, limit=SQS_MESSAGE_MAX_BYTES)
+                rejected.append(r.message_id)
+                continue
+            accepted.append((entry, size))
+
+        message_id = lambda entry_id: records[int(entry_id)].message_id
+        for chunk in _chunks(accepted):
+            ids = [message_id(entry["Id"]) for entry in chunk]
+            try:
+                resp = self._client.send_message_batch(QueueUrl=self._queue_url, Entries=chunk)
+            except Exception as e:
+                # só este pedaço volta para retentativa; os já enviados ficam
+                log.warning("result_sink_sqs_chunk_error", size=len(chunk), error=str(e))
+                failed.extend(ids)
+                continue
+            for f in resp.get("Failed", []):
+                if f.get("SenderFault"):
+                    log.error("result_sink_sqs_rejected", message_id=message_id(f["Id"]), code=f.get("Code"), error=f.get("Message"))
+                    rejected.append(message_id(f["Id"]))
+                else:
+                    failed.append(message_id(f["Id"]))
+        return SinkWriteResult(failed=failed, rejected=rejected)
+
+    def close(self) -> None:
+        pass
+
+    def _entry(self, entry_id: str, r: SinkRecord) -> Dict[str, Any]:
+        # Id posicional: único no lote mesmo com reentrega do mesmo message id
+        return {
+            "Id": entry_id,
+            "MessageBody": json.dumps(r.as_dict(), ensure_ascii=False),
+            "MessageAttributes": {
+                "correlation_id": {"DataType": "String", "StringValue": r.result.correlation_id or r.message_id},
+            },
+        }
+
+
+def _message_size(entry: Dict[str, Any]) -> int:
+    """Tamanho como o SQS conta: corpo mais nome, tipo e valor de cada atributo."""
+    size = len(entry["MessageBody"].encode("utf-8"))
+    for name, attr in entry["MessageAttributes"].items():
+        size += len(name.encode("utf-8")) + len(attr["DataType"].encode("utf-8"))
+        size += len(attr["StringValue"].encode("utf-8"))
+    return size
+
+
+def _chunks(entries: List[Tuple[Dict[str, Any], int]]):
+    chunk: List[Dict[str, Any]] = []
+    size = 0
+    for entry, n in entries:
+        if chunk and (len(chunk) >= SQS_BATCH_LIMIT or size + n > SQS_BATCH_MAX_BYTES):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(entry)
+        size += n
+    if chunk:
+        yield chunk
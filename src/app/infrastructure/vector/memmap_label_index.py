@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+
+class MemmapLabelIndex:
+    """
+    Matriz de embeddings rotulados em disco, lida via np.memmap.
+
+    `vectors.f32` guarda as linhas normalizadas (float32, row-major) e
+    `labels.jsonl` o rótulo de cada linha. Novos exemplos são anexados em lote
+    e o memmap é reaberto com o novo tamanho; as buscas em andamento continuam
+    com a visão anterior.
+
+    O diretório pode ser compartilhado por vários processos (supervisor): a
+    escrita acontece sob `flock` exclusivo no `.lock`, e cada processo relê
+    os rótulos anexados pelos outros quando o tamanho de `labels.jsonl` muda.
+    """
+
+    def __init__(self, directory: str | Path, dimensions: int | None = None):
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = self._dir / "vectors.f32"
+        self._labels_path = self._dir / "labels.jsonl"
+        self._meta_path = self._dir / "meta.json"
+        self._lock_path = self._dir / ".lock"
+
+        self._lock = threading.Lock()
+        self._dimensions = dimensions
+        self._labels: List[str] = []
+        # bytes de labels.jsonl já lidos (só linhas completas)
+        self._labels_offset = 0
+        self._matrix: np.ndarray = np.zeros((0, dimensions or 0), dtype=np.float32)
+        self._view_labels: List[str] = []
+
+        with self._lock, self._file_lock(exclusive=True):
+            self._sync_locked()
+            self._repair_locked()
+
+    def __len__(self) -> int:
+        return self._matrix.shape[0]
+
+    def view(self) -> Tuple[np.ndarray, List[str]]:
+        with self._lock:
+            if self._stale():
+                with self._file_lock(exclusive=False):
+                    self._sync_locked()
+            return self._matrix, self._view_labels
+
+    def add_batch(self, vectors: Sequence[Sequence[float]], labels: Sequence[str]) -> None:
+        if not len(vectors):
+            return
+
+        block = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        block = block / np.where(norms == 0, 1.0, norms)
+
+        with self._lock, self._file_lock(exclusive=True):
+            # o que os outros processos anexaram desde a última leitura
+            self._sync_locked()
+            if self._dimensions is None:
+                self._dimensions = block.shape[1]
+                self._meta_path.write_text(json.dumps({"dimensions": self._dimensions}), encoding="utf-8")
+            if block.shape[1] != self._dimensions:
+                raise ValueError(f"expected {self._dimensions}-d vectors, got {block.shape[1]}")
+            self._repair_locked()
+
+            # vetores antes dos rótulos: numa queda sobra, no máximo, vetor sem
+            # rótulo, que o próximo escritor descarta antes de anexar
+            with open(self._vectors_path, "ab") as f:
+                f.write(block.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self._labels_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(label, ensure_ascii=False) + "\n" for label in labels))
+
+            self._sync_locked()
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool) -> Iterator[None]:
+        with open(self._lock_path, "a+b") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _stale(self) -> bool:
+        try:
+            return self._labels_path.stat().st_size != self._labels_offset
+        except FileNotFoundError:
+            return False
+
+    def _sync_locked(self) -> None:
+        """Lê os rótulos novos e remapeia os vetores que já têm rótulo."""
+        if self._dimensions is None and self._meta_path.exists():
+            self._dimensions = json.loads(self._meta_path.read_text(encoding="utf-8"))["dimensions"]
+        if self._dimensions is None:
+            return
+
+        if self._stale():
+            with open(self._labels_path, "rb") as f:
+                f.seek(self._labels_offset)
+                chunk = f.read()
+            # linha sem "\n" é escrita em andamento (ou interrompida): fica para depois
+            end = chunk.rfind(b"\n") + 1
+            new = [json.loads(line) for line in chunk[:end].splitlines() if line]
+            self._labels_offset += end
+            # copia: quem segura a visão anterior não vê a lista mudar
+            self._labels = self._labels + new
+
+        rows = self._vectors_path.stat().st_size // (4 * self._dimensions) if self._vectors_path.exists() else 0
+        count = min(rows, len(self._labels))
+        if count != self._matrix.shape[0]:
+            self._matrix = self._map(count)
+            self._view_labels = self._labels[:count] if count < len(self._labels) else self._labels
+
+    def _repair_locked(self) -> None:
+        """Só com o lock exclusivo: descarta o que um escritor interrompido deixou pela metade."""
+        if self._dimensions is None:
+            return
+        if self._labels_path.exists() and self._labels_path.stat().st_size > self._labels_offset:
+            os.truncate(self._labels_path, self._labels_offset)
+        row_bytes = 4 * self._dimensions
+        rows = self._vectors_path.stat().st_size // row_bytes if self._vectors_path.exists() else 0
+        if rows < len(self._labels):
+            # rótulo sem vetor (vectors.f32 truncado por fora): reescreve os rótulos
+            self._labels = self._labels[:rows]
+            data = "".join(json.dumps(label, ensure_ascii=False) + "\n" for label in self._labels).encode("utf-8")
+            with open(self._labels_path, "wb") as f:
+                f.write(data)
+            self._labels_offset = len(data)
+            self._view_labels = self._labels
+        if self._vectors_path.exists() and self._vectors_path.stat().st_size > len(self._labels) * row_bytes:
+            # vetores órfãos: o próximo append desalinharia vetores e rótulos
+            os.truncate(self._vectors_path, len(self._labels) * row_bytes)
+
+    def _map(self, count: int) -> np.ndarray:
+        if count == 0:
+            return np.zeros((0, self._dimensions or 0), dtype=np.float32)
+        return np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(count, self._dimensions))
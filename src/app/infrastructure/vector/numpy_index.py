@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from app.application.ports.vector_index import VectorIndexPort, VectorItem, VectorMatch
+
+
+class NumpyVectorIndex(VectorIndexPort):
+    """Índice exato em memória (produto escalar sobre vetores normalizados)."""
+
+    def __init__(self, dimensions: int | None = None):
+        self._matrix = np.zeros((0, dimensions or 0), dtype=np.float32)
+        self._ids: List[str] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def search(self, vector: Sequence[float], k: int = 1) -> List[VectorMatch]:
+        q = _normalize(np.asarray(vector, dtype=np.float32))
+        with self._lock:
+            matrix, ids, metadata = self._matrix, self._ids, self._metadata
+
+        if not ids:
+            return []
+
+        scores = matrix @ q
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [VectorMatch(id=ids[i], score=float(scores[i]), metadata=metadata[i]) for i in top]
+
+    def add_batch(self, items: List[VectorItem]) -> None:
+        if not items:
+            return
+        block = np.vstack([_normalize(np.asarray(it.vector, dtype=np.float32)) for it in items])
+        with self._lock:
+            if not self._ids:
+                self._matrix = block
+            else:
+                # copy-on-write: buscas em andamento continuam com a matriz anterior
+                self._matrix = np.vstack([self._matrix, block])
+            self._ids = self._ids + [it.id for it in items]
+            self._metadata = self._metadata + [it.metadata for it in items]
+
+
+def _normalize(v: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import json
+import threading
+from typing import List, Sequence
+
+import psycopg
+from psycopg import sql
+from psycopg_pool import ConnectionPool
+
+from app.application.ports.vector_index import VectorIndexPort, VectorItem, VectorMatch
+from app.domain.errors import TransientError
+from app.infrastructure.postgres import normalize_dsn
+
+INDEX_TYPES = ("hnsw", "ivfflat")
+
+
+def _literal(vector: Sequence[float]) -> str:
+    return "[" + ",".join(f"{float(x):.7g}" for x in vector) + "]"
+
+
+class PgVectorIndex(VectorIndexPort):
+    """
+    Índice ANN no pgvector (distância de cosseno). A tabela e o índice
+    HNSW/IVFFlat são criados na primeira escrita, quando a dimensão é conhecida.
+
+    As buscas das threads do worker rodam em paralelo num pool de conexões;
+    ef_search/probes são ajustados uma vez por conexão, ao abrir.
+    """
+
+    def __init__(
+        self,
+        database_url: str,
+        table: str,
+        index_type: str = "hnsw",
+        hnsw_ef_search: int = 40,
+        ivfflat_lists: int = 100,
+        ivfflat_probes: int = 10,
+        pool_min_size: int = 1,
+        pool_max_size: int = 10,
+    ):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown pgvector index type: {index_type}, expected one of {INDEX_TYPES}")
+
+        self._table = table
+        self._index_type = index_type
+        self._hnsw_ef_search = hnsw_ef_search
+        self._ivfflat_lists = ivfflat_lists
+        self._ivfflat_probes = ivfflat_probes
+
+        self._pool = ConnectionPool(
+            normalize_dsn(database_url),
+            min_size=pool_min_size,
+            max_size=max(pool_max_size, pool_min_size),
+            kwargs={"autocommit": True},
+            configure=self._configure,
+            name="pgvector",
+            open=True,
+        )
+        # falha no startup, como o connect direto fazia
+        try:
+            self._pool.wait(timeout=10.0)
+        except Exception:
+            self._pool.close()
+            raise
+        # só o DDL da primeira escrita é serializado
+        self._ddl_lock = threading.Lock()
+        self._ready = False
+
+    def search(self, vector: Sequence[float], k: int = 1) -> List[VectorMatch]:
+        query = sql.SQL(
+            "SELECT id, 1 - (embedding <=> %(q)s::vector) AS score, metadata "
+            "FROM {t} ORDER BY embedding <=> %(q)s::vector LIMIT %(k)s"
+        ).format(t=sql.Identifier(self._table))
+
+        try:
+            with self._pool.connection() as conn:
+                if not self._table_exists(conn):
+                    return []
+                rows = conn.execute(query, {"q": _literal(vector), "k": k}).fetchall()
+        except psycopg.OperationalError as e:
+            raise TransientError(f"pgvector_search_error: {e}") from e
+
+        return [VectorMatch(id=r[0], score=float(r[1]), metadata=r[2] or {}) for r in rows]
+
+    def add_batch(self, items: List[VectorItem]) -> None:
+        if not items:
+            return
+
+        query = sql.SQL(
+            "INSERT INTO {t} (id, embedding, metadata) VALUES (%s, %s::vector, %s::jsonb) ON CONFLICT (id) DO NOTHING"
+        ).format(t=sql.Identifier(self._table))
+
+        try:
+            with self._pool.connection() as conn:
+                self._ensure_table(conn, len(items[0].vector))
+                with conn.cursor() as cur:
+                    cur.executemany(
+                        query,
+                        [(it.id, _literal(it.vector), json.dumps(it.metadata, ensure_ascii=False)) for it in items],
+                    )
+        except psycopg.OperationalError as e:
+            raise TransientError(f"pgvector_write_error: {e}") from e
+
+    def close(self) -> None:
+        self._pool.close()
+
+    def _configure(self, conn: psycopg.Connection) -> None:
+        # vale para a sessão inteira: uma vez por conexão, não por busca
+        if self._index_type == "hnsw":
+            conn.execute(sql.SQL("SET hnsw.ef_search = {}").format(sql.Literal(self._hnsw_ef_search)))
+        else:
+            conn.execute(sql.SQL("SET ivfflat.probes = {}").format(sql.Literal(self._ivfflat_probes)))
+
+    def _table_exists(self, conn: psycopg.Connection) -> bool:
+        if self._ready:
+            return True
+        row = conn.execute("SELECT to_regclass(%s)", (self._table,)).fetchone()
+        self._ready = row is not None and row[0] is not None
+        return self._ready
+
+    def _ensure_table(self, conn: psycopg.Connection, dimensions: int) -> None:
+        if self._table_exists(conn):
+            return
+        with self._ddl_lock:
+            self._create_table(conn, dimensions)
+
+    def _create_table(self, conn: psycopg.Connection, dimensions: int) -> None:
+        t = sql.Identifier(self._table)
+        idx = sql.Identifier(f"{self._table}_embedding_{self._index_type}")
+        conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        conn.execute(
+            sql.SQL(
+                "CREATE TABLE IF NOT EXISTS {t} ("
+                "id text PRIMARY KEY, embedding vector({d}) NOT NULL, "
+                "metadata jsonb NOT NULL DEFAULT '{{}}', created_at timestamptz NOT NULL DEFAULT now())"
+            ).format(t=t, d=sql.Literal(dimensions))
+        )
+        if self._index_type == "hnsw":
+            conn.execute(
+                sql.SQL("CREATE INDEX IF NOT EXISTS {i} ON {t} USING hnsw (embedding vector_cosine_ops)").format(i=idx, t=t)
+            )
+        else:
+            conn.execute(
+                sql.SQL(
+                    "CREATE INDEX IF NOT EXISTS {i} ON {t} USING ivfflat (embedding vector_cosine_ops) WITH (lists = {n})"
+                ).format(i=idx, t=t, n=sql.Literal(self._ivfflat_lists))
+            )
+        self._ready = True
@@ -1,47 +1,198 @@
 from __future__ import annotations
 
+import asyncio
 import concurrent.futures
+import math
+import signal
+import threading
 import time
+from typing import Callable, Dict, List
+
 import structlog
 
 from app.settings.settings import settings
 from app.logging import configure_logging
-from app.domain.errors import PermanentError, TransientError
-from app.prompts.registry import PromptRegistry
+from app.bootstrap import Pipeline, build_pipeline, build_registry, build_result_sink
+from app.domain.errors import CircuitOpenError, PermanentError, TransientError
 from app.infrastructure.aws.sqs_client import SqsQueueAdapter
-from app.infrastructure.llm.opeanai_provider import OpenAILangChainAdapter
+from app.infrastructure.metrics.prometheus_metrics import PrometheusMetrics
+from app.application.ports.metrics import MetricsPort
+from app.application.ports.queue import QueueMessage, QueuePort
 from app.application.use_cases.process_message import ProcessMessage
+from app.application.services.acknowledger import BatchAcknowledger
+from app.application.services.lease_manager import VisibilityLeaseManager
+from app.application.services.result_writer import BatchResultWriter
+from app.async_worker import AsyncWorker
 
 log = structlog.get_logger()
 
+MAX_BACKPRESSURE_SECONDS = 5.0
+
+# granularidade com que o loop percebe o SIGTERM enquanto espera o lote
+DRAIN_POLL_SECONDS = 0.5
 
-def main(): 
+
+def main(metrics_port: int | None = None):
+    """`metrics_port`: porta do /metrics deste processo (o supervisor passa base + índice)."""
     configure_logging(settings.log_level)
-    registry = PromptRegistry(prompts_dir=settings.prompts_dir)
-    registry.load()
+    registry = build_registry()
 
     queue = SqsQueueAdapter(region=settings.aws_region, queue_url=settings.sqs_queue_url)
-    
-    llm = OpenAILangChainAdapter(
-        registry=registry,
-        api_key=settings.openai_api_key,
-        default_model=settings.openai_default_model,
-        default_temperature=settings.openai_default_temperature,
-        timeout_seconds=settings.default_timeout_seconds,
-        max_repair_attemps=settings.default_max_repair_attemps,
+
+    metrics = None
+    if settings.metrics_enabled:
+        metrics = PrometheusMetrics(model_prices=settings.metrics_model_prices)
+        metrics.serve(metrics_port if metrics_port is not None else settings.metrics_port, host=settings.metrics_host)
+        metrics.set_worker_capacity(settings.worker_concurrency)
+
+    pipeline = build_pipeline(registry, metrics)
+    llm, use_case = pipeline.llm, pipeline.use_case
+
+    leases = None
+    if settings.sqs_heartbeat_enabled:
+        leases = VisibilityLeaseManager(
+            queue=queue,
+            extension_seconds=settings.sqs_visibility_timeout,
+            margin_seconds=settings.sqs_lease_margin_seconds,
+            max_lease_seconds=settings.sqs_lease_max_seconds,
+            interval_seconds=settings.sqs_heartbeat_interval_seconds,
+            metrics=metrics,
+        )
+        leases.start()
+
+    acker = BatchAcknowledger(
+        queue=queue,
+        batch_size=settings.sqs_ack_batch_size,
+        max_delay_seconds=settings.sqs_ack_max_delay_seconds,
+        max_attempts=settings.sqs_ack_max_attempts,
     )
+    acker.start()
 
-    use_case = ProcessMessage(llm)
+    writer = None
+    backpressure = llm.backpressure_seconds
+    sink = build_result_sink()
+    if sink is not None:
+        writer = BatchResultWriter(
+            sink=sink,
+            acker=acker,
+            batch_size=settings.result_sink_batch_size,
+            max_delay_seconds=settings.result_sink_max_delay_seconds,
+            max_pending=settings.result_sink_max_pending,
+            max_attempts=settings.result_sink_max_attempts,
+            leases=leases,
+        )
+        writer.start()
+        # sink atrasado segura o recebimento do mesmo jeito que o orçamento do LLM
+        backpressure = lambda: max(llm.backpressure_seconds(), writer.backpressure_seconds())
 
     log.info(
         "worker_started",
         queue_url=settings.sqs_queue_url,
         concurrency=settings.worker_concurrency,
+        mode=settings.worker_mode,
         model=settings.openai_default_model,
     )
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=settings.worker_concurrency) as pool:
-        while True:
+    stop = threading.Event()
+
+    try:
+        if settings.worker_mode == "async":
+            worker = AsyncWorker(
+                use_case=use_case,
+                queue=queue,
+                acker=acker,
+                concurrency=settings.worker_concurrency,
+                high_water_mark=settings.worker_high_water_mark,
+                queue_maxsize=settings.worker_queue_maxsize,
+                max_messages=settings.sqs_max_messages,
+                wait_time_seconds=settings.sqs_wait_time_seconds,
+                visibility_timeout=settings.sqs_visibility_timeout,
+                leases=leases,
+                metrics=metrics,
+                backpressure=backpressure,
+                drain_seconds=settings.worker_drain_seconds,
+                writer=writer,
+            )
+            asyncio.run(_run_async(worker, pipeline))
+        else:
+            _install_stop_handlers(stop.set)
+            _run_threaded(
+                use_case,
+                queue,
+                acker,
+                leases,
+                metrics,
+                backpressure=backpressure,
+                stop=stop,
+                drain_seconds=settings.worker_drain_seconds,
+                writer=writer,
+            )
+    finally:
+        # o flush final do writer ainda gera acks
+        if writer is not None:
+            writer.close()
+        acker.close()
+        if leases is not None:
+            leases.stop()
+        pipeline.close()
+        log.info(
+            "worker_stopped",
+            ack=acker.snapshot(),
+            result_sink=writer.snapshot() if writer is not None else None,
+            leases=leases.snapshot() if leases is not None else None,
+            **pipeline.stats(),
+        )
+
+
+def _install_stop_handlers(on_stop: Callable[[], None]) -> None:
+    def _handler(signum, frame) -> None:
+        log.info("worker_stopping", signal=signal.Signals(signum).name, drain_seconds=settings.worker_drain_seconds)
+        on_stop()
+
+    signal.signal(signal.SIGTERM, _handler)
+    signal.signal(signal.SIGINT, _handler)
+
+
+async def _run_async(worker: AsyncWorker, pipeline: Pipeline) -> None:
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, lambda sig=sig: _stop_async(worker, sig))
+    try:
+        await worker.run()
+    finally:
+        # as conexões async só fecham no loop em que foram abertas
+        await pipeline.aclose()
+
+
+def _stop_async(worker: AsyncWorker, sig: signal.Signals) -> None:
+    log.info("worker_stopping", signal=sig.name, drain_seconds=settings.worker_drain_seconds)
+    asyncio.ensure_future(worker.stop())
+
+
+def _run_threaded(
+    use_case: ProcessMessage,
+    queue: SqsQueueAdapter,
+    acker: BatchAcknowledger,
+    leases: VisibilityLeaseManager | None,
+    metrics: MetricsPort | None = None,
+    backpressure: Callable[[], float] | None = None,
+    stop: threading.Event | None = None,
+    drain_seconds: float = 30.0,
+    writer: BatchResultWriter | None = None,
+) -> None:
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=settings.worker_concurrency)
+    try:
+        while stop is None or not stop.is_set():
+            # sem orçamento de RPM/TPM, com o circuito aberto ou com o sink atrasado não adianta puxar mais do SQS
+            wait = backpressure() if backpressure is not None else 0.0
+            if wait > 0:
+                log.info("worker_backpressure", wait_seconds=round(wait, 3))
+                if stop is not None:
+                    stop.wait(min(wait, MAX_BACKPRESSURE_SECONDS))
+                else:
+                    time.sleep(min(wait, MAX_BACKPRESSURE_SECONDS))
+                continue
+
             messages = queue.receive(
                 max_messages=settings.sqs_max_messages,
                 wait_time_seconds=settings.sqs_wait_time_seconds,
@@ -51,36 +202,165 @@ def main():
             if not messages:
                 continue
 
-            futures = []
+            if stop is not None and stop.is_set():
+                # chegou durante o long polling do shutdown: nem começa
+                _release_unfinished(queue, leases, messages)
+                break
+
+            futures: Dict[concurrent.futures.Future, QueueMessage] = {}
             for m in messages:
-                futures.append(pool.submit(_handle_one, use_case, queue, m.message_id, m.receipt_handle, m.body))
+                if leases is not None:
+                    leases.track(m.message_id, m.receipt_handle, settings.sqs_visibility_timeout)
+                futures[pool.submit(_handle_one, use_case, queue, acker, m, leases, metrics, writer)] = m
+
+            unfinished = _wait_batch(futures, stop, drain_seconds)
+            if unfinished:
+                _release_unfinished(queue, leases, unfinished)
+                log.warning(
+                    "worker_exit_waits_for_in_flight",
+                    count=len(unfinished),
+                    hint="the process exits when these LLM calls return or on SIGKILL",
+                )
+                break
+    finally:
+        # não interrompe quem está no meio de uma chamada: as threads do executor
+        # são juntadas na saída do interpretador, então o processo só termina
+        # quando a chamada volta (timeout HTTP × retentativas). As mensagens já
+        # voltaram para a fila e o ack tardio é descartado (ack_after_close); o
+        # teto duro é o SIGKILL do supervisor (drenagem + KILL_GRACE_SECONDS) ou
+        # do orquestrador.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _wait_batch(
+    futures: Dict[concurrent.futures.Future, QueueMessage],
+    stop: threading.Event | None,
+    drain_seconds: float,
+) -> List[QueueMessage]:
+    """Espera o lote; depois do stop, por no máximo `drain_seconds`. Retorna o que não terminou."""
+    pending = set(futures)
+    deadline = None
+    while pending:
+        if stop is not None and stop.is_set() and deadline is None:
+            deadline = time.monotonic() + drain_seconds
+        if stop is None:
+            timeout = None
+        elif deadline is None:
+            timeout = DRAIN_POLL_SECONDS
+        else:
+            timeout = max(deadline - time.monotonic(), 0.0)
+
+        done, pending = concurrent.futures.wait(pending, timeout=timeout)
+        for f in done:
+            _ = f.result()
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+    return [futures[f] for f in pending]
+
+
+def _release_unfinished(queue: QueuePort, leases: VisibilityLeaseManager | None, messages: List[QueueMessage]) -> None:
+    """Devolve ao SQS (visibilidade 0) o que não terminou dentro do prazo de drenagem."""
+    if leases is not None:
+        # sem isso o heartbeat estenderia de novo a visibilidade
+        for m in messages:
+            leases.release(m.receipt_handle)
+    try:
+        failed = queue.change_visibility_batch([m.receipt_handle for m in messages], 0)
+    except Exception as e:
+        log.warning("worker_release_failed", count=len(messages), error=str(e))
+        return
+    log.info("worker_released_unfinished", count=len(messages), failed=len(failed))
 
-            for f in concurrent.futures.as_completed(futures):
-                _ = f.result()
 
+def _handle_one(
+    use_case: ProcessMessage,
+    queue: QueuePort,
+    acker: BatchAcknowledger,
+    m: QueueMessage,
+    leases: VisibilityLeaseManager | None = None,
+    metrics: MetricsPort | None = None,
+    writer: BatchResultWriter | None = None,
+) -> None:
+    if metrics is None:
+        _process(use_case, queue, acker, m, leases, writer)
+        return
 
-def _handle_one(use_case: ProcessMessage, queue: SqsQueueAdapter, message_id: str, receipt: str, body: str) -> None:
     started = time.time()
+    with metrics.track_in_flight():
+        outcome = _process(use_case, queue, acker, m, leases, writer)
+    now = time.time()
+    metrics.observe_message(
+        outcome,
+        processing_seconds=now - started,
+        receive_to_ack_seconds=(
+            now - m.sent_at if outcome in ("processed", "permanent_error") and m.sent_at is not None else None
+        ),
+    )
+
+
+def _process(
+    use_case: ProcessMessage,
+    queue: QueuePort,
+    acker: BatchAcknowledger,
+    m: QueueMessage,
+    leases: VisibilityLeaseManager | None = None,
+    writer: BatchResultWriter | None = None,
+) -> str:
+    handed_off = False
     try:
-        result = use_case.execute(body, message_id=message_id)
-        queue.delete(receipt)
+        result = use_case.execute(m.body, message_id=m.message_id)
+        if writer is not None:
+            # o ack sai do writer depois da gravação durável do resultado;
+            # o lease fica com ele até lá
+            writer.submit(m.receipt_handle, m.message_id, result)
+            handed_off = True
+        else:
+            acker.ack(m.receipt_handle)
         log.info(
             "message_processed",
-            message_id=message_id,
+            message_id=m.message_id,
             correlation_id=result.correlation_id,
             intent=result.intent,
             output_len=len(result.output_text or ""),
         )
+        return "processed"
 
     except PermanentError as e:
-        queue.delete(receipt)
-        log.warning("message_permanent_error", message_id=message_id, error=str(e))
+        acker.ack(m.receipt_handle)
+        log.warning("message_permanent_error", message_id=m.message_id, error=str(e))
+        return "permanent_error"
+
+    except CircuitOpenError as e:
+        _release_to_queue(queue, m, leases, e.retry_after_seconds)
+        log.warning("message_circuit_open", message_id=m.message_id, error=str(e))
+        return "circuit_open"
 
     except TransientError as e:
-        log.warning("message_transient_error", message_id=message_id, error=str(e))
+        log.warning("message_transient_error", message_id=m.message_id, error=str(e))
+        return "transient_error"
+
+    except Exception as e:
+        log.exception("message_unhandled_error", message_id=m.message_id, error=str(e))
+        return "unhandled_error"
 
+    finally:
+        if leases is not None and not handed_off:
+            leases.release(m.receipt_handle)
+
+
+def _release_to_queue(
+    queue: QueuePort,
+    m: QueueMessage,
+    leases: VisibilityLeaseManager | None,
+    delay_seconds: float,
+) -> None:
+    """Devolve a mensagem ao SQS já, visível de novo quando o circuito aceitar teste."""
+    if leases is not None:
+        leases.release(m.receipt_handle)
+    try:
+        queue.change_visibility(m.receipt_handle, max(1, math.ceil(delay_seconds)))
     except Exception as e:
-        log.exception("message_unhandled_error", message_id=message_id, error=str(e))
+        log.warning("message_release_failed", message_id=m.message_id, error=str(e))
 
 
 if __name__ == "__main__":
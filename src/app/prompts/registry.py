@@ -1,11 +1,21 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional, Tuple
 
+import structlog
 import yaml
-from jinja2 import Template
+from jinja2 import Environment, StrictUndefined, Template, TemplateError
+
+from app.domain.errors import PermanentError
+
+log = structlog.get_logger()
+
+# Environment compartilhado: cada template é compilado uma única vez no load()
+_ENV = Environment(undefined=StrictUndefined, autoescape=False)
 
 @dataclass(frozen=True)
 class PromptSpec:
@@ -14,6 +24,15 @@ class PromptSpec:
     model: Dict[str, Any]
     messages: List[Dict[str, str]]
     output_schema: Optional[Dict[str, any]] = None
+    routing: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """Estado imutável do registry; trocado inteiro a cada (re)load."""
+    specs: Mapping[str, PromptSpec] = field(default_factory=lambda: MappingProxyType({}))
+    templates: Mapping[str, Tuple[Tuple[str, Template], ...]] = field(default_factory=lambda: MappingProxyType({}))
+    fingerprint: Tuple[Tuple[str, int, int], ...] = ()
 
 
 class PromptRegistry:
@@ -21,36 +40,102 @@ class PromptRegistry:
         if prompts_dir is None:
             prompts_dir = Path(__file__).resolve().parent / "yaml"
         self._dir = Path(prompts_dir)
-        self._cache: Dict[str, PromptSpec] = {}
+        self._snapshot = _Snapshot()
+        self._watch_stop = threading.Event()
+        self._watcher: threading.Thread | None = None
+        self._failed_fingerprint: Tuple[Tuple[str, int, int], ...] | None = None
 
     def load(self) -> None:
         if not self._dir.exists():
             raise FileNotFoundError(f"Prompts dir not found: {self._dir}")
 
+        fingerprint = self._fingerprint()
+        specs: Dict[str, PromptSpec] = {}
+        templates: Dict[str, Tuple[Tuple[str, Template], ...]] = {}
         for path in sorted(self._dir.glob("*.yaml")):
             data = yaml.safe_load(path.read_text(encoding="utf-8"))
             spec = self._parse(data, path.name)
-            self._cache[spec.id] = spec
+            specs[spec.id] = spec
+            templates[spec.id] = self._compile(spec, path.name)
+
+        # atribuição de referência é atômica: leitores veem o snapshot antigo
+        # ou o novo, nunca um estado parcial
+        self._snapshot = _Snapshot(
+            specs=MappingProxyType(specs),
+            templates=MappingProxyType(templates),
+            fingerprint=fingerprint,
+        )
 
     def get(self, prompt_id: str):
+        specs = self._snapshot.specs
         try:
-            return self._cache[prompt_id]
+            return specs[prompt_id]
         except KeyError as e:
-            raise KeyError(f"Prompt not found: {prompt_id}, Loaded={list(self._cache.keys())}") from e
+            raise KeyError(f"Prompt not found: {prompt_id}, Loaded={list(specs.keys())}") from e
         
+    def specs(self) -> Mapping[str, PromptSpec]:
+        return self._snapshot.specs
+
     def render_messages(self, prompt_id: str, variables: Dict[str, Any]) -> List[Dict[str, str]]:
-        spec: PromptSpec = self.get(prompt_id)
+        snapshot = self._snapshot
+        if prompt_id not in snapshot.templates:
+            self.get(prompt_id)
+
         rendered: List[Dict[str, str]] = []
-        for m in spec.messages:
-            rendered.append(
-                {
-                    "role": m["role"],
-                    "content": Template(m["content"]).render(**variables)
-                }
-            )
+        for role, template in snapshot.templates[prompt_id]:
+            try:
+                content = template.render(**variables)
+            except TemplateError as e:
+                raise PermanentError(f"prompt {prompt_id} render failed: {e}") from e
+            rendered.append({"role": role, "content": content})
 
         return rendered
 
+    def start_watching(self, interval_seconds: float = 5.0) -> None:
+        """Recarrega os YAMLs quando algum arquivo muda (polling de mtime)."""
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval_seconds,), name="prompt-registry-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._watch_stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval_seconds: float) -> None:
+        while not self._watch_stop.wait(interval_seconds):
+            try:
+                fingerprint = self._fingerprint()
+                if fingerprint in (self._snapshot.fingerprint, self._failed_fingerprint):
+                    continue
+                self._failed_fingerprint = fingerprint
+                self.load()
+                self._failed_fingerprint = None
+                log.info(
+                    "prompts_reloaded",
+                    prompts={pid: spec.version for pid, spec in self._snapshot.specs.items()},
+                )
+            except Exception as e:
+                # mantém o snapshot anterior se o YAML novo estiver inválido
+                log.exception("prompts_reload_failed", error=str(e))
+
+    def _fingerprint(self) -> Tuple[Tuple[str, int, int], ...]:
+        out = []
+        for path in sorted(self._dir.glob("*.yaml")):
+            st = path.stat()
+            out.append((path.name, st.st_mtime_ns, st.st_size))
+        return tuple(out)
+
+    def _compile(self, spec: PromptSpec, filename: str) -> Tuple[Tuple[str, Template], ...]:
+        try:
+            return tuple((m["role"], _ENV.from_string(m["content"])) for m in spec.messages)
+        except TemplateError as e:
+            raise ValueError(f"Prompt {filename} has invalid template: {e}") from e
+
 
     def _parse(self, data: Dict[str, Any], filename: str) -> PromptSpec:
         required = ["id", "version", "messages", "output_schema"]
@@ -69,4 +154,5 @@ class PromptRegistry:
             messages=data["messages"],
             model=model,
             output_schema=output_schema,
+            routing=data.get("routing") or {},
         )
@@ -1,3 +1,5 @@
+from typing import Dict, List
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -6,26 +8,125 @@ class Settings(BaseSettings):
 
     log_level: str = "info"
 
+    metrics_enabled: bool = False
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 9100
+    metrics_model_prices: Dict[str, List[float]] = {}  # modelo -> [USD/1M entrada, USD/1M saída]
+
     openai_api_key: str
     openai_default_model: str = "gpt-4o-mini"
     openai_default_temperature: float = 0.2
     openai_default_embedding_model: str = "text-embedding-3-small"
+    openai_max_connections: int = 100
+    openai_max_keepalive_connections: int = 20
+    openai_keepalive_expiry_seconds: float = 30.0
+    openai_rate_limit_enabled: bool = False
+    openai_rpm_limit: int = 500
+    openai_tpm_limit: int = 200_000
+    openai_max_concurrency: int = 16
+    openai_min_concurrency: int = 1
+    openai_breaker_enabled: bool = True
+    openai_breaker_failure_threshold: int = 5
+    openai_breaker_recovery_seconds: float = 30.0
+    openai_breaker_half_open_max_calls: int = 1
+    openai_retry_budget_ratio: float = 0.1
+    openai_retry_budget_min_per_second: float = 1.0
+    openai_streaming_enabled: bool = False
+    openai_micro_batch_enabled: bool = False
+    openai_micro_batch_max_size: int = 8
+    openai_micro_batch_window_ms: float = 20.0
+    openai_hedge_enabled: bool = False
+    openai_hedge_quantile: float = 0.95
+    openai_hedge_min_delay_seconds: float = 0.5
+    openai_hedge_min_samples: int = 20
+    openai_hedge_budget_ratio: float = 0.05
+    openai_hedge_budget_min_per_second: float = 0.1
+    openai_hedge_max_workers: int = 32  # só duplicatas; a original roda fora do pool
 
     aws_region: str = "sa-east-1"
     sqs_queue_url: str = "teste"
     sqs_max_messages: int = 10
     sqs_wait_time_seconds: int = 20
     sqs_visibility_timeout: int = 120
+    sqs_heartbeat_enabled: bool = True
+    sqs_heartbeat_interval_seconds: int = 10
+    sqs_lease_margin_seconds: int = 30
+    sqs_lease_max_seconds: int = 900
+    sqs_ack_batch_size: int = 10
+    sqs_ack_max_delay_seconds: float = 0.5
+    sqs_ack_max_attempts: int = 3
 
     worker_concurrency: int = 4
+    worker_mode: str = "threads"  # threads | async
+    worker_high_water_mark: int = 8
+    worker_queue_maxsize: int = 10
+    worker_drain_seconds: float = 25.0
+    worker_processes: int = 0  # 0 = os.cpu_count()
+    worker_restart_backoff_max_seconds: float = 30.0
     
+    graph_topology: str = "parallel"  # parallel | sequential | fused
+    graph_cascade_enabled: bool = False
+
+    result_sink: str = "none"  # none | jsonl | sqs | postgres
+    result_sink_jsonl_path: str = "results.jsonl"
+    result_sink_sqs_queue_url: str | None = None
+    result_sink_pg_table: str = "work_results"
+    result_sink_batch_size: int = 10
+    result_sink_max_delay_seconds: float = 1.0
+    result_sink_max_pending: int = 200
+    result_sink_max_attempts: int = 3
+
+    batch_workers: int = 8
+    batch_max_in_flight: int = 64
+    batch_checkpoint_every: int = 100
+    batch_poll_interval_seconds: float = 30.0
+
     default_timeout_seconds: int = 30
     default_max_repair_attemps: int = 1
+
+    llm_cache_enabled: bool = False
+    llm_cache_max_entries: int = 10_000
+    llm_cache_ttl_seconds: int = 3600
+    llm_cache_sqlite_path: str | None = None
+    llm_cache_shared_ttl_seconds: int = 86400
     
     pg_database_url: str
     pg_vector_collection_name: str = "gpt5_collection"
+    pg_vector_index_type: str = "hnsw"  # hnsw | ivfflat
+    pg_vector_pool_max_size: int = 10
+
+    idempotency_enabled: bool = False
+    idempotency_store: str = "sqlite"  # sqlite | postgres
+    idempotency_sqlite_path: str = ".idempotency.db"
+    idempotency_table: str = "idempotency_keys"
+    idempotency_ttl_seconds: int = 345600  # retenção padrão do SQS (4 dias)
+    idempotency_in_progress_seconds: int = 300
+    idempotency_local_max_entries: int = 10_000
+
+    preprocess_enabled: bool = False
+    preprocess_max_input_tokens: int = 8000  # 0 = sem corte; por prompt: `max_input_tokens` no bloco model
+    preprocess_head_ratio: float = 0.7
+    preprocess_strip_reply_history: bool = True
+
+    dedupe_semantic_enabled: bool = False
+    dedupe_similarity_threshold: float = 0.92
+    dedupe_embeddings_provider: str = "openai"  # openai | hashing
+    dedupe_vector_index: str = "pgvector"  # pgvector | numpy
+    dedupe_write_batch_size: int = 32
+
+    classifier_knn_enabled: bool = False
+    classifier_knn_index_dir: str = ".knn_index"
+    classifier_knn_embeddings_provider: str = "openai"  # openai | hashing
+    classifier_knn_k: int = 10
+    classifier_knn_threshold: float = 0.8
+    classifier_knn_min_similarity: float = 0.75
+    classifier_knn_min_neighbors: int = 3
+    classifier_knn_learn_min_confidence: float = 0.85
+    classifier_knn_write_batch_size: int = 32
 
-    prompts_dir: str | None = None    
+    prompts_dir: str | None = None
+    prompts_hot_reload: bool = False
+    prompts_reload_interval_seconds: float = 5.0    
 
 
 settings = Settings()
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from multiprocessing.connection import wait
+from multiprocessing.process import BaseProcess
+from typing import Callable, Dict, Tuple
+
+import structlog
+
+from app.settings.settings import settings
+from app.logging import configure_logging
+from app.main import main as worker_main
+
+log = structlog.get_logger()
+
+# filho que morre antes disso conta como falha seguida (crash loop)
+MIN_UPTIME_SECONDS = 10.0
+# além do prazo de drenagem, antes do SIGKILL
+KILL_GRACE_SECONDS = 5.0
+POLL_SECONDS = 1.0
+
+
+@dataclass
+class _Child:
+    index: int
+    process: BaseProcess
+    started_at: float
+    failures: int = 0
+
+
+def _run_child(index: int, target: Callable[..., None]) -> None:
+    # handlers herdados do supervisor no fork; o worker instala os seus
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    # cada processo expõe /metrics na sua porta (base + índice)
+    target(metrics_port=settings.metrics_port + index)
+
+
+class Supervisor:
+    """
+    Mantém N processos de worker (cada um com o próprio pool de threads ou
+    event loop) e reinicia os que morrem, com backoff exponencial quando
+    morrem logo depois de subir. No SIGTERM repassa o sinal aos filhos, que
+    param de receber e drenam o trabalho em voo; quem passar do prazo leva
+    SIGKILL.
+    """
+
+    def __init__(
+        self,
+        processes: int,
+        drain_seconds: float,
+        backoff_max_seconds: float = 30.0,
+        target: Callable[..., None] = worker_main,
+    ):
+        self._processes = processes
+        self._drain_seconds = drain_seconds
+        self._backoff_max_seconds = backoff_max_seconds
+        self._target = target
+        # fork: os filhos herdam settings e módulos já importados, sem reimportar tudo
+        self._ctx = multiprocessing.get_context("fork")
+        self._children: Dict[int, _Child] = {}
+        # índice -> (quando reiniciar, falhas seguidas)
+        self._restarts: Dict[int, Tuple[float, int]] = {}
+        self._stopping = threading.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def run(self) -> int:
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, self._on_signal)
+
+        log.info("supervisor_started", processes=self._processes, drain_seconds=self._drain_seconds)
+        for index in range(self._processes):
+            self._spawn(index, failures=0)
+
+        while not self._stopping.is_set():
+            wait([c.process.sentinel for c in self._children.values()], timeout=POLL_SECONDS)
+            self._reap()
+            self._restart_due()
+
+        return self._shutdown()
+
+    def _on_signal(self, signum, frame) -> None:
+        log.info("supervisor_stopping", signal=signal.Signals(signum).name)
+        self._stopping.set()
+
+    def _spawn(self, index: int, failures: int) -> None:
+        process = self._ctx.Process(target=_run_child, args=(index, self._target), name=f"worker-{index}")
+        process.start()
+        self._children[index] = _Child(index=index, process=process, started_at=time.monotonic(), failures=failures)
+        log.info("worker_process_started", index=index, pid=process.pid, failures=failures)
+
+    def _reap(self) -> None:
+        now = time.monotonic()
+        for index, child in list(self._children.items()):
+            if child.process.is_alive():
+                continue
+            child.process.join()
+            del self._children[index]
+            uptime = now - child.started_at
+            log.warning(
+                "worker_process_exited",
+                index=index,
+                pid=child.process.pid,
+                exitcode=child.process.exitcode,
+                uptime_seconds=round(uptime, 1),
+            )
+            if self._stopping.is_set():
+                continue
+
+            failures = child.failures + 1 if uptime < MIN_UPTIME_SECONDS else 0
+            delay = min(self._backoff_max_seconds, 2.0 ** (failures - 1)) if failures else 0.0
+            self._restarts[index] = (now + delay, failures)
+
+    def _restart_due(self) -> None:
+        now = time.monotonic()
+        for index, (at, failures) in list(self._restarts.items()):
+            if at <= now and not self._stopping.is_set():
+                del self._restarts[index]
+                self._spawn(index, failures=failures)
+
+    def _shutdown(self) -> int:
+        for child in self._children.values():
+            if child.process.is_alive():
+                os.kill(child.process.pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self._drain_seconds + KILL_GRACE_SECONDS
+        for child in self._children.values():
+            child.process.join(timeout=max(deadline - time.monotonic(), 0.0))
+
+        killed = 0
+        for child in self._children.values():
+            if child.process.is_alive():
+                log.warning("worker_process_killed", index=child.index, pid=child.process.pid)
+                child.process.kill()
+                child.process.join()
+                killed += 1
+
+        log.info("supervisor_stopped", killed=killed)
+        return 1 if killed else 0
+
+
+def main() -> int:
+    configure_logging(settings.log_level)
+    supervisor = Supervisor(
+        processes=settings.worker_processes or os.cpu_count() or 1,
+        drain_seconds=settings.worker_drain_seconds,
+        backoff_max_seconds=settings.worker_restart_backoff_max_seconds,
+    )
+    return supervisor.run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
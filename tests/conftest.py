@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+# settings exige as duas; os testes não falam com OpenAI nem Postgres
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("PG_DATABASE_URL", "postgresql://test@localhost/test")
@@ -0,0 +1,115 @@
+import time
+from typing import List
+
+from app.application.services.acknowledger import BatchAcknowledger
+from app.infrastructure.memory.queue import InMemoryQueueAdapter
+
+
+def _received(queue: InMemoryQueueAdapter, n: int) -> List[str]:
+    for i in range(n):
+        queue.send(f'{{"input_text": "m{i}"}}')
+    return [m.receipt_handle for m in queue.receive(max_messages=n, wait_time_seconds=0, visibility_timeout=30)]
+
+
+class FlakyQueue(InMemoryQueueAdapter):
+    """Falha cada receipt nas primeiras `failures` tentativas de delete_batch."""
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+        self.calls: List[List[str]] = []
+        self._attempts = {}
+
+    def delete_batch(self, receipt_handles):
+        self.calls.append(list(receipt_handles))
+        failed = []
+        for r in receipt_handles:
+            self._attempts[r] = self._attempts.get(r, 0) + 1
+            if self._attempts[r] <= self.failures:
+                failed.append(r)
+            else:
+                self.delete(r)
+        return failed
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_sends_full_batches_without_waiting_for_the_delay():
+    queue = InMemoryQueueAdapter()
+    receipts = _received(queue, 7)
+    acker = BatchAcknowledger(queue, batch_size=3, max_delay_seconds=60)
+    acker.start()
+    for r in receipts:
+        acker.ack(r)
+
+    assert _wait_for(lambda: len(queue.deleted) == 6)
+    snap = acker.snapshot()
+    assert snap["batches_total"] == 2
+    assert snap["pending"] == 1
+    acker.close()
+
+
+def test_partial_batch_goes_out_after_max_delay():
+    queue = InMemoryQueueAdapter()
+    receipts = _received(queue, 2)
+    acker = BatchAcknowledger(queue, batch_size=10, max_delay_seconds=0.05)
+    acker.start()
+    for r in receipts:
+        acker.ack(r)
+
+    assert len(queue.deleted) == 0
+    assert _wait_for(lambda: len(queue.deleted) == 2)
+    assert acker.snapshot()["batches_total"] == 1
+    acker.close()
+
+
+def test_failed_entries_are_retried_until_they_succeed():
+    queue = FlakyQueue(failures=1)
+    receipts = _received(queue, 3)
+    acker = BatchAcknowledger(queue, batch_size=10, max_delay_seconds=60, max_attempts=3)
+    for r in receipts:
+        acker.ack(r)
+    acker.flush()
+
+    assert len(queue.deleted) == 3
+    assert len(queue.calls) == 2
+    snap = acker.snapshot()
+    assert snap == {"pending": 0, "acked_total": 3, "failed_total": 3, "dropped_total": 0, "batches_total": 2}
+
+
+def test_entries_failing_every_attempt_are_dropped():
+    queue = InMemoryQueueAdapter()
+    good, bad = _received(queue, 2)
+    queue.fail_receipts.add(bad)
+    acker = BatchAcknowledger(queue, batch_size=10, max_delay_seconds=60, max_attempts=3)
+    acker.ack(good)
+    acker.ack(bad)
+    acker.flush()
+
+    snap = acker.snapshot()
+    assert snap["acked_total"] == 1
+    assert snap["failed_total"] == 3
+    assert snap["dropped_total"] == 1
+    assert queue.pending() == 1
+
+
+def test_close_flushes_pending_and_rejects_late_acks():
+    queue = InMemoryQueueAdapter()
+    receipts = _received(queue, 4)
+    acker = BatchAcknowledger(queue, batch_size=10, max_delay_seconds=60)
+    acker.start()
+    for r in receipts[:3]:
+        acker.ack(r)
+    acker.close()
+
+    assert len(queue.deleted) == 3
+    acker.ack(receipts[3])
+    assert acker.snapshot()["dropped_total"] == 1
+    assert queue.pending() == 1
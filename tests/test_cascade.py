@@ -0,0 +1,75 @@
+from app.application.services.cascade import CascadePolicy, CascadeRouter
+
+ROUTING = {
+    "confidence_threshold": 0.8,
+    "intent_thresholds": {"cancel": 0.95},
+    "escalation_model": "gpt-4o",
+    "judge_enabled": True,
+}
+
+
+def _state(intent, confidence, **extra):
+    return {"agent_classifier": intent, "classifier_result": {"intent": intent, "confidence": confidence}, **extra}
+
+
+def test_policy_defaults_send_everything_to_the_judge():
+    policy = CascadePolicy.from_dict(None)
+    assert policy.threshold_for("billing") == 1.0
+    assert policy.escalation_model is None
+    assert policy.judge_enabled
+
+
+def test_decide_follows_the_per_intent_thresholds():
+    router = CascadeRouter(lambda: ROUTING)
+
+    assert router.decide({}) == "end"
+    assert router.decide(_state("billing", 0.85)) == "end"
+    assert router.decide(_state("cancel", 0.85)) == "escalate"
+    assert router.decide(_state("billing", 0.5)) == "escalate"
+    assert router.decide(_state("billing", 0.5, classifier_escalated=True)) == "judge"
+
+
+def test_without_escalation_model_or_judge():
+    router = CascadeRouter(lambda: {"confidence_threshold": 0.8, "judge_enabled": False})
+    assert router.decide(_state("billing", 0.5)) == "end"
+
+    router = CascadeRouter(lambda: {"confidence_threshold": 0.8})
+    assert router.decide(_state("billing", 0.5)) == "judge"
+
+
+def test_policy_follows_hot_reload():
+    config = {"routing": {"confidence_threshold": 0.8}}
+    router = CascadeRouter(lambda: config["routing"])
+    assert router.decide(_state("billing", 0.7)) == "judge"
+
+    config["routing"] = {"confidence_threshold": 0.6}
+    assert router.decide(_state("billing", 0.7)) == "end"
+
+
+def test_record_aggregates_routes_and_llm_calls():
+    router = CascadeRouter(lambda: ROUTING)
+    timings = {"resolver": 1.0, "dedupe": 1.0, "classifier": 1.0}
+
+    assert router.record(_state("billing", 0.9, node_timings=timings), graph_ms=100) == "direct"
+    assert router.record(
+        {
+            **_state("billing", 0.5, node_timings={**timings, "classifier_escalate": 1.0, "classifier_judge": 1.0}),
+            "classifier_escalated": True,
+            "agent_classifier_judge": "billing",
+        },
+        graph_ms=300,
+    ) == "escalated+judge"
+    # classifier resolvido pelo kNN e dedupe pelo fast path não chamam o LLM
+    knn_state = {
+        **_state("billing", 0.9, node_timings=timings),
+        "classifier_result": {"intent": "billing", "confidence": 0.9, "source": "knn"},
+        "dedupe_match": {"duplicate_of": "m0"},
+    }
+    assert router.record(knn_state, graph_ms=10) == "direct"
+
+    stats = router.stats()
+    assert stats["messages_total"] == 3
+    assert stats["escalation_rate"] == round(1 / 3, 4)
+    assert stats["judge_rate"] == round(1 / 3, 4)
+    assert stats["routes"]["direct"] == {"count": 2, "avg_graph_ms": 55.0, "avg_llm_calls": 2.0}
+    assert stats["routes"]["escalated+judge"] == {"count": 1, "avg_graph_ms": 300.0, "avg_llm_calls": 5.0}
@@ -0,0 +1,88 @@
+import pytest
+
+from app.application.services.idempotency import IdempotencyGuard, idempotency_key
+from app.domain.errors import DuplicateInProgressError
+from app.domain.models import WorkResult
+from app.infrastructure.cache.llm_cache import LRUTTLCache
+from app.infrastructure.idempotency.sqlite_store import SqliteIdempotencyStore
+
+
+class BrokenStore:
+    def claim(self, key, lease_seconds):
+        raise ConnectionError("store down")
+
+    def complete(self, key, result, ttl_seconds):
+        raise ConnectionError("store down")
+
+    def release(self, key):
+        raise ConnectionError("store down")
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = SqliteIdempotencyStore(tmp_path / "idempotency.db")
+    yield s
+    s.close()
+
+
+def _result() -> WorkResult:
+    return WorkResult(correlation_id="c1", output_text="pronto", intent="billing")
+
+
+def test_key_depends_on_correlation_id_and_text():
+    assert idempotency_key("c1", "texto") == idempotency_key("c1", "texto")
+    assert idempotency_key("c1", "texto") != idempotency_key("c1", "outro texto")
+    assert idempotency_key("c1", "texto") != idempotency_key("c2", "texto")
+
+
+def test_first_delivery_claims_and_redelivery_while_in_progress_raises(store):
+    guard = IdempotencyGuard(store)
+    key = idempotency_key("c1", "texto")
+
+    assert guard.begin(key) is None
+    with pytest.raises(DuplicateInProgressError):
+        guard.begin(key)
+    assert guard.stats()["in_progress"] == 1
+
+
+def test_completed_result_is_returned_from_store_then_local_tier(store):
+    key = idempotency_key("c1", "texto")
+    IdempotencyGuard(store).begin(key)
+    IdempotencyGuard(store).complete(key, _result())
+
+    # outro processo: sem cache local preenchido, acha no store
+    guard = IdempotencyGuard(store, local=LRUTTLCache())
+    assert guard.begin(key) == _result()
+    assert guard.begin(key) == _result()
+    stats = guard.stats()
+    assert (stats["store_hits"], stats["local_hits"]) == (1, 1)
+
+
+def test_abandon_lets_the_next_delivery_process_again(store):
+    guard = IdempotencyGuard(store)
+    key = idempotency_key("c1", "texto")
+    guard.begin(key)
+    guard.abandon(key)
+
+    assert guard.begin(key) is None
+    assert guard.stats()["claims"] == 2
+
+
+def test_expired_in_progress_claim_can_be_taken_over(store):
+    key = idempotency_key("c1", "texto")
+    IdempotencyGuard(store, in_progress_seconds=-1).begin(key)
+
+    assert IdempotencyGuard(store).begin(key) is None
+
+
+def test_store_errors_do_not_block_the_message():
+    guard = IdempotencyGuard(BrokenStore())
+    key = idempotency_key("c1", "texto")
+
+    assert guard.begin(key) is None
+    guard.complete(key, _result())
+    guard.abandon(key)
+    assert guard.stats()["errors"] == 3
@@ -0,0 +1,104 @@
+from app.application.services.input_preprocessor import InputPreprocessor, normalize_text
+
+GMAIL_REPLY_PT = """Oi, a fatura continua vindo com o valor errado.
+Segue o print.
+
+Em seg., 13 de out. de 2026 às 10:02, Suporte Acme <suporte@acme.com.br>
+escreveu:
+
+> Olá, João!
+> Já corrigimos o valor da sua fatura.
+>
+> Em sex., 10 de out. de 2026 às 18:40, João <joao@example.com> escreveu:
+>> Minha fatura veio com valor maior."""
+
+GMAIL_REPLY_EN = """Still broken after the update, see the attached log.
+
+On Mon, Oct 13, 2026 at 10:02 AM Acme Support <support@acme.com> wrote:
+> Hi Jane,
+> Please update the app to 4.2 and try again."""
+
+OUTLOOK_TOP_POST_PT = """Bom dia,
+
+Não recebi o estorno até hoje.
+
+Att,
+Maria
+
+De: Atendimento Acme <atendimento@acme.com.br>
+Enviado: segunda-feira, 13 de outubro de 2026 09:15
+Para: Maria Souza <maria@example.com>
+Assunto: RE: Cobrança duplicada
+
+Olá Maria, o estorno será feito em até 5 dias úteis."""
+
+OUTLOOK_ORIGINAL_MESSAGE = """Please cancel my subscription.
+
+-----Original Message-----
+From: Acme Billing
+Sent: Monday, October 13, 2026 9:15 AM
+Renewal notice: your plan renews on Nov 1."""
+
+
+def test_gmail_reply_with_wrapped_header_is_cut():
+    assert normalize_text(GMAIL_REPLY_PT) == "Oi, a fatura continua vindo com o valor errado.\nSegue o print."
+    assert normalize_text(GMAIL_REPLY_EN) == "Still broken after the update, see the attached log."
+
+
+def test_outlook_history_is_cut():
+    assert normalize_text(OUTLOOK_TOP_POST_PT) == "Bom dia,\n\nNão recebi o estorno até hoje.\n\nAtt,\nMaria"
+    assert normalize_text(OUTLOOK_ORIGINAL_MESSAGE) == "Please cancel my subscription."
+
+
+def test_header_like_sentence_in_the_body_is_kept():
+    text = (
+        "Bom dia.\n"
+        "Em reunião ontem, o gerente escreveu:\n"
+        "precisamos do relatório até sexta.\n"
+        "Vocês conseguem gerar a segunda via?"
+    )
+    assert normalize_text(text) == text
+
+
+def test_inline_answers_between_quotes_are_kept():
+    text = (
+        "Respostas abaixo.\n\n"
+        "Em seg., 13 de out. de 2026 às 10:02, Suporte <suporte@acme.com.br> escreveu:\n"
+        "> Qual o número do pedido?\n"
+        "É o 48213.\n"
+        "> O pagamento foi por cartão?\n"
+        "Sim, crédito."
+    )
+    assert normalize_text(text) == text
+
+
+def test_from_date_lines_without_a_header_block_are_kept():
+    text = (
+        "O e-mail de confirmação chegou estranho:\n"
+        "From: noreply@acme.com\n"
+        "Date: 13/10/2026\n"
+        "e depois disso o pedido sumiu do app."
+    )
+    assert normalize_text(text) == text
+
+
+def test_message_that_is_only_a_forward_is_kept():
+    text = "---------- Forwarded message ---------\nFrom: Acme\nDate: Mon, Oct 13\nSubject: Renewal\n\nYour plan renews."
+    assert normalize_text(text) == text
+
+
+def test_setting_off_keeps_the_history():
+    assert normalize_text(GMAIL_REPLY_EN, strip_reply_history=False) == GMAIL_REPLY_EN
+
+    class WordTokenizer:
+        def count(self, text: str) -> int:
+            return len(text.split())
+
+        def truncate(self, text: str, max_tokens: int, head_ratio: float = 0.7) -> str:
+            return " ".join(text.split()[:max_tokens])
+
+    kept = InputPreprocessor(WordTokenizer(), budgets=dict, strip_reply_history=False).prepare(OUTLOOK_TOP_POST_PT)
+    cut = InputPreprocessor(WordTokenizer(), budgets=dict).prepare(OUTLOOK_TOP_POST_PT)
+    assert "Cobrança duplicada" in kept.text
+    assert cut.text == "Bom dia,\n\nNão recebi o estorno até hoje.\n\nAtt,\nMaria"
+    assert cut.tokens < kept.tokens == kept.tokens_raw
@@ -0,0 +1,75 @@
+import pytest
+
+from app.infrastructure.llm.json_repair import coerce, repair_json, tolerant_loads
+
+SCHEMA = {
+    "type": "object",
+    "additionalProperties": False,
+    "properties": {
+        "intent": {"type": "string", "enum": ["billing", "support"]},
+        "confidence": {"type": "number"},
+        "urgent": {"type": "boolean"},
+        "tags": {"type": "array", "items": {"type": "string"}},
+        "count": {"type": "integer"},
+    },
+}
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('{"intent": "billing"}', {"intent": "billing"}),
+        ('Claro! ```json\n{"intent": "billing"}\n```', {"intent": "billing"}),
+        ("{'intent': 'billing', 'ok': True, 'x': None}", {"intent": "billing", "ok": True, "x": None}),
+        ('{intent: "billing", confidence: 0.9,}', {"intent": "billing", "confidence": 0.9}),
+        ('[1, 2, 3,]', [1, 2, 3]),
+        ("{'quote': 'ele disse \"oi\"'}", {"quote": 'ele disse "oi"'}),
+    ],
+)
+def test_tolerant_loads_fixes_common_llm_mistakes(text, expected):
+    assert tolerant_loads(text) == expected
+
+
+def test_truncated_object_is_closed_or_cut_at_last_complete_member():
+    assert tolerant_loads('{"intent": "billing", "tags": ["a", "b"') == {"intent": "billing", "tags": ["a", "b"]}
+    assert tolerant_loads('{"intent": "billing", "confidence": 0.') == {"intent": "billing"}
+    assert tolerant_loads('{"intent": "bill') == {"intent": "bill"}
+
+
+def test_text_without_json_raises():
+    with pytest.raises(ValueError):
+        tolerant_loads("não sei classificar")
+
+
+def test_coerce_adjusts_unambiguous_types():
+    value = {
+        "intent": "Billing",
+        "confidence": "0,85",
+        "urgent": "sim",
+        "tags": "fatura",
+        "count": "3",
+        "extra": 1,
+    }
+    assert coerce(value, SCHEMA) == {
+        "intent": "billing",
+        "confidence": 0.85,
+        "urgent": True,
+        "tags": ["fatura"],
+        "count": 3,
+    }
+
+
+def test_coerce_leaves_ambiguous_values_for_the_validator():
+    assert coerce({"intent": "vendas", "confidence": "alta", "urgent": "talvez"}, SCHEMA) == {
+        "intent": "vendas",
+        "confidence": "alta",
+        "urgent": "talvez",
+    }
+    assert coerce("qualquer", None) == "qualquer"
+
+
+def test_repair_json_extracts_and_coerces():
+    assert repair_json("Resposta: {'intent': 'SUPPORT', 'confidence': '1'}", SCHEMA) == {
+        "intent": "support",
+        "confidence": 1.0,
+    }
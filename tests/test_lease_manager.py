@@ -0,0 +1,83 @@
+from typing import List
+
+from app.application.services.lease_manager import VisibilityLeaseManager
+from app.infrastructure.memory.queue import InMemoryQueueAdapter
+
+
+def _received(queue: InMemoryQueueAdapter, n: int) -> List[str]:
+    for i in range(n):
+        queue.send(f'{{"input_text": "m{i}"}}')
+    return [m.receipt_handle for m in queue.receive(max_messages=n, wait_time_seconds=0, visibility_timeout=30)]
+
+
+def _manager(queue, **overrides) -> VisibilityLeaseManager:
+    kwargs = dict(extension_seconds=30, margin_seconds=10, max_lease_seconds=300, interval_seconds=60)
+    kwargs.update(overrides)
+    return VisibilityLeaseManager(queue, **kwargs)
+
+
+def test_extends_only_leases_inside_the_margin():
+    queue = InMemoryQueueAdapter()
+    near, far = _received(queue, 2)
+    leases = _manager(queue)
+    leases.track("m-near", near, visibility_timeout=5)
+    leases.track("m-far", far, visibility_timeout=60)
+
+    leases.heartbeat()
+
+    snap = leases.snapshot()
+    assert snap["active"] == 2
+    assert snap["extensions_total"] == 1
+    # estendido para 30s: fora da margem no próximo heartbeat
+    leases.heartbeat()
+    assert leases.snapshot()["extensions_total"] == 1
+
+
+def test_failed_extensions_are_counted_and_retried():
+    queue = InMemoryQueueAdapter()
+    (receipt,) = _received(queue, 1)
+    queue.fail_receipts.add(receipt)
+    leases = _manager(queue)
+    leases.track("m1", receipt, visibility_timeout=5)
+
+    leases.heartbeat()
+    leases.heartbeat()
+    assert leases.snapshot()["extension_failures_total"] == 2
+
+    queue.fail_receipts.clear()
+    leases.heartbeat()
+    snap = leases.snapshot()
+    assert snap["extensions_total"] == 1
+    assert snap["active"] == 1
+
+
+def test_stops_extending_past_max_lease():
+    queue = InMemoryQueueAdapter()
+    (receipt,) = _received(queue, 1)
+    leases = _manager(queue, extension_seconds=30, max_lease_seconds=20)
+    leases.track("m1", receipt, visibility_timeout=5)
+
+    leases.heartbeat()
+
+    snap = leases.snapshot()
+    assert snap["active"] == 0
+    assert snap["capped_total"] == 1
+    assert snap["extensions_total"] == 0
+
+
+def test_released_leases_are_not_extended():
+    queue = InMemoryQueueAdapter()
+    (receipt,) = _received(queue, 1)
+    leases = _manager(queue)
+    leases.track("m1", receipt, visibility_timeout=5)
+    leases.release(receipt)
+    leases.release(receipt)
+
+    leases.heartbeat()
+    assert leases.snapshot() == {
+        "active": 0,
+        "oldest_lease_age_s": 0.0,
+        "extensions_total": 0,
+        "extension_failures_total": 0,
+        "capped_total": 0,
+    }
@@ -0,0 +1,33 @@
+from app.infrastructure.cache.llm_cache import LRUTTLCache
+from app.infrastructure.llm.opeanai_provider import OpenAILangChainAdapter
+from app.prompts.registry import PromptRegistry
+
+
+def _adapter() -> OpenAILangChainAdapter:
+    registry = PromptRegistry()
+    registry.load()
+    return OpenAILangChainAdapter(
+        registry=registry,
+        api_key="test",
+        default_model="gpt-4o-mini",
+        default_temperature=0.2,
+        cache=LRUTTLCache(),
+    )
+
+
+def _key(adapter: OpenAILangChainAdapter, content: str) -> str:
+    spec = adapter._registry.get("classifier-agent")
+    return adapter._cache_key("structured", spec, "gpt-4o-mini", 0.2, [{"role": "user", "content": content}])
+
+
+def test_internal_whitespace_is_part_of_the_key():
+    adapter = _adapter()
+    trace = "Traceback:\n  File \"a.py\", line 1\n    x = 1"
+    flattened = "Traceback: File \"a.py\", line 1 x = 1"
+    assert _key(adapter, trace) != _key(adapter, flattened)
+    assert _key(adapter, "| a | b |\n|---|---|") != _key(adapter, "| a | b | |---|---|")
+
+
+def test_surrounding_whitespace_is_ignored():
+    adapter = _adapter()
+    assert _key(adapter, "  boleto não pago\n") == _key(adapter, "boleto não pago")
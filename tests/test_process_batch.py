@@ -0,0 +1,125 @@
+import json
+import threading
+from typing import Any, Dict, List
+
+from app.application.ports.llm import LLMRequest
+from app.application.services.checkpoint import CheckpointStore
+from app.application.use_cases.process_batch import ProcessBatch, ProviderBatch
+from app.domain.errors import PermanentError, TransientError
+from app.domain.models import WorkResult
+from app.infrastructure.batch.local_batch import LocalBatchProvider
+
+
+class FakeUseCase:
+    """ProcessMessage de mentira: o texto decide o desfecho da linha."""
+
+    def __init__(self, transient: set[str] | None = None):
+        self.transient = transient or set()
+        self.calls: List[str] = []
+        self._lock = threading.Lock()
+
+    def execute(self, body: str, message_id: str | None = None) -> WorkResult:
+        text = json.loads(body)["input_text"]
+        with self._lock:
+            self.calls.append(text)
+        if text in self.transient:
+            raise TransientError("429 exhausted")
+        if text == "invalid":
+            raise PermanentError("bad input")
+        return WorkResult(correlation_id=message_id or "", output_text=text.upper())
+
+
+class FakeLLM:
+    """Só a parte do LLMPort usada pelo provider-batch."""
+
+    def batch_request(self, req: LLMRequest, custom_id: str) -> Dict[str, Any]:
+        body = {"model": "fake", "messages": [{"role": "user", "content": req.variables["input_text"]}]}
+        return {"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}
+
+    def complete_batch_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        text = request["body"]["messages"][0]["content"]
+        out: Dict[str, Any] = {"id": f"local-{request['custom_id']}", "custom_id": request["custom_id"]}
+        if text == "boom":
+            out.update(response=None, error={"code": "TransientError", "message": "429"})
+            return out
+        content = "isto não é json" if text == "garbage" else json.dumps({"intent": text})
+        out["response"] = {"status_code": 200, "body": {"choices": [{"message": {"content": content}}]}}
+        return out
+
+    def parse_structured(self, prompt_id: str, text: str, correlation_id: str | None = None):
+        try:
+            return json.loads(text)
+        except ValueError:
+            return None
+
+
+def _write_input(path, texts: List[str]) -> None:
+    lines = [json.dumps({"input_text": t, "correlation_id": f"c-{t}"}) if t else "" for t in texts]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _read_output(path) -> List[Dict[str, Any]]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_process_batch_keeps_input_order_and_records_failures(tmp_path):
+    src, dst = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_input(src, ["a", "b", "", "invalid", "c"] + [f"x{i}" for i in range(20)])
+
+    with open(src, "rb") as source, open(dst, "wb") as sink:
+        cp = ProcessBatch(FakeUseCase(), workers=4, max_in_flight=4).run(source, sink)
+
+    out = _read_output(dst)
+    assert [r.get("output_text") for r in out[:4]] == ["A", "B", None, "C"]
+    assert out[2]["status"] == "permanent_error"
+    assert cp.done and cp.processed == 24 and cp.failed == 1
+
+
+def test_process_batch_stops_on_transient_error_and_resumes_from_checkpoint(tmp_path):
+    src, dst = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_input(src, ["a", "b", "flaky", "c"])
+    store = CheckpointStore(tmp_path / "cp.json")
+
+    with open(src, "rb") as source, open(dst, "w+b") as sink:
+        cp = ProcessBatch(FakeUseCase(transient={"flaky"}), workers=1, max_in_flight=1).run(source, sink, store)
+    assert not cp.done
+    assert cp.processed == 2
+    assert [r["output_text"] for r in _read_output(dst)] == ["A", "B"]
+
+    use_case = FakeUseCase()
+    with open(src, "rb") as source, open(dst, "r+b") as sink:
+        cp = ProcessBatch(use_case, workers=2).run(source, sink, store)
+    assert cp.done and cp.processed == 4
+    assert use_case.calls == ["flaky", "c"]
+    assert [r["output_text"] for r in _read_output(dst)] == ["A", "B", "FLAKY", "C"]
+
+    # terminado: rodar de novo não processa nada
+    with open(src, "rb") as source, open(dst, "r+b") as sink:
+        assert ProcessBatch(use_case, workers=2).run(source, sink, store).done
+    assert len(use_case.calls) == 2
+
+
+def test_provider_batch_with_local_provider(tmp_path):
+    src, dst = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_input(src, ["billing", "boom", "", "garbage", "support"])
+    src.write_text(src.read_text(encoding="utf-8") + "não é json\n", encoding="utf-8")
+    llm = FakeLLM()
+    store = CheckpointStore(tmp_path / "cp.json")
+    batch = ProviderBatch(
+        llm,
+        LocalBatchProvider(llm, tmp_path / "provider", workers=2),
+        prompt_ids=["classifier-agent"],
+        work_dir=tmp_path / "work",
+        poll_interval_seconds=0,
+    )
+
+    with open(dst, "w+b") as sink:
+        cp = batch.run(src, sink, store)
+
+    out = _read_output(dst)
+    assert [r["status"] for r in out] == ["ok", "failed", "failed", "ok", "permanent_error"]
+    assert out[0]["outputs"] == {"classifier-agent": {"intent": "billing"}}
+    assert out[0]["correlation_id"] == "c-billing"
+    assert out[2]["errors"] == {"classifier-agent": "invalid structured output"}
+    assert cp.done and cp.processed == 5 and cp.failed == 3
+    assert store.load().batch_id == cp.batch_id
@@ -0,0 +1,181 @@
+import time
+from typing import List, Set
+
+from app.application.ports.result_sink import SinkRecord, SinkWriteResult
+from app.application.services.acknowledger import BatchAcknowledger
+from app.application.services.lease_manager import VisibilityLeaseManager
+from app.application.services.result_writer import BatchResultWriter
+from app.domain.models import WorkResult
+from app.infrastructure.memory.queue import InMemoryQueueAdapter
+
+
+class FakeSink:
+    def __init__(self, fail: Set[str] | None = None, reject: Set[str] | None = None, raise_times: int = 0):
+        self.fail = fail or set()
+        self.reject = reject or set()
+        self.raise_times = raise_times
+        self.batches: List[List[str]] = []
+        self.closed = False
+
+    def write_batch(self, records: List[SinkRecord]) -> SinkWriteResult:
+        if self.raise_times:
+            self.raise_times -= 1
+            raise ConnectionError("sink down")
+        ids = [r.message_id for r in records]
+        self.batches.append(ids)
+        return SinkWriteResult(failed=[i for i in ids if i in self.fail], rejected=[i for i in ids if i in self.reject])
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def _wait_for(predicate, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def _received(queue: InMemoryQueueAdapter, n: int):
+    for i in range(n):
+        queue.send(f'{{"input_text": "m{i}"}}')
+    return queue.receive(max_messages=n, wait_time_seconds=0, visibility_timeout=30)
+
+
+def _result(message_id: str) -> WorkResult:
+    return WorkResult(correlation_id=message_id, output_text="ok")
+
+
+def test_acks_only_after_the_batch_is_written():
+    queue = InMemoryQueueAdapter()
+    messages = _received(queue, 3)
+    acker = BatchAcknowledger(queue, batch_size=10, max_delay_seconds=60)
+    sink = FakeSink()
+    writer = BatchResultWriter(sink, acker, batch_size=10, max_delay_seconds=60)
+    for m in messages:
+        writer.submit(m.receipt_handle, m.message_id, _result(m.message_id))
+
+    acker.flush()
+    assert queue.deleted == []
+
+    writer.flush()
+    acker.flush()
+    assert sink.batches == [[m.message_id for m in messages]]
+    assert sorted(queue.deleted) == sorted(m.message_id for m in messages)
+
+
+def test_failed_records_are_retried_then_left_unacked():
+    queue = InMemoryQueueAdapter()
+    good, bad = _received(queue, 2)
+    acker = BatchAcknowledger(queue, batch_size=10, max_delay_seconds=60)
+    sink = FakeSink(fail={bad.message_id})
+    writer = BatchResultWriter(sink, acker, batch_size=10, max_delay_seconds=60, max_attempts=3)
+    writer.submit(good.receipt_handle, good.message_id, _result(good.message_id))
+    writer.submit(bad.receipt_handle, bad.message_id, _result(bad.message_id))
+
+    writer.flush()
+    acker.flush()
+
+    snap = writer.snapshot()
+    assert snap["written_total"] == 1
+    assert snap["failed_total"] == 3
+    assert snap["dropped_total"] == 1
+    assert queue.deleted == [good.message_id]
+    assert queue.pending() == 1
+
+
+def test_rejected_records_are_acked_without_retry():
+    queue = InMemoryQueueAdapter()
+    good, huge = _received(queue, 2)
+    acker = BatchAcknowledger(queue, batch_size=10, max_delay_seconds=60)
+    sink = FakeSink(reject={huge.message_id})
+    writer = BatchResultWriter(sink, acker, batch_size=10, max_delay_seconds=60, max_attempts=3)
+    writer.submit(good.receipt_handle, good.message_id, _result(good.message_id))
+    writer.submit(huge.receipt_handle, huge.message_id, _result(huge.message_id))
+
+    writer.flush()
+    acker.flush()
+
+    snap = writer.snapshot()
+    assert (snap["written_total"], snap["rejected_total"], snap["failed_total"]) == (1, 1, 0)
+    assert snap["batches_total"] == 1
+    assert sorted(queue.deleted) == sorted([good.message_id, huge.message_id])
+
+
+def test_partial_batch_goes_out_after_max_delay():
+    queue = InMemoryQueueAdapter()
+    (m,) = _received(queue, 1)
+    acker = BatchAcknowledger(queue, batch_size=10, max_delay_seconds=0.01)
+    acker.start()
+    sink = FakeSink()
+    writer = BatchResultWriter(sink, acker, batch_size=10, max_delay_seconds=0.05)
+    writer.start()
+    try:
+        writer.submit(m.receipt_handle, m.message_id, _result(m.message_id))
+        assert _wait_for(lambda: queue.deleted == [m.message_id])
+        assert sink.batches == [[m.message_id]]
+    finally:
+        writer.close()
+        acker.close()
+
+
+def test_sink_exception_fails_the_whole_batch_for_retry():
+    queue = InMemoryQueueAdapter()
+    messages = _received(queue, 2)
+    acker = BatchAcknowledger(queue, batch_size=10, max_delay_seconds=60)
+    sink = FakeSink(raise_times=1)
+    writer = BatchResultWriter(sink, acker, batch_size=10, max_delay_seconds=60, max_attempts=3)
+    for m in messages:
+        writer.submit(m.receipt_handle, m.message_id, _result(m.message_id))
+
+    writer.flush()
+
+    snap = writer.snapshot()
+    assert snap["failed_total"] == 2
+    assert snap["written_total"] == 2
+    assert snap["batches_total"] == 2
+
+
+def test_backpressure_above_max_pending():
+    queue = InMemoryQueueAdapter()
+    messages = _received(queue, 3)
+    acker = BatchAcknowledger(queue)
+    writer = BatchResultWriter(FakeSink(), acker, batch_size=10, max_delay_seconds=0.5, max_pending=2)
+    writer.submit(messages[0].receipt_handle, messages[0].message_id, _result("a"))
+    assert writer.backpressure_seconds() == 0.0
+    writer.submit(messages[1].receipt_handle, messages[1].message_id, _result("b"))
+    assert writer.backpressure_seconds() == 0.5
+
+
+def test_lease_is_held_until_the_result_is_acked():
+    queue = InMemoryQueueAdapter()
+    (m,) = _received(queue, 1)
+    leases = VisibilityLeaseManager(queue, extension_seconds=30, margin_seconds=10, max_lease_seconds=300, interval_seconds=60)
+    leases.track(m.message_id, m.receipt_handle, visibility_timeout=30)
+    acker = BatchAcknowledger(queue, batch_size=10, max_delay_seconds=60)
+    writer = BatchResultWriter(FakeSink(), acker, batch_size=10, max_delay_seconds=60, leases=leases)
+
+    writer.submit(m.receipt_handle, m.message_id, _result(m.message_id))
+    assert leases.snapshot()["active"] == 1
+
+    writer.flush()
+    assert leases.snapshot()["active"] == 0
+
+
+def test_close_flushes_closes_the_sink_and_rejects_late_results():
+    queue = InMemoryQueueAdapter()
+    first, late = _received(queue, 2)
+    acker = BatchAcknowledger(queue, batch_size=10, max_delay_seconds=60)
+    sink = FakeSink()
+    writer = BatchResultWriter(sink, acker, batch_size=10, max_delay_seconds=60)
+    writer.start()
+    writer.submit(first.receipt_handle, first.message_id, _result(first.message_id))
+    writer.close()
+    acker.flush()
+
+    assert sink.closed
+    assert queue.deleted == [first.message_id]
+    writer.submit(late.receipt_handle, late.message_id, _result(late.message_id))
+    assert writer.snapshot()["dropped_total"] == 1
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import List, Sequence
+
+from app.application.ports.vector_index import VectorItem, VectorMatch
+from app.application.services.semantic_dedupe import SemanticDeduper
+
+
+class FakeEmbeddings:
+    """Um eixo por texto: textos diferentes nunca são parecidos."""
+
+    def __init__(self, dimensions: int = 8):
+        self._dimensions = dimensions
+        self._axes: dict[str, int] = {}
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        out = []
+        for t in texts:
+            axis = self._axes.setdefault(t, len(self._axes) % self._dimensions)
+            out.append([1.0 if i == axis else 0.0 for i in range(self._dimensions)])
+        return out
+
+
+class FakeIndex:
+    def __init__(self):
+        self.items: List[VectorItem] = []
+        self.batches = 0
+        self._lock = threading.Lock()
+
+    def search(self, vector: Sequence[float], k: int = 1) -> List[VectorMatch]:
+        with self._lock:
+            items = list(self.items)
+        scored = [VectorMatch(id=it.id, score=sum(a * b for a, b in zip(it.vector, vector))) for it in items]
+        return sorted(scored, key=lambda m: m.score, reverse=True)[:k]
+
+    def add_batch(self, items: List[VectorItem]) -> None:
+        with self._lock:
+            self.items.extend(items)
+            self.batches += 1
+
+
+def _wait_for(predicate, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_partial_buffer_is_written_after_max_delay_without_new_misses():
+    index = FakeIndex()
+    deduper = SemanticDeduper(FakeEmbeddings(), index, write_batch_size=32, max_write_delay_seconds=0.05)
+    try:
+        assert deduper.find_duplicate("m1", "primeiro") is None
+        assert _wait_for(lambda: len(index.items) == 1)
+        assert deduper.stats()["written_total"] == 1
+    finally:
+        deduper.close()
+
+
+def test_full_buffer_is_written_at_once():
+    index = FakeIndex()
+    deduper = SemanticDeduper(FakeEmbeddings(), index, write_batch_size=2, max_write_delay_seconds=60.0)
+    try:
+        deduper.find_duplicate("m1", "a")
+        deduper.find_duplicate("m2", "b")
+        assert [it.id for it in index.items] == ["m1", "m2"]
+        assert index.batches == 1
+    finally:
+        deduper.close()
+
+
+def test_pending_items_count_as_seen_and_close_flushes():
+    index = FakeIndex()
+    deduper = SemanticDeduper(FakeEmbeddings(), index, write_batch_size=32, max_write_delay_seconds=60.0)
+
+    assert deduper.find_duplicate("m1", "mesmo texto") is None
+    match = deduper.find_duplicate("m2", "mesmo texto")
+    assert match is not None and match.duplicate_of == "m1"
+    assert index.items == []
+
+    deduper.close()
+    assert [it.id for it in index.items] == ["m1"]
@@ -0,0 +1,73 @@
+from typing import Any, Dict, List
+
+import pytest
+
+from app.application.ports.result_sink import SinkRecord
+from app.domain.models import WorkResult
+from app.infrastructure.sinks.sqs_sink import SQS_MESSAGE_MAX_BYTES, SqsResultSink
+
+
+class FakeSqsClient:
+    """send_message_batch com falha por chamada ou por entrada."""
+
+    def __init__(self, raise_on_calls=(), failed_entries: Dict[str, Dict[str, Any]] | None = None):
+        self.raise_on_calls = set(raise_on_calls)
+        self.failed_entries = failed_entries or {}
+        self.calls: List[List[Dict[str, Any]]] = []
+
+    def send_message_batch(self, QueueUrl: str, Entries: List[Dict[str, Any]]):
+        self.calls.append(Entries)
+        if len(self.calls) in self.raise_on_calls:
+            raise ConnectionError("endpoint unreachable")
+        failed = []
+        for e in Entries:
+            body_id = e["MessageAttributes"]["correlation_id"]["StringValue"]
+            if body_id in self.failed_entries:
+                failed.append({"Id": e["Id"], **self.failed_entries[body_id]})
+        return {"Successful": [], "Failed": failed}
+
+
+def _sink(client: FakeSqsClient) -> SqsResultSink:
+    sink = SqsResultSink(region="us-east-1", queue_url="https://sqs.local/results")
+    sink._client = client
+    return sink
+
+
+def _records(n: int, output_text: str = "ok") -> List[SinkRecord]:
+    return [SinkRecord(message_id=f"m{i}", result=WorkResult(correlation_id=f"m{i}", output_text=output_text)) for i in range(n)]
+
+
+def test_error_in_one_call_fails_only_that_chunk():
+    client = FakeSqsClient(raise_on_calls={2})
+    result = _sink(client).write_batch(_records(25))
+
+    assert [len(c) for c in client.calls] == [10, 10, 5]
+    assert result.failed == [f"m{i}" for i in range(10, 20)]
+    assert result.rejected == []
+
+
+def test_oversized_records_are_rejected_without_a_call():
+    records = _records(2) + [SinkRecord("huge", WorkResult(correlation_id="huge", output_text="x" * SQS_MESSAGE_MAX_BYTES))]
+    client = FakeSqsClient()
+    result = _sink(client).write_batch(records)
+
+    assert result.rejected == ["huge"]
+    assert result.failed == []
+    assert [[e["Id"] for e in c] for c in client.calls] == [["0", "1"]]
+
+
+@pytest.mark.parametrize("sender_fault, bucket", [(True, "rejected"), (False, "failed")])
+def test_entry_failures_split_by_sender_fault(sender_fault, bucket):
+    client = FakeSqsClient(failed_entries={"m1": {"SenderFault": sender_fault, "Code": "X"}})
+    result = _sink(client).write_batch(_records(3))
+
+    assert getattr(result, bucket) == ["m1"]
+    assert len(result.failed) + len(result.rejected) == 1
+
+
+def test_chunks_respect_the_batch_payload_limit():
+    client = FakeSqsClient()
+    result = _sink(client).write_batch(_records(4, output_text="x" * (SQS_MESSAGE_MAX_BYTES // 3)))
+
+    assert [len(c) for c in client.calls] == [2, 2]
+    assert result.failed == [] and result.rejected == []
@@ -0,0 +1,56 @@
+from app.infrastructure.llm.stream_parser import ABORTED, COMPLETE, PENDING, StreamingJsonParser
+
+
+def _feed(parser: StreamingJsonParser, text: str, size: int = 3) -> str:
+    state = parser.state
+    for i in range(0, len(text), size):
+        state = parser.feed(text[i:i + size])
+        if state != PENDING:
+            break
+    return state
+
+
+def _intent_check(key, value):
+    if key == "intent" and value not in ("billing", "support"):
+        return f"unexpected value {value!r}"
+    return None
+
+
+def test_completes_when_the_object_closes_and_ignores_trailing_text():
+    parser = StreamingJsonParser(check_member=_intent_check)
+    text = 'Claro! ```json\n{"intent": "billing", "confidence": 0.9, "tags": {"a": [1, "}"]}}\n``` fim'
+
+    assert _feed(parser, text) == COMPLETE
+    assert parser.object_text == '{"intent": "billing", "confidence": 0.9, "tags": {"a": [1, "}"]}}'
+    # depois de COMPLETE o resto do stream é ignorado
+    assert parser.feed("{\"intent\": \"x\"}") == COMPLETE
+
+
+def test_aborts_on_first_member_that_violates_the_schema():
+    parser = StreamingJsonParser(check_member=_intent_check)
+
+    assert _feed(parser, '{"intent": "vendas", "confidence": 0.9, "reason": "muito texto ...') == ABORTED
+    assert parser.abort_reason == "intent: unexpected value 'vendas'"
+    assert parser.object_text is None
+
+
+def test_commas_inside_strings_and_nested_values_do_not_split_members():
+    seen = []
+    parser = StreamingJsonParser(check_member=lambda k, v: seen.append((k, v)))
+
+    assert _feed(parser, '{"text": "a, b", "nested": {"x": 1, "y": [1, 2]}, "n": 3}', size=1) == COMPLETE
+    assert seen == [("text", "a, b"), ("nested", {"x": 1, "y": [1, 2]}), ("n", 3)]
+
+
+def test_aborts_on_top_level_array_and_on_long_preamble():
+    assert _feed(StreamingJsonParser(), "[1, 2]") == ABORTED
+
+    parser = StreamingJsonParser(max_preamble_chars=10)
+    assert _feed(parser, "Vou pensar um pouco antes de responder") == ABORTED
+    assert "10 chars" in parser.abort_reason
+
+
+def test_stays_pending_on_truncated_object():
+    parser = StreamingJsonParser(check_member=_intent_check)
+    assert _feed(parser, '{"intent": "billing", "confidence": 0.') == PENDING
+    assert parser.text == '{"intent": "billing", "confidence": 0.'
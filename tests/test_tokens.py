@@ -0,0 +1,31 @@
+from app.infrastructure.llm import tokens
+
+
+def test_failed_encoding_lookup_is_retried_after_the_backoff(monkeypatch):
+    calls = []
+    outcomes = iter([None, "enc"])
+
+    def load(model):
+        calls.append(model)
+        return next(outcomes)
+
+    monkeypatch.setattr(tokens, "_load_encoding", load)
+    monkeypatch.setattr(tokens, "ENCODING_RETRY_SECONDS", 60.0)
+
+    assert tokens._encoding("retry-model") is None
+    # dentro do backoff: heurística, sem nova tentativa
+    assert tokens._encoding("retry-model") is None
+    assert calls == ["retry-model"]
+
+    monkeypatch.setattr(tokens, "ENCODING_RETRY_SECONDS", 0.0)
+    assert tokens._encoding("retry-model") == "enc"
+    # sucesso fica em cache
+    assert tokens._encoding("retry-model") == "enc"
+    assert calls == ["retry-model", "retry-model"]
+
+
+def test_heuristic_count_while_the_encoding_is_unavailable(monkeypatch):
+    monkeypatch.setattr(tokens, "_load_encoding", lambda model: None)
+
+    assert tokens.count_tokens("a" * 10, "offline-model") == 3
+    assert tokens.count_message_tokens([{"role": "user", "content": "abcd"}], "offline-model") == 1 + tokens.MESSAGE_OVERHEAD_TOKENS